@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+
+import argparse
+import time
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.mongoDbService import MongoDbService
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move ended seasons to the compressed archive collections - the '
+                                                 'seasons are copied and marked archived, then deleted from the hot '
+                                                 'collections once every worker reads them from the archive')
+    parser.add_argument('seasons', type=int, nargs='+', help='the seasons to archive')
+    parser.add_argument('--batch-size', type=int, default=config['archive']['batch_size'],
+                        help='the documents copied in one bulk write')
+    parser.add_argument('--grace', type=float, default=config['archive']['refresh_interval'],
+                        help='the seconds to wait before the delete, the workers reload the archived seasons '
+                             'every archive.refresh_interval seconds')
+    parser.add_argument('--keep-hot', action='store_true', help='archive the seasons without deleting them')
+    args = parser.parse_args()
+
+    logger.info(f'Archive Seasons - start | seasons: {args.seasons}')
+    db = MongoDbService()
+    for season in args.seasons:
+        counts = db.archive_season(season, args.batch_size)
+        print(f'{season}: archived {counts["matches"]} matches, {counts["teams"]} teams')
+
+    if not args.keep_hot:
+        print(f'waiting {args.grace:g} seconds for the workers to read the seasons from the archive')
+        time.sleep(args.grace)
+        for season in args.seasons:
+            deleted = db.purge_archived_season(season)
+            print(f'{season}: deleted {deleted["matches"]} matches, {deleted["teams"]} teams from the hot collections')
+    logger.info(f'Archive Seasons - end | seasons: {args.seasons}')
+
+
+if __name__ == '__main__':
+    main()
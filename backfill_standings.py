@@ -0,0 +1,28 @@
+#!/usr/bin/python3
+
+import argparse
+
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.mongoDbService import MongoDbService
+
+logger = LoggerService().logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild the standings snapshots (the point in time tables) of the '
+                                                 'season leagues from the ended matches - run it while no results '
+                                                 'of the seasons are recorded')
+    parser.add_argument('--seasons', type=int, nargs='*', help='the seasons to rebuild (default: every season)')
+    args = parser.parse_args()
+
+    logger.info(f'Backfill Standings - start | seasons: {args.seasons}')
+    db = MongoDbService()
+    seasons = args.seasons or db.find_match_seasons()
+    for season in seasons:
+        snapshots = db.backfill_standings_snapshots(season)
+        print(f'{season}: {snapshots} snapshots')
+    logger.info(f'Backfill Standings - end | seasons: {seasons}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/python3
+
+import argparse
+import os
+
+from services.exportServices.exportService import team_dictionary, export_teams, export_matches
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.leagueProvider import parse_league_from_db
+from services.mongoDbService.mongoDbService import MongoDbService
+
+logger = LoggerService().logger
+
+
+def write_chunks(path, chunks):
+    with open(path, 'wb') as export_file:
+        for chunk in chunks:
+            export_file.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the teams and the matches of a league season as gzip CSV')
+    parser.add_argument('name', help='the league name')
+    parser.add_argument('season', type=int, help='the season year')
+    parser.add_argument('--output', default='.', help='the output directory')
+    args = parser.parse_args()
+
+    logger.info(f'Export - start | name: {args.name}, season: {args.season}, output: {args.output}')
+    db = MongoDbService()
+    league = db.find_league({"name": args.name, "season": args.season})
+    if league is None:
+        raise SystemExit(f'The league {args.name} {args.season} is not exists')
+    league = parse_league_from_db(league)
+    team_ids = team_dictionary(team['name'] for team in db.stream_teams_of_league(league))
+
+    os.makedirs(args.output, exist_ok=True)
+    prefix = os.path.join(args.output, f'{args.name}-{args.season}')
+    write_chunks(f'{prefix}-teams.csv.gz', export_teams(db.stream_teams_of_league(league), team_ids))
+    write_chunks(f'{prefix}-matches.csv.gz',
+                 export_matches(db.stream_matches_of_league(args.season, team_ids), team_ids))
+    logger.info(f'Export - end | files: {prefix}-teams.csv.gz, {prefix}-matches.csv.gz')
+    print(f'{prefix}-teams.csv.gz\n{prefix}-matches.csv.gz')
+
+
+if __name__ == '__main__':
+    main()
@@ -20,7 +20,11 @@ TeamSchema = {
         "number_of_draws": {"type": "number"},
         "matches_draw": {"type": "array"},
         "number_of_scored_goals": {"type": "number"},
-        "number_of_received_goals": {"type": "number"}
+        "number_of_received_goals": {"type": "number"},
+        "points": {"type": "number"},
+        "goal_difference": {"type": "number"},
+        "rating": {"type": "number"},
+        "recent_form": {"type": "array"}
     },
     "required": ["name", "season"]
 }
@@ -34,7 +38,51 @@ MatchSchema = {
         "score": {"type": "string"},
         "is_draw": {"type": "boolean"},
         "team_won": {"type": "string"},
-        "team_lost": {"type": "string"}
+        "team_lost": {"type": "string"},
+        "status": {"type": "string"}
     },
     "required": ["home_team", "away_team", "date"]
 }
+
+MatchScoreSchema = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "string"}
+    },
+    "required": ["score"]
+}
+
+SeasonSchema = {
+    "type": "object",
+    "properties": {
+        "season": {"type": "number"}
+    },
+    "required": ["season"]
+}
+
+LiveGoalSchema = {
+    "type": "object",
+    "properties": {
+        "team": {"type": "string"}
+    },
+    "required": ["team"]
+}
+
+BatchSchema = {
+    "type": "object",
+    "properties": {
+        "ids": {"type": "array", "items": {"type": "string"}, "minItems": 1},
+        "fields": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["ids"]
+}
+
+GenerateFixturesSchema = {
+    "type": "object",
+    "properties": {
+        "start_date": {"type": "string"},
+        "days_between_rounds": {"type": "integer", "minimum": 1},
+        "break_days": {"type": "integer", "minimum": 1}
+    },
+    "required": ["start_date"]
+}
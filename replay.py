@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+
+import argparse
+import asyncio
+import glob
+import json
+from itertools import islice
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.replayServices.replayService import parse_logs, replay, REPLAY_ROUTES
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay the requests recorded in the server logs against a server '
+                                                 'and report the throughput and the latency')
+    parser.add_argument('logs', nargs='*', help='the log files (default: logs/FMT-*.log)')
+    parser.add_argument('--url', default=config['replay']['url'], help='the server url')
+    parser.add_argument('--speed', type=float, default=config['replay']['speed'],
+                        help='the speed of the replay - 2 halves the gaps between the requests, 0 sends them '
+                             'as fast as the concurrency allows')
+    parser.add_argument('--concurrency', type=int, default=config['replay']['concurrency'],
+                        help='the requests in flight at once')
+    parser.add_argument('--timeout', type=float, default=config['replay']['timeout'], help='the request timeout')
+    parser.add_argument('--routes', nargs='*', choices=sorted(REPLAY_ROUTES), metavar='ROUTE',
+                        help='replay only these routes, by the title of their log line (e.g. "Create Ended Match")')
+    parser.add_argument('--limit', type=int, help='replay only the first requests')
+    args = parser.parse_args()
+    if args.speed < 0 or args.concurrency < 1:
+        parser.error('the speed must not be negative and the concurrency must be positive')
+
+    paths = args.logs or sorted(glob.glob('logs/FMT-*.log'))
+    logger.info(f'Replay - start | logs: {paths}, url: {args.url}, speed: {args.speed}, '
+                f'concurrency: {args.concurrency}')
+    requests = parse_logs(paths, set(args.routes) if args.routes else None)
+    if args.limit is not None:
+        requests = islice(requests, args.limit)
+    report = asyncio.get_event_loop().run_until_complete(
+        replay(requests, args.url, args.speed, args.concurrency, args.timeout))
+    logger.info(f'Replay - end | report: {report}')
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
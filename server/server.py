@@ -1,24 +1,98 @@
 #!/usr/bin/python3
 
+import asyncio
+import os
+
 from sanic import Sanic
-from sanic.response import json as rjson
+from sanic.response import json as rjson, stream
 from bson import ObjectId
 from jsonschema import validate as validate_schema, ValidationError
-from datetime import datetime
+from json import dumps as json_dumps
 from re import match as regex_match
+from datetime import datetime, timezone
 
+from services.configServices.configService import ConfigService
 from services.loggerServices.loggerService import LoggerService
 from services.mongoDbService.leagueProvider import (parse_league_from_request, parse_league_from_db)
 from services.mongoDbService.teamProvider import (parse_team_from_request, parse_team_from_db, find_team_most_scored,
-                                                  find_team_least_scored, find_team_most_wins, find_team_least_wins)
+                                                  find_team_least_scored, find_team_most_wins, find_team_least_wins,
+                                                  compute_form_table)
 from services.mongoDbService.matchProvider import (parse_match_from_db, parse_match_from_request,
-                                                   parse_ended_match_from_request)
+                                                   parse_ended_match_from_request, parse_date)
 from services.mongoDbService.mongoDbService import MongoDbService
-from models.models import (LeagueSchema, TeamSchema, MatchSchema)
-
+from services.analyticsServices.analyticsService import (AnalyticsService, compute_standings, compute_home_away_splits,
+                                                         compute_clean_sheets, compute_matchday_tables,
+                                                         compute_standings_from_stats)
+from services.analyticsServices.simulationService import (SimulationService, build_simulation, live_version)
+from services.eventBusServices.eventBusService import EventBusService
+from services.liveMatchServices.liveMatchService import LiveMatchService
+from services.writeBehindServices.writeBehindService import WriteBehindService
+from services.admissionServices.admissionService import AdmissionService, OverloadedError
+from services.exportServices.exportService import (team_dictionary, export_teams, export_matches,
+                                                   export_team_history)
+from services.profilingServices.profilingService import profiled
+from services.loopMonitorServices.loopMonitorService import LoopMonitorService
+from services.teamSearchServices.teamSearchService import TeamSearchService
+from models.models import (LeagueSchema, TeamSchema, MatchSchema, MatchScoreSchema, SeasonSchema, LiveGoalSchema,
+                           BatchSchema, GenerateFixturesSchema)
+
+config = ConfigService().config
 logger = LoggerService().logger
 app = Sanic()
 db = MongoDbService()
+analytics = AnalyticsService()
+simulations = SimulationService()
+event_bus = EventBusService()
+live_matches = LiveMatchService()
+write_behind = WriteBehindService()
+admission = AdmissionService()
+loop_monitor = LoopMonitorService()
+team_search = TeamSearchService()
+
+
+@app.listener('before_server_start')
+async def load_analytics_snapshot(app, loop):
+    path = config['analytics']['snapshot_path']
+    if os.path.exists(path):
+        try:
+            analytics.warm_start(db, path)
+        except Exception as error:
+            # the seasons are loaded from Mongo on first use instead
+            logger.error(f'Server/Load Analytics Snapshot failed - error: {error}')
+
+
+@app.listener('after_server_start')
+async def start_loop_monitor(app, loop):
+    loop_monitor.start(app)
+
+
+@app.listener('after_server_start')
+async def start_live_match_flusher(app, loop):
+    app.add_task(live_matches.run_flusher(db))
+
+
+@app.listener('after_server_start')
+async def start_write_behind_flusher(app, loop):
+    write_behind.recover(db)
+    if write_behind.enabled:
+        app.add_task(write_behind.run_flusher(db))
+
+
+@app.listener('after_server_start')
+async def start_team_search(app, loop):
+    team_search.load(db)
+    app.add_task(team_search.run_refresher(db))
+
+
+@app.listener('before_server_stop')
+async def flush_live_matches(app, loop):
+    live_matches.flush(db)
+
+
+@app.listener('before_server_stop')
+async def flush_write_behind(app, loop):
+    write_behind.close(db)
+
 
 """
 League Routes
@@ -26,6 +100,7 @@ League Routes
 
 
 @app.post('/league')
+@profiled
 async def post_handler_league(request):
     """
     Create a new League
@@ -53,7 +128,7 @@ async def post_handler_league(request):
             f'Server/Create League - leagueProvider/parse_league_from_request succeeded | parsed request: {parsed_request}')
 
         logger.debug(f'Server/Create League - calling MongoDbService/create_league | request: {parsed_request}')
-        _id = db.create_league(parsed_request)
+        _id = await admission.run('league', db.create_league, parsed_request)
         logger.debug(f'Server/Create League - MongoDbService/create_league succeeded | league id: {_id}')
 
     except ValidationError as error:
@@ -64,6 +139,14 @@ async def post_handler_league(request):
                 'message': str(error.message)
             }, status=400)
 
+    except OverloadedError as error:
+        logger.error(f'Server/Create League failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
     except Exception as error:
         logger.error(f'Server/Create League failed - error: {error}')
         return rjson(
@@ -85,6 +168,7 @@ async def post_handler_league(request):
 
 
 @app.get('/league/<name:string>/<season:number>')
+@profiled
 async def get_handler_league_by_name_season(request, name, season):
     """
     Get a League by name & season
@@ -151,6 +235,7 @@ async def get_handler_league_by_name_season(request, name, season):
 
 
 @app.get('/league/<league_id:string>')
+@profiled
 async def get_handler_league_by_id(request, league_id):
     """
     Get a League
@@ -202,6 +287,7 @@ async def get_handler_league_by_id(request, league_id):
 
 
 @app.post('/league/add_team')
+@profiled
 async def post_handler_add_league(request):
     """
     Add team to a league
@@ -224,7 +310,7 @@ async def post_handler_add_league(request):
 
         logger.debug(
             f'Server/Add Team To League - calling MongoDbService/add_team_to_league | parsed request: {parsed_request}')
-        _id = db.add_team_to_league(parsed_request)
+        _id = await admission.run('league_team', db.add_team_to_league, parsed_request)
         logger.debug(f'Server/Add Team To League - MongoDbService/add_team_to_league succeeded | league id: {_id}')
 
     except ValidationError as error:
@@ -235,6 +321,14 @@ async def post_handler_add_league(request):
                 'message': str(error.message)
             }, status=400)
 
+    except OverloadedError as error:
+        logger.error(f'Server/Add Team To League failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
     except Exception as error:
         logger.error(f'Server/Add Team To League failed - error: {error}')
         return rjson(
@@ -255,7 +349,83 @@ async def post_handler_add_league(request):
         logger.info(f'Server/Add Team To League - end')
 
 
+@app.post('/league/<league_id:string>/generate_fixtures')
+@profiled
+async def post_handler_generate_fixtures(request, league_id):
+    """
+    Generate the double round robin fixtures of a league - every team hosts every other team once,
+    the fixtures are inserted in one bulk insert and the fixtures that already exist are returned as conflicts
+    :param request:
+        league_id : String - the league id
+        start_date : String - the date of the first matchday in format: YYYY-MM-DD
+        days_between_rounds : Number (optional) - the days between two matchdays
+        break_days : Number (optional) - the days between the last matchday of the first half and the second half
+    :return
+    request example
+        {
+            "start_date": "2020-01-04",
+            "days_between_rounds": 7,
+            "break_days": 14
+        }
+    """
+    logger.info(f'Server/Generate League Fixtures - start | league id: {league_id}, request: {request.json}')
+    try:
+        logger.debug(f'Server/Generate League Fixtures - calling validate_schema | request: {request.json}, '
+                     f'schema: {GenerateFixturesSchema}')
+        validate_schema(instance=request.json, schema=GenerateFixturesSchema)
+        start_date = request.json['start_date']
+        parse_date(start_date)
+        days_between_rounds = request.json.get('days_between_rounds', config['fixtures']['days_between_rounds'])
+        break_days = request.json.get('break_days', config['fixtures']['break_days'])
+        logger.debug('Server/Generate League Fixtures - input validation succeeded')
+
+        logger.debug(f'Server/Generate League Fixtures - calling MongoDbService/generate_fixtures')
+        result = await admission.run('generate_fixtures', db.generate_fixtures, ObjectId(league_id), start_date,
+                                     days_between_rounds, break_days)
+        logger.debug(f'Server/Generate League Fixtures - MongoDbService/generate_fixtures succeeded | '
+                     f'inserted: {result["inserted"]}, conflicts: {len(result["conflicts"])}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Generate League Fixtures failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except OverloadedError as error:
+        logger.error(f'Server/Generate League Fixtures failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Generate League Fixtures failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Generate League Fixtures succeeded - inserted: {result["inserted"]}, '
+                    f'conflicts: {len(result["conflicts"])}')
+        return rjson({
+            'status': "success",
+            'message': 'the fixtures added',
+            'inserted': result['inserted'],
+            'matchdays': max(fixture['matchday'] for fixture in result['fixtures']),
+            'conflicts': result['conflicts']
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Generate League Fixtures - end')
+
+
 @app.get('/league/most_goals/<name:string>/<season:number>')
+@profiled
 async def get_handler_team_that_score_the_most(request, name, season):
     """
     Get the team most score in league
@@ -329,6 +499,7 @@ async def get_handler_team_that_score_the_most(request, name, season):
 
 
 @app.get('/league/least_goals/<name:string>/<season:number>')
+@profiled
 async def get_handler_team_that_score_the_least(request, name, season):
     """
     Get the team least score in league
@@ -402,6 +573,7 @@ async def get_handler_team_that_score_the_least(request, name, season):
 
 
 @app.get('/league/most_wins/<name:string>/<season:number>')
+@profiled
 async def get_handler_team_that_wins_the_most(request, name, season):
     """
     Get the team most wins in league
@@ -475,6 +647,7 @@ async def get_handler_team_that_wins_the_most(request, name, season):
 
 
 @app.get('/league/least_wins/<name:string>/<season:number>')
+@profiled
 async def get_handler_team_that_wins_the_least(request, name, season):
     """
     Get the team least wins in league
@@ -547,51 +720,60 @@ async def get_handler_team_that_wins_the_least(request, name, season):
         logger.info(f'Server/Get Team that win the least in league - end')
 
 
-"""
-Team Routes
-"""
-
-
-@app.post('/team')
-async def post_handler_team(request):
+@app.get('/league/top/<metric:string>/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_top_teams(request, metric, name, season):
     """
-    Create a new Team
-    :param request:
-        name : String - the team name
+    Get the top K teams of a league by any stat
+    :param
+        metric : String - goals_scored, goals_received, wins, losses, draws, points, goal_difference or rating
+        name : String - the league name
         season : Number - the season year
+        k : Number - (query) the number of teams
+        order : String - (query) desc (default) or asc
     :return
-    request example
+    response example
         {
-            "name": Real Madrid
-            "season": 2020
+            "status": "success",
+            "message": "success",
+            "teams": [{"position": 1, "id": team_id, "name": "real madrid", "wins": 3, "points": 10, "goal_difference": 7}]
         }
     """
-    logger.info(f'Server/Create Team - start | request: {request.json}')
+    logger.info(f'Server/Get League Top Teams - start | metric: {metric}, name: {name}, season: {season}, '
+                f'args: {request.args}')
     try:
-        logger.debug(f'Server/Create Team - calling validate_schema | request: {request.json}, schema: {TeamSchema}')
-        validate_schema(instance=request.json, schema=TeamSchema)
-        logger.debug('Server/Create Team - input validation succeeded')
-
-        logger.debug(
-            f'Server/Create Team - calling teamProvider/parse_team_from_request | request: {request.json}, schema: {TeamSchema}')
-        parsed_request = parse_team_from_request(request.json)
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
         logger.debug(
-            f'Server/Create League - teamProvider/parse_team_from_request succeeded | parsed request: {parsed_request}')
+            f'Server/Get League Top Teams - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        k = int(request.args.get('k', config['leaderboard']['default_k']))
+        if not 0 < k <= config['leaderboard']['max_k']:
+            raise ValueError(f'k must be between 1 and {config["leaderboard"]["max_k"]}')
+        order = request.args.get('order', 'desc')
+        logger.debug('Server/Get League Top Teams - input validation succeeded')
 
-        logger.debug(f'Server/Create Team - calling MongoDbService/create_team | request: {parsed_request}')
-        _id = db.create_team(parsed_request)
-        logger.debug(f'Server/Create Team - MongoDbService/create_team succeeded | team id : {_id}')
+        logger.debug(f'Server/Get League Top Teams - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Top Teams - MongoDbService/find_league succeeded | league: {_league}')
 
-    except ValidationError as error:
-        logger.error(f'Server/Create Team failed - validation error | error: {error}')
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(f'Server/Get League Top Teams - calling MongoDbService/find_top_teams | league: {parsed_league}')
+        teams = db.find_top_teams(parsed_league, season, metric, k, order)
+        logger.debug(f'Server/Get League Top Teams - MongoDbService/find_top_teams succeeded | teams: {teams}')
+
+    except (ValidationError, ValueError) as error:
+        logger.error(f'Server/Get League Top Teams failed - validation error | error: {error}')
         return rjson(
             {
                 'status': 'Error',
-                'message': str(error.message)
+                'message': str(error)
             }, status=400)
 
     except Exception as error:
-        logger.error(f'Server/Create Team failed - error: {error}')
+        logger.error(f'Server/Get League Top Teams failed - error: {error}')
         return rjson(
             {
                 'status': 'Error',
@@ -599,54 +781,78 @@ async def post_handler_team(request):
             }, status=400)
 
     else:
-        logger.info(f'Server/Create Team succeeded - id: {_id}')
+        logger.info(f'Server/Get League Top Teams succeeded - teams: {teams}')
         return rjson({
             'status': "success",
-            'message': 'the team added',
-            'id': str(_id)
+            'message': 'success',
+            'teams': teams
         }, status=200)
 
     finally:
-        logger.info(f'Server/Create Team - end')
+        logger.info(f'Server/Get League Top Teams - end')
 
 
-@app.get('/team/<name:string>/<season:number>')
-async def get_handler_team_by_name_season(request, name, season):
+@app.get('/league/standings/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_standings(request, name, season):
     """
-    Get a Team by name & season
+    Get the standings table of a league
     :param
-        name : String - the team name
+        name : String - the league name
         season : Number - the season year
+        as_of : String (query, optional) - the table after the results of this date (YYYY-MM-DD),
+                read from the standings snapshots
     :return
     response example
         {
-            "name": Spanish
-            "season": 2020,
-            "teams": ["real madrid", "hapoel jerusalem"],
-            "matches": [match_id_#1, match_id_#2, match_id_#3]
+            "status": "success",
+            "message": "success",
+            "standings": [{"position": 1, "team": "real madrid", "played": 2, "goal_difference": 5, "points": 6}]
         }
     """
-    logger.info(f'Server/Get team by name & season - start | name: {name}, season: {season}')
+    logger.info(f'Server/Get League Standings - start | name: {name}, season: {season}, args: {request.args}')
     try:
         parsed_request = {
             "name": name,
             "season": season
         }
         logger.debug(
-            f'Server/Get Team by name & season - calling validate_schema | request: {parsed_request}, schema: {TeamSchema}')
-        validate_schema(instance=parsed_request, schema=TeamSchema)
-        logger.debug('Server/Get Team by name & season - input validation succeeded')
+            f'Server/Get League Standings - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        as_of = request.args.get('as_of')
+        if as_of is not None:
+            parse_date(as_of)
+        logger.debug('Server/Get League Standings - input validation succeeded')
 
-        logger.debug(f'Server/Get Team by name & season - calling MongoDbService/find_teams_from_league | request: {parsed_request}')
-        _team = db.find_teams_from_league(parsed_request)
-        logger.debug(f'Server/Get Team by name & season - MongoDbService/find_teams_from_league succeeded | team: {_team}')
+        logger.debug(f'Server/Get League Standings - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Standings - MongoDbService/find_league succeeded | league: {_league}')
 
-        logger.debug(f'Server/Get Team by name & season - calling teamProvider/parse_team_from_db | team: {_team}')
-        parsed_team = parse_team_from_db(_team)
-        logger.debug(f'Server/Get Team by name & season - teamProvider/find_teams_from_league succeeded | team: {parsed_team}')
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(
+            f'Server/Get League Standings - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Standings - MongoDbService/find_teams_from_league succeeded | teams: {teams}')
+
+        if as_of is None:
+            logger.debug(f'Server/Get League Standings - calling AnalyticsService/get_season | season: {season}')
+            season_arrays = await asyncio.get_event_loop().run_in_executor(None, analytics.get_season, db, season)
+            logger.debug(
+                f'Server/Get League Standings - AnalyticsService/get_season succeeded | matches: {len(season_arrays)}')
+
+            logger.debug(f'Server/Get League Standings - calling analyticsService/compute_standings')
+            standings = compute_standings(season_arrays, [team['name'] for team in teams])
+        else:
+            logger.debug(f'Server/Get League Standings - calling MongoDbService/find_standings_as_of | as of: {as_of}')
+            stats = db.find_standings_as_of(_league['_id'], as_of)
+            logger.debug(f'Server/Get League Standings - MongoDbService/find_standings_as_of succeeded')
+
+            logger.debug(f'Server/Get League Standings - calling analyticsService/compute_standings_from_stats')
+            standings = compute_standings_from_stats(stats, [team['name'] for team in teams])
+        logger.debug(f'Server/Get League Standings - standings succeeded | standings: {standings}')
 
     except ValidationError as error:
-        logger.error(f'Server/Get Team by name & season failed - validation error | error: {error}')
+        logger.error(f'Server/Get League Standings failed - validation error | error: {error}')
         return rjson(
             {
                 'status': 'Error',
@@ -654,7 +860,7 @@ async def get_handler_team_by_name_season(request, name, season):
             }, status=400)
 
     except Exception as error:
-        logger.error(f'Server/Get Team by name & season failed - error: {error}')
+        logger.error(f'Server/Get League Standings failed - error: {error}')
         return rjson(
             {
                 'status': 'Error',
@@ -662,49 +868,81 @@ async def get_handler_team_by_name_season(request, name, season):
             }, status=400)
 
     else:
-        logger.info(f'Server/Get Team by name & season succeeded - id: {parsed_team}')
+        logger.info(f'Server/Get League Standings succeeded - league: {parsed_league}')
         return rjson({
             'status': "success",
             'message': 'success',
-            'team': str(parsed_team)
+            'standings': standings
         }, status=200)
 
     finally:
-        logger.info(f'Server/Get Team by name & season - end')
+        logger.info(f'Server/Get League Standings - end')
 
 
-@app.get('/team/<team_id:string>')
-async def get_handler_team_by_id(request, team_id):
+@app.get('/standings')
+@profiled
+async def get_handler_standings(request):
     """
-    Get a team
+    Get the standings of many leagues and seasons at once - the leagues and their teams are read with one
+    aggregation and the seasons that are not cached are loaded concurrently
     :param
-        name : String - the team name
-        season : Number - the season year
+        leagues : String (query) - comma separated league names, up to standings.max_leagues
+        season : String (query) - a season year or comma separated season years
     :return
-    request example
+    response example
         {
-            "name": Spanish
-            "season": 2020,
-            "teams": ["real madrid", "hapoel jerusalem"],
-            "matches": [match_id_#1, match_id_#2, match_id_#3]
+            "status": "success",
+            "message": "success",
+            "standings": [{"league": "Spanish", "season": 2020, "standings": [{"position": 1, "team": "real madrid"}]},
+                          {"league": "Israel", "season": 2020, "status": "not_found"}]
         }
     """
-    logger.info(f'Server/Get Team by id - start | id: {team_id}')
+    logger.info(f'Server/Get Standings - start | args: {request.args}')
     try:
-        parsed_request = {
-            "_id": ObjectId(team_id)
-        }
-
-        logger.debug(f'Server/Get Team by id - calling MongoDbService/find_teams_from_league | request: {parsed_request}')
-        _team = db.find_teams_from_league(parsed_request)
-        logger.debug(f'Server/Get Team by id - MongoDbService/find_teams_from_league succeeded | team: {_team}')
-
-        logger.debug(f'Server/Get Team by id - calling teamProvider/parse_team_from_db | team: {_team}')
-        parsed_team = parse_team_from_db(_team)
-        logger.debug(f'Server/Get Team by id - teamProvider/parse_team_from_db succeeded | parsed team: {parsed_team}')
+        names = [name.strip() for name in request.args.get("leagues", "").split(',') if name.strip()]
+        seasons = [season.strip() for season in request.args.get("season", "").split(',') if season.strip()]
+        if not all(season.isdigit() for season in seasons):
+            raise ValueError('season must be a year or comma separated years')
+        seasons = [int(season) for season in seasons]
+        if not names or not seasons:
+            raise ValueError('leagues and season are required')
+        if len(names) * len(seasons) > config['standings']['max_leagues']:
+            raise ValueError(f'up to {config["standings"]["max_leagues"]} league seasons can be requested at once')
+        logger.debug('Server/Get Standings - input validation succeeded')
+
+        logger.debug(f'Server/Get Standings - calling MongoDbService/find_leagues_teams')
+        _leagues = db.find_leagues_teams(names, seasons)
+        logger.debug(f'Server/Get Standings - MongoDbService/find_leagues_teams succeeded | leagues: {len(_leagues)}')
+
+        logger.debug(f'Server/Get Standings - calling AnalyticsService/get_season | seasons: {seasons}')
+        loop = asyncio.get_event_loop()
+        found_seasons = sorted({season for _, season in _leagues})
+        season_arrays = dict(zip(found_seasons, await asyncio.gather(
+            *(loop.run_in_executor(None, analytics.get_season, db, season) for season in found_seasons))))
+        logger.debug(f'Server/Get Standings - AnalyticsService/get_season succeeded')
+
+        standings = []
+        for name in names:
+            for season in seasons:
+                if (name, season) not in _leagues:
+                    standings.append({"league": name, "season": season, "status": "not_found"})
+                    continue
+                standings.append({
+                    "league": name,
+                    "season": season,
+                    "standings": compute_standings(season_arrays[season], _leagues[(name, season)])
+                })
+
+    except ValueError as error:
+        logger.error(f'Server/Get Standings failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
 
     except Exception as error:
-        logger.error(f'Server/Get Team by id failed - error: {error}')
+        logger.error(f'Server/Get Standings failed - error: {error}')
         return rjson(
             {
                 'status': 'Error',
@@ -712,68 +950,73 @@ async def get_handler_team_by_id(request, team_id):
             }, status=400)
 
     else:
-        logger.info(f'Server/Get Team by id succeeded - team: {parsed_team}')
+        logger.info(f'Server/Get Standings succeeded - leagues: {len(standings)}')
         return rjson({
             'status': "success",
             'message': 'success',
-            'team': str(parsed_team)
+            'standings': standings
         }, status=200)
 
     finally:
-        logger.info(f'Server/Get Team by id - end')
-
-
-"""
-Match Routes
-"""
+        logger.info(f'Server/Get Standings - end')
 
 
-@app.post('/future_match')
-async def post_handler_future_match(request):
+@app.get('/league/home_away/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_home_away_splits(request, name, season):
     """
-    Create a new Match
-    :param request:
-        home_team : String - the home team name
-        away_team : String - the away team name
-        date : String - the match date in format: YYYY-MM-DD
+    Get the home and away record of every team of a league
+    :param
+        name : String - the league name
+        season : Number - the season year
     :return
-    request example
+    response example
         {
-            "home_team": Real Madrid,
-            "away_team": Hapoel Jerusalem
-            "season": 20/03/2020
+            "status": "success",
+            "message": "success",
+            "splits": [{"team": "real madrid", "home": {"number_of_wins": 1}, "away": {"number_of_wins": 1}}]
         }
     """
-    logger.info(f'Server/Create Future Match - start | request: {request.json}')
+    logger.info(f'Server/Get League Home & Away Splits - start | name: {name}, season: {season}')
     try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
         logger.debug(
-            f'Server/Create Future Match - calling validate_schema | request: {request.json}, schema: {MatchSchema}')
-        validate_schema(instance=request.json, schema=MatchSchema)
-        date = request.get("date", None),
-        if date != datetime.strptime(date, "%Y-%m-%d").strftime('%Y-%m-%d'):
-            raise ValueError('Date must be in the format: YYYY-MM-DD')
-        logger.debug('Server/Create Future Match - input validation succeeded')
+            f'Server/Get League Home & Away Splits - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Get League Home & Away Splits - input validation succeeded')
+
+        logger.debug(f'Server/Get League Home & Away Splits - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Home & Away Splits - MongoDbService/find_league succeeded | league: {_league}')
 
+        parsed_league = parse_league_from_db(_league)
         logger.debug(
-            f'Server/Create Future Match - calling matchProvider/parse_match_from_request | request: {request.json}, schema: {MatchSchema}')
-        parsed_request = parse_match_from_request(request.json)
+            f'Server/Get League Home & Away Splits - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Home & Away Splits - MongoDbService/find_teams_from_league succeeded | teams: {teams}')
+
+        logger.debug(f'Server/Get League Home & Away Splits - calling AnalyticsService/get_season | season: {season}')
+        season_arrays = await asyncio.get_event_loop().run_in_executor(None, analytics.get_season, db, season)
         logger.debug(
-            f'Server/Create Future Match - matchProvider/parse_match_from_request succeeded | parsed request: {parsed_request}')
+            f'Server/Get League Home & Away Splits - AnalyticsService/get_season succeeded | matches: {len(season_arrays)}')
 
-        logger.debug(f'Server/Create Future Match - calling MongoDbService/create_match | request: {parsed_request}')
-        _id = db.create_match(parsed_request)
-        logger.debug(f'Server/Create Future Match - MongoDbService/create_match succeeded | match id : {_id}')
+        logger.debug(f'Server/Get League Home & Away Splits - calling analyticsService/compute_home_away_splits')
+        splits = compute_home_away_splits(season_arrays, [team['name'] for team in teams])
+        logger.debug(f'Server/Get League Home & Away Splits - analyticsService/compute_home_away_splits succeeded | splits: {splits}')
 
-    except (ValidationError, ValueError) as error:
-        logger.error(f'Server/Create Future Match failed - validation error | error: {error}')
+    except ValidationError as error:
+        logger.error(f'Server/Get League Home & Away Splits failed - validation error | error: {error}')
         return rjson(
             {
                 'status': 'Error',
-                'message': str(error)
+                'message': str(error.message)
             }, status=400)
 
     except Exception as error:
-        logger.error(f'Server/Create Future Match failed - error: {error}')
+        logger.error(f'Server/Get League Home & Away Splits failed - error: {error}')
         return rjson(
             {
                 'status': 'Error',
@@ -781,66 +1024,1349 @@ async def post_handler_future_match(request):
             }, status=400)
 
     else:
-        logger.info(f'Server/Create Future Match succeeded - id: {_id}')
+        logger.info(f'Server/Get League Home & Away Splits succeeded - league: {parsed_league}')
         return rjson({
             'status': "success",
-            'message': 'the team added',
-            'id': str(_id)
+            'message': 'success',
+            'splits': splits
         }, status=200)
 
     finally:
-        logger.info(f'Server/Create Future Match - end')
+        logger.info(f'Server/Get League Home & Away Splits - end')
 
 
-@app.post('/ended_match')
-async def post_handler_match(request):
+@app.get('/league/clean_sheets/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_clean_sheets(request, name, season):
     """
-    Create a new Match
-    :param request:
-        home_team : String - the home team name
-        away_team : String - the away team name
-        score : String - the match score
-        date : String - the match date in format: YYYY-MM-DD
+    Get the clean sheets of every team of a league
+    :param
+        name : String - the league name
+        season : Number - the season year
     :return
-    request example
+    response example
         {
+            "status": "success",
+            "message": "success",
+            "clean_sheets": [{"team": "real madrid", "clean_sheets": 2, "home_clean_sheets": 1, "away_clean_sheets": 1}]
         }
     """
-    logger.info(f'Server/Create Ended Match - start | request: {request.json}')
+    logger.info(f'Server/Get League Clean Sheets - start | name: {name}, season: {season}')
     try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
         logger.debug(
-            f'Server/Create Ended Match - calling validate_schema | request: {request.json}, schema: {MatchSchema}')
-        validate_schema(instance=request.json, schema=MatchSchema)
-        date = request.json.get("date", None)
-        if date != datetime.strptime(date, "%Y-%m-%d").strftime('%Y-%m-%d'):
-            raise ValueError('Date must be in the format: YYYY-MM-DD')
-        score = request.json.get("score", None).replace(' ', '')
-        is_valid_score = regex_match("(0|[1-9]\d*)-(0|[1-9]\d*)", score)
-        if not is_valid_score:
-            raise ValueError('Score must be in the format: Number-Number')
-        logger.debug('Server/Create Ended Match - input validation succeeded')
+            f'Server/Get League Clean Sheets - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Get League Clean Sheets - input validation succeeded')
 
-        logger.debug(
-            f'Server/Create Ended Match - calling matchProvider/parse_match_from_request | request: {request.json}, schema: {MatchSchema}')
-        parsed_request = parse_ended_match_from_request(request.json)
-        logger.debug(
-            f'Server/Create Ended Match - matchProvider/parse_match_from_request succeeded | parsed request: {parsed_request}')
+        logger.debug(f'Server/Get League Clean Sheets - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Clean Sheets - MongoDbService/find_league succeeded | league: {_league}')
 
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(
+            f'Server/Get League Clean Sheets - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Clean Sheets - MongoDbService/find_teams_from_league succeeded | teams: {teams}')
+
+        logger.debug(f'Server/Get League Clean Sheets - calling AnalyticsService/get_season | season: {season}')
+        season_arrays = await asyncio.get_event_loop().run_in_executor(None, analytics.get_season, db, season)
+        logger.debug(
+            f'Server/Get League Clean Sheets - AnalyticsService/get_season succeeded | matches: {len(season_arrays)}')
+
+        logger.debug(f'Server/Get League Clean Sheets - calling analyticsService/compute_clean_sheets')
+        clean_sheets = compute_clean_sheets(season_arrays, [team['name'] for team in teams])
+        logger.debug(f'Server/Get League Clean Sheets - analyticsService/compute_clean_sheets succeeded | clean_sheets: {clean_sheets}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get League Clean Sheets failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get League Clean Sheets failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get League Clean Sheets succeeded - league: {parsed_league}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'clean_sheets': clean_sheets
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get League Clean Sheets - end')
+
+
+@app.get('/league/form/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_form(request, name, season):
+    """
+    Get the form table of a league - the teams ranked by their last results, read from the teams recent form
+    :param
+        name : String - the league name
+        season : Number - the season year
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "form": [{"position": 1, "team": "real madrid", "form": "WWDLW", "points": 10, "goal_difference": 4,
+                      "recent_form": [{"result": "W", "score": "2-0", "opponent": "hapoel jerusalem",
+                                       "date": "2020-03-20"}]}]
+        }
+    """
+    logger.info(f'Server/Get League Form - start | name: {name}, season: {season}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Get League Form - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Get League Form - input validation succeeded')
+
+        logger.debug(f'Server/Get League Form - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Form - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(f'Server/Get League Form - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Form - MongoDbService/find_teams_from_league succeeded | teams: {len(teams)}')
+
+        logger.debug(f'Server/Get League Form - calling teamProvider/compute_form_table')
+        form = compute_form_table(teams)
+        logger.debug(f'Server/Get League Form - teamProvider/compute_form_table succeeded | form: {form}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get League Form failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get League Form failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get League Form succeeded - league: {parsed_league}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'form': form
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get League Form - end')
+
+
+@app.get('/league/matchdays/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_matchday_tables(request, name, season):
+    """
+    Get the cumulative table after every matchday of a league
+    :param
+        name : String - the league name
+        season : Number - the season year
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "tables": [{"matchday": 1, "date": "2020-03-20", "table": [{"position": 1, "team": "real madrid", "points": 3}]}]
+        }
+    """
+    logger.info(f'Server/Get League Matchday Tables - start | name: {name}, season: {season}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Get League Matchday Tables - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Get League Matchday Tables - input validation succeeded')
+
+        logger.debug(f'Server/Get League Matchday Tables - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Matchday Tables - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(
+            f'Server/Get League Matchday Tables - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Matchday Tables - MongoDbService/find_teams_from_league succeeded | teams: {teams}')
+
+        logger.debug(f'Server/Get League Matchday Tables - calling AnalyticsService/get_season | season: {season}')
+        season_arrays = await asyncio.get_event_loop().run_in_executor(None, analytics.get_season, db, season)
+        logger.debug(
+            f'Server/Get League Matchday Tables - AnalyticsService/get_season succeeded | matches: {len(season_arrays)}')
+
+        logger.debug(f'Server/Get League Matchday Tables - calling analyticsService/compute_matchday_tables')
+        tables = compute_matchday_tables(season_arrays, [team['name'] for team in teams])
+        logger.debug(f'Server/Get League Matchday Tables - analyticsService/compute_matchday_tables succeeded | tables: {tables}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get League Matchday Tables failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get League Matchday Tables failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get League Matchday Tables succeeded - league: {parsed_league}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'tables': tables
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get League Matchday Tables - end')
+
+
+@app.get('/league/matchday/<name:string>/<season:number>/<matchday:int>')
+@profiled
+async def get_handler_league_matchday(request, name, season, matchday):
+    """
+    Get the matches (ended, live and future) of a league matchday - the matchday-th date of the season
+    with a match between the league teams
+    :param
+        name : String - the league name
+        season : Number - the season year
+        matchday : Number - the matchday, starting from 1
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "date": "2020-03-20",
+            "matches": [{"id": match_id, "home_team": "real madrid", "away_team": "hapoel jerusalem",
+                         "date": "2020-03-20", "score": "2-0"}]
+        }
+    """
+    logger.info(f'Server/Get League Matchday - start | name: {name}, season: {season}, matchday: {matchday}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Get League Matchday - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Get League Matchday - input validation succeeded')
+
+        logger.debug(f'Server/Get League Matchday - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Matchday - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(
+            f'Server/Get League Matchday - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Matchday - MongoDbService/find_teams_from_league succeeded | teams: {teams}')
+
+        logger.debug(f'Server/Get League Matchday - calling MongoDbService/find_matchday | matchday: {matchday}')
+        date, matches = db.find_matchday(season, matchday, [team['name'] for team in teams])
+        logger.debug(f'Server/Get League Matchday - MongoDbService/find_matchday succeeded | date: {date}, '
+                     f'matches: {len(matches)}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get League Matchday failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get League Matchday failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get League Matchday succeeded - date: {date}, matches: {len(matches)}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'date': date,
+            'matches': matches
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get League Matchday - end')
+
+
+@app.get('/league/simulate/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_simulation(request, name, season):
+    """
+    Simulate the remaining fixtures of a league
+    :param
+        name : String - the league name
+        season : Number - the season year
+        runs : Number - (query) the number of simulated seasons
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "runs": 10000,
+            "probabilities": [{"team": "real madrid", "points": 6, "title": 0.62, "top_4": 0.98, "relegation": 0.0}]
+        }
+    """
+    logger.info(f'Server/Get League Simulation - start | name: {name}, season: {season}, args: {request.args}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Get League Simulation - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        runs = simulations.parse_runs(request.args.get('runs'))
+        logger.debug('Server/Get League Simulation - input validation succeeded')
+
+        logger.debug(f'Server/Get League Simulation - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Simulation - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(
+            f'Server/Get League Simulation - calling MongoDbService/find_teams_from_league | league: {parsed_league}')
+        teams = db.find_teams_from_league(parsed_league)
+        logger.debug(f'Server/Get League Simulation - MongoDbService/find_teams_from_league succeeded | teams: {teams}')
+
+        logger.debug(f'Server/Get League Simulation - calling AnalyticsService/get_season | season: {season}')
+        loop = asyncio.get_event_loop()
+        season_arrays = await loop.run_in_executor(None, analytics.get_season, db, season)
+        logger.debug(
+            f'Server/Get League Simulation - AnalyticsService/get_season succeeded | matches: {len(season_arrays)}')
+
+        logger.debug(f'Server/Get League Simulation - calling MongoDbService/find_future_matches_of_season')
+        fixtures = await loop.run_in_executor(None, db.find_future_matches_of_season, season)
+        logger.debug(
+            f'Server/Get League Simulation - MongoDbService/find_future_matches_of_season succeeded | fixtures: {len(fixtures)}')
+
+        key = (parsed_league['id'], int(season), runs)
+        # a corrected result changes the season arrays without a new ended match
+        now = datetime.now(timezone.utc)
+        version = (season_arrays.last_id, season_arrays.corrections, live_version(fixtures, now))
+        probabilities = simulations.find_cached(key, version)
+        if probabilities is None:
+            logger.debug(f'Server/Get League Simulation - calling SimulationService/simulate | runs: {runs}')
+            simulation = await loop.run_in_executor(None, build_simulation, season_arrays,
+                                                    [team['name'] for team in teams], fixtures, now)
+            probabilities = await simulations.simulate(key, version, simulation, runs)
+            logger.debug(f'Server/Get League Simulation - SimulationService/simulate succeeded')
+
+    except (ValidationError, ValueError) as error:
+        logger.error(f'Server/Get League Simulation failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get League Simulation failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get League Simulation succeeded - probabilities: {probabilities}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'runs': runs,
+            'probabilities': probabilities
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get League Simulation - end')
+
+
+@app.get('/league/ratings/<name:string>/<season:number>')
+@profiled
+async def get_handler_league_ratings(request, name, season):
+    """
+    Get the teams of a league ordered by their rating
+    :param
+        name : String - the league name
+        season : Number - the season year
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "ratings": [{"id": team_id, "name": "real madrid", "rating": 1534.2}]
+        }
+    """
+    logger.info(f'Server/Get League Ratings - start | name: {name}, season: {season}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Get League Ratings - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Get League Ratings - input validation succeeded')
+
+        logger.debug(f'Server/Get League Ratings - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Get League Ratings - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        logger.debug(f'Server/Get League Ratings - calling MongoDbService/find_teams_ratings | league: {parsed_league}')
+        ratings = db.find_teams_ratings(parsed_league, season)
+        logger.debug(f'Server/Get League Ratings - MongoDbService/find_teams_ratings succeeded | ratings: {ratings}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get League Ratings failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get League Ratings failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get League Ratings succeeded - ratings: {ratings}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'ratings': ratings
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get League Ratings - end')
+
+
+@app.post('/ratings/recompute')
+@profiled
+async def post_handler_recompute_ratings(request):
+    """
+    Rebuild the ratings of a season by replaying its matches in date order
+    :param request:
+        season : Number - the season year
+    :return
+    request example
+        {
+            "season": 2020
+        }
+    """
+    logger.info(f'Server/Recompute Ratings - start | request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Recompute Ratings - calling validate_schema | request: {request.json}, schema: {SeasonSchema}')
+        validate_schema(instance=request.json, schema=SeasonSchema)
+        logger.debug('Server/Recompute Ratings - input validation succeeded')
+
+        logger.debug(f'Server/Recompute Ratings - calling MongoDbService/recompute_ratings')
+        _result = await admission.run('recompute_ratings', db.recompute_ratings, request.json.get("season"))
+        logger.debug(f'Server/Recompute Ratings - MongoDbService/recompute_ratings succeeded | result: {_result}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Recompute Ratings failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except OverloadedError as error:
+        logger.error(f'Server/Recompute Ratings failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Recompute Ratings failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Recompute Ratings succeeded - result: {_result}')
+        return rjson({
+            'status': "success",
+            'message': 'the ratings recomputed',
+            'matches': _result['matches'],
+            'teams': _result['teams']
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Recompute Ratings - end')
+
+
+@app.websocket('/ws/league/standings/<name:string>/<season:number>')
+async def websocket_handler_league_standings(request, ws, name, season):
+    """
+    Stream the standings of a league - the full table first, then a delta for every team update
+    :param
+        name : String - the league name
+        season : Number - the season year
+    :return
+    messages example
+        {"type": "standings", "standings": [{"position": 1, "team": "real madrid", "points": 6}]}
+        {"type": "team_update", "team": "real madrid", "season": 2020, "result": "win", "match_id": match_id,
+         "delta": {"number_of_wins": 1, "points": 3, "goal_difference": 2}}
+    """
+    logger.info(f'Server/Stream League Standings - start | name: {name}, season: {season}')
+    subscription = None
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Stream League Standings - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Stream League Standings - input validation succeeded')
+
+        logger.debug(f'Server/Stream League Standings - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Stream League Standings - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        team_names = {team['name'] for team in db.find_teams_from_league(parsed_league)}
+        logger.debug(f'Server/Stream League Standings - league teams found | teams: {team_names}')
+
+        subscription = event_bus.subscribe(int(season))
+        loop = asyncio.get_event_loop()
+        standings_message = {
+            'type': 'standings',
+            'standings': compute_standings(await loop.run_in_executor(None, analytics.get_season, db, season, True),
+                                           team_names)
+        }
+        await ws.send(json_dumps(standings_message))
+
+        while True:
+            event = await subscription.get()
+            if subscription.pop_dropped():
+                # the subscriber fell behind and lost deltas - resend the full table
+                logger.debug(f'Server/Stream League Standings - subscriber lagged, resending the standings')
+                standings_message['standings'] = compute_standings(
+                    await loop.run_in_executor(None, analytics.get_season, db, season, True), team_names)
+                await ws.send(json_dumps(standings_message))
+            if event.type == 'team_update' and (not team_names or event.teams & team_names):
+                await ws.send(event.payload)
+
+    except ValidationError as error:
+        logger.error(f'Server/Stream League Standings failed - validation error | error: {error}')
+        await ws.send(json_dumps({
+            'status': 'Error',
+            'message': str(error.message)
+        }))
+
+    except Exception as error:
+        logger.error(f'Server/Stream League Standings failed - error: {error}')
+
+    finally:
+        if subscription is not None:
+            event_bus.unsubscribe(subscription)
+        logger.info(f'Server/Stream League Standings - end')
+
+
+@app.websocket('/ws/league/results/<name:string>/<season:number>')
+async def websocket_handler_league_results(request, ws, name, season):
+    """
+    Stream the results of a league as they are recorded
+    :param
+        name : String - the league name
+        season : Number - the season year
+    :return
+    messages example
+        {"type": "match_result", "id": match_id, "home_team": "real madrid", "away_team": "hapoel jerusalem",
+         "date": "2020-03-20", "score": "2-0", "is_draw": false, "team_won": "real madrid"}
+    """
+    logger.info(f'Server/Stream League Results - start | name: {name}, season: {season}')
+    subscription = None
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Stream League Results - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        logger.debug('Server/Stream League Results - input validation succeeded')
+
+        logger.debug(f'Server/Stream League Results - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Stream League Results - MongoDbService/find_league succeeded | league: {_league}')
+
+        parsed_league = parse_league_from_db(_league)
+        team_names = {team['name'] for team in db.find_teams_from_league(parsed_league)}
+        logger.debug(f'Server/Stream League Results - league teams found | teams: {team_names}')
+
+        subscription = event_bus.subscribe(int(season))
+        while True:
+            event = await subscription.get()
+            if event.type == 'match_result' and (not team_names or event.teams & team_names):
+                await ws.send(event.payload)
+
+    except ValidationError as error:
+        logger.error(f'Server/Stream League Results failed - validation error | error: {error}')
+        await ws.send(json_dumps({
+            'status': 'Error',
+            'message': str(error.message)
+        }))
+
+    except Exception as error:
+        logger.error(f'Server/Stream League Results failed - error: {error}')
+
+    finally:
+        if subscription is not None:
+            event_bus.unsubscribe(subscription)
+        logger.info(f'Server/Stream League Results - end')
+
+
+@app.post('/leagues/batch')
+@profiled
+async def post_handler_leagues_batch(request):
+    """
+    Get leagues by their ids with one query, the results are in the order of the ids and a missing id
+    is returned as {"id": id, "status": "not_found"} (or "invalid_id")
+    :param request:
+        ids : Array - the leagues ids, up to batch.max_ids
+        fields : Array (optional) - the fields to return (the id is always returned)
+    :return
+    request example
+        {
+            "ids": ["5f1c...", "5f1d..."],
+            "fields": ["name", "season"]
+        }
+    """
+    logger.info(f'Server/Get Leagues Batch - start | request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Get Leagues Batch - calling validate_schema | request: {request.json}, schema: {BatchSchema}')
+        validate_schema(instance=request.json, schema=BatchSchema)
+        ids = request.json.get("ids")
+        if len(ids) > config['batch']['max_ids']:
+            raise ValueError(f'up to {config["batch"]["max_ids"]} ids can be requested at once')
+        logger.debug('Server/Get Leagues Batch - input validation succeeded')
+
+        logger.debug(f'Server/Get Leagues Batch - calling MongoDbService/find_leagues_batch')
+        _leagues = db.find_leagues_batch(ids, request.json.get("fields"))
+        logger.debug(f'Server/Get Leagues Batch - MongoDbService/find_leagues_batch succeeded')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get Leagues Batch failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except ValueError as error:
+        logger.error(f'Server/Get Leagues Batch failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Leagues Batch failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Leagues Batch succeeded - leagues: {len(_leagues)}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'leagues': _leagues
+        }, status=200, dumps=json_dumps, default=str)
+
+    finally:
+        logger.info(f'Server/Get Leagues Batch - end')
+
+
+"""
+Team Routes
+"""
+
+
+@app.post('/team')
+@profiled
+async def post_handler_team(request):
+    """
+    Create a new Team
+    :param request:
+        name : String - the team name
+        season : Number - the season year
+    :return
+    request example
+        {
+            "name": Real Madrid
+            "season": 2020
+        }
+    """
+    logger.info(f'Server/Create Team - start | request: {request.json}')
+    try:
+        logger.debug(f'Server/Create Team - calling validate_schema | request: {request.json}, schema: {TeamSchema}')
+        validate_schema(instance=request.json, schema=TeamSchema)
+        logger.debug('Server/Create Team - input validation succeeded')
+
+        logger.debug(
+            f'Server/Create Team - calling teamProvider/parse_team_from_request | request: {request.json}, schema: {TeamSchema}')
+        parsed_request = parse_team_from_request(request.json)
+        logger.debug(
+            f'Server/Create League - teamProvider/parse_team_from_request succeeded | parsed request: {parsed_request}')
+
+        logger.debug(f'Server/Create Team - calling MongoDbService/create_team | request: {parsed_request}')
+        _id = await admission.run('team', db.create_team, parsed_request)
+        logger.debug(f'Server/Create Team - MongoDbService/create_team succeeded | team id : {_id}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Create Team failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except OverloadedError as error:
+        logger.error(f'Server/Create Team failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Create Team failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Create Team succeeded - id: {_id}')
+        return rjson({
+            'status': "success",
+            'message': 'the team added',
+            'id': str(_id)
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Create Team - end')
+
+
+@app.get('/team/<name:string>/<season:number>')
+@profiled
+async def get_handler_team_by_name_season(request, name, season):
+    """
+    Get a Team by name & season
+    :param
+        name : String - the team name
+        season : Number - the season year
+    :return
+    response example
+        {
+            "name": Spanish
+            "season": 2020,
+            "teams": ["real madrid", "hapoel jerusalem"],
+            "matches": [match_id_#1, match_id_#2, match_id_#3]
+        }
+    """
+    logger.info(f'Server/Get team by name & season - start | name: {name}, season: {season}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Get Team by name & season - calling validate_schema | request: {parsed_request}, schema: {TeamSchema}')
+        validate_schema(instance=parsed_request, schema=TeamSchema)
+        logger.debug('Server/Get Team by name & season - input validation succeeded')
+
+        logger.debug(f'Server/Get Team by name & season - calling MongoDbService/find_teams_from_league | request: {parsed_request}')
+        _team = db.find_teams_from_league(parsed_request)
+        logger.debug(f'Server/Get Team by name & season - MongoDbService/find_teams_from_league succeeded | team: {_team}')
+
+        logger.debug(f'Server/Get Team by name & season - calling teamProvider/parse_team_from_db | team: {_team}')
+        parsed_team = parse_team_from_db(_team)
+        logger.debug(f'Server/Get Team by name & season - teamProvider/find_teams_from_league succeeded | team: {parsed_team}')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get Team by name & season failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Team by name & season failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Team by name & season succeeded - id: {parsed_team}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'team': str(parsed_team)
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get Team by name & season - end')
+
+
+@app.get('/team/<team_id:string>')
+@profiled
+async def get_handler_team_by_id(request, team_id):
+    """
+    Get a team
+    :param
+        name : String - the team name
+        season : Number - the season year
+    :return
+    request example
+        {
+            "name": Spanish
+            "season": 2020,
+            "teams": ["real madrid", "hapoel jerusalem"],
+            "matches": [match_id_#1, match_id_#2, match_id_#3]
+        }
+    """
+    logger.info(f'Server/Get Team by id - start | id: {team_id}')
+    try:
+        parsed_request = {
+            "_id": ObjectId(team_id)
+        }
+
+        logger.debug(f'Server/Get Team by id - calling MongoDbService/find_teams_from_league | request: {parsed_request}')
+        _team = db.find_teams_from_league(parsed_request)
+        logger.debug(f'Server/Get Team by id - MongoDbService/find_teams_from_league succeeded | team: {_team}')
+
+        logger.debug(f'Server/Get Team by id - calling teamProvider/parse_team_from_db | team: {_team}')
+        parsed_team = parse_team_from_db(_team)
+        logger.debug(f'Server/Get Team by id - teamProvider/parse_team_from_db succeeded | parsed team: {parsed_team}')
+
+    except Exception as error:
+        logger.error(f'Server/Get Team by id failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Team by id succeeded - team: {parsed_team}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'team': str(parsed_team)
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get Team by id - end')
+
+
+@app.get('/team/<team_id:string>/history')
+@profiled
+async def get_handler_team_history(request, team_id):
+    """
+    Stream the ended matches of a team as NDJSON (a match per line, with the team result W, D or L) sorted by date,
+    of every season of the team name - the matches are read from a cursor, so the memory does not grow
+    with the history size
+    :param
+        team_id : String - the team id
+        season : Number (query, optional) - only the matches of this season
+    :return
+    response example
+        {"id": "5f1c...", "home_team": "real madrid", "away_team": "hapoel jerusalem", "date": "2020-03-20",
+         "score": "2-1", ..., "result": "W"}
+    """
+    logger.info(f'Server/Get Team History - start | id: {team_id}, args: {request.args}')
+    try:
+        if not ObjectId.is_valid(team_id):
+            raise ValueError('team id must be a valid id')
+        season = request.args.get('season')
+        season = None if season is None else int(season)
+        logger.debug('Server/Get Team History - input validation succeeded')
+
+        logger.debug(f'Server/Get Team History - calling MongoDbService/stream_team_history')
+        _team, _matches = db.stream_team_history(ObjectId(team_id), season)
+        logger.debug(f'Server/Get Team History - MongoDbService/stream_team_history succeeded | team: {_team["name"]}')
+        chunks = export_team_history(_matches, _team["name"])
+
+    except ValueError as error:
+        logger.error(f'Server/Get Team History failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Team History failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        async def write_chunks(response):
+            try:
+                for chunk in chunks:
+                    await response.write(chunk)
+            except Exception as error:
+                logger.error(f'Server/Get Team History failed while streaming - error: {error}')
+                raise
+            logger.info(f'Server/Get Team History succeeded - id: {team_id}, season: {season}')
+
+        return stream(write_chunks, content_type='application/x-ndjson')
+
+    finally:
+        logger.info(f'Server/Get Team History - end')
+
+
+@app.post('/teams/batch')
+@profiled
+async def post_handler_teams_batch(request):
+    """
+    Get teams by their ids with one query, the results are in the order of the ids and a missing id
+    is returned as {"id": id, "status": "not_found"} (or "invalid_id")
+    :param request:
+        ids : Array - the teams ids, up to batch.max_ids
+        fields : Array (optional) - the fields to return (the id is always returned)
+    :return
+    request example
+        {
+            "ids": ["5f1c...", "5f1d..."],
+            "fields": ["name", "season"]
+        }
+    """
+    logger.info(f'Server/Get Teams Batch - start | request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Get Teams Batch - calling validate_schema | request: {request.json}, schema: {BatchSchema}')
+        validate_schema(instance=request.json, schema=BatchSchema)
+        ids = request.json.get("ids")
+        if len(ids) > config['batch']['max_ids']:
+            raise ValueError(f'up to {config["batch"]["max_ids"]} ids can be requested at once')
+        logger.debug('Server/Get Teams Batch - input validation succeeded')
+
+        logger.debug(f'Server/Get Teams Batch - calling MongoDbService/find_teams_batch')
+        _teams = db.find_teams_batch(ids, request.json.get("fields"))
+        logger.debug(f'Server/Get Teams Batch - MongoDbService/find_teams_batch succeeded')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get Teams Batch failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except ValueError as error:
+        logger.error(f'Server/Get Teams Batch failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Teams Batch failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Teams Batch succeeded - teams: {len(_teams)}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'teams': _teams
+        }, status=200, dumps=json_dumps, default=str)
+
+    finally:
+        logger.info(f'Server/Get Teams Batch - end')
+
+
+@app.get('/teams/search')
+@profiled
+async def get_handler_teams_search(request):
+    """
+    Suggest team names for a prefix of any word of the name, an exact name comes first, then the names
+    starting with the prefix and the teams with more seasons
+    :param request:
+        prefix : String - the start of a word of the team name (case insensitive)
+        limit : Number (optional) - the number of suggestions, up to team_search.max_limit
+    :return
+    request example
+        /teams/search?prefix=real&limit=10
+    """
+    logger.info(f'Server/Get Teams Search - start | request: {request.args}')
+    try:
+        prefix = request.args.get('prefix', '')
+        limit = team_search.parse_limit(request.args.get('limit'))
+        logger.debug('Server/Get Teams Search - input validation succeeded')
+
+        logger.debug(f'Server/Get Teams Search - calling TeamSearchService/search | prefix: {prefix}, limit: {limit}')
+        suggestions = team_search.search(prefix, limit)
+        logger.debug(f'Server/Get Teams Search - TeamSearchService/search succeeded')
+
+    except ValueError as error:
+        logger.error(f'Server/Get Teams Search failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Teams Search failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Teams Search succeeded - teams: {len(suggestions)}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'teams': suggestions
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get Teams Search - end')
+
+
+"""
+Match Routes
+"""
+
+
+@app.post('/future_match')
+@profiled
+async def post_handler_future_match(request):
+    """
+    Create a new Match
+    :param request:
+        home_team : String - the home team name
+        away_team : String - the away team name
+        date : String - the match date in format: YYYY-MM-DD
+    :return
+    request example
+        {
+            "home_team": Real Madrid,
+            "away_team": Hapoel Jerusalem
+            "season": 20/03/2020
+        }
+    """
+    logger.info(f'Server/Create Future Match - start | request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Create Future Match - calling validate_schema | request: {request.json}, schema: {MatchSchema}')
+        validate_schema(instance=request.json, schema=MatchSchema)
+        parse_date(request.json.get("date"))
+        logger.debug('Server/Create Future Match - input validation succeeded')
+
+        logger.debug(
+            f'Server/Create Future Match - calling matchProvider/parse_match_from_request | request: {request.json}, schema: {MatchSchema}')
+        parsed_request = parse_match_from_request(request.json)
+        logger.debug(
+            f'Server/Create Future Match - matchProvider/parse_match_from_request succeeded | parsed request: {parsed_request}')
+
+        logger.debug(f'Server/Create Future Match - calling MongoDbService/create_match | request: {parsed_request}')
+        _id = await admission.run('future_match', db.create_match, parsed_request)
+        logger.debug(f'Server/Create Future Match - MongoDbService/create_match succeeded | match id : {_id}')
+
+    except (ValidationError, ValueError) as error:
+        logger.error(f'Server/Create Future Match failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except OverloadedError as error:
+        logger.error(f'Server/Create Future Match failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Create Future Match failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Create Future Match succeeded - id: {_id}')
+        return rjson({
+            'status': "success",
+            'message': 'the team added',
+            'id': str(_id)
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Create Future Match - end')
+
+
+@app.post('/ended_match')
+@profiled
+async def post_handler_match(request):
+    """
+    Create a new Match
+    :param request:
+        home_team : String - the home team name
+        away_team : String - the away team name
+        score : String - the match score
+        date : String - the match date in format: YYYY-MM-DD
+    :return
+    request example
+        {
+        }
+    """
+    logger.info(f'Server/Create Ended Match - start | request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Create Ended Match - calling validate_schema | request: {request.json}, schema: {MatchSchema}')
+        validate_schema(instance=request.json, schema=MatchSchema)
+        parse_date(request.json.get("date"))
+        score = request.json.get("score", None).replace(' ', '')
+        is_valid_score = regex_match("(0|[1-9]\d*)-(0|[1-9]\d*)", score)
+        if not is_valid_score:
+            raise ValueError('Score must be in the format: Number-Number')
+        logger.debug('Server/Create Ended Match - input validation succeeded')
+
+        logger.debug(
+            f'Server/Create Ended Match - calling matchProvider/parse_match_from_request | request: {request.json}, schema: {MatchSchema}')
+        parsed_request = parse_ended_match_from_request(request.json)
+        logger.debug(
+            f'Server/Create Ended Match - matchProvider/parse_match_from_request succeeded | parsed request: {parsed_request}')
+
+        logger.debug(
+            f'Server/Create Ended Match - calling MongoDbService/create_match_with_score | request: {parsed_request}')
+        _id = await admission.run('ended_match', db.create_match_with_score, parsed_request)
+        logger.debug(f'Server/Create Ended Match - MongoDbService/create_match_with_score succeeded | match id : {_id}')
+
+    except (ValidationError, ValueError) as error:
+        logger.error(f'Server/Create Ended Match failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except OverloadedError as error:
+        logger.error(f'Server/Create Ended Match failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Create Ended Match failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Create Ended Match succeeded - id: {_id}')
+        return rjson({
+            'status': "success",
+            'message': 'the match added',
+            'id': str(_id)
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Create Ended Match - end')
+
+
+@app.put('/ended_match/<match_id:string>')
+@profiled
+async def put_handler_match_result(request, match_id):
+    """
+    Correct the score of an ended Match - the teams and the standings get the difference of the old and the new
+    result, the season is not recomputed
+    :param request:
+        score : String - the corrected match score
+    :return
+    request example
+        {
+            "score": "2-1"
+        }
+    response example
+        {
+            "status": "success",
+            "message": "the match result corrected",
+            "match": {"id": match_id, "home_team": "real madrid", "away_team": "hapoel jerusalem", "score": "2-1"}
+        }
+    """
+    logger.info(f'Server/Correct Ended Match - start | id: {match_id}, request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Correct Ended Match - calling validate_schema | request: {request.json}, schema: {MatchScoreSchema}')
+        validate_schema(instance=request.json, schema=MatchScoreSchema)
+        score = request.json.get("score").replace(' ', '')
+        if not regex_match("(0|[1-9]\d*)-(0|[1-9]\d*)$", score):
+            raise ValueError('Score must be in the format: Number-Number')
+        _match_id = ObjectId(match_id)
+        logger.debug('Server/Correct Ended Match - input validation succeeded')
+
+        logger.debug(f'Server/Correct Ended Match - calling MongoDbService/correct_match_result | score: {score}')
+        _match = await admission.run('ended_match', db.correct_match_result, _match_id, score)
+        logger.debug(f'Server/Correct Ended Match - MongoDbService/correct_match_result succeeded | match: {_match}')
+
+    except (ValidationError, ValueError) as error:
+        logger.error(f'Server/Correct Ended Match failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(getattr(error, 'message', error))
+            }, status=400)
+
+    except OverloadedError as error:
+        logger.error(f'Server/Correct Ended Match failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Correct Ended Match failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Correct Ended Match succeeded - match: {_match}')
+        return rjson({
+            'status': "success",
+            'message': 'the match result corrected',
+            'match': _match
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Correct Ended Match - end')
+
+
+@app.post('/live_match')
+@profiled
+async def post_handler_live_match(request):
+    """
+    Start a live Match - its goals are recorded with POST /live_match/<match_id>/goal
+    :param request:
+        home_team : String - the home team name
+        away_team : String - the away team name
+        date : String - the match date in format: YYYY-MM-DD
+    :return
+    request example
+        {
+            "home_team": "real madrid",
+            "away_team": "hapoel jerusalem",
+            "date": "2020-03-20"
+        }
+    """
+    logger.info(f'Server/Create Live Match - start | request: {request.json}')
+    try:
         logger.debug(
-            f'Server/Create Ended Match - calling MongoDbService/create_match_with_score | request: {parsed_request}')
-        _id = db.create_match_with_score(parsed_request)
-        logger.debug(f'Server/Create Ended Match - MongoDbService/create_match_with_score succeeded | match id : {_id}')
+            f'Server/Create Live Match - calling validate_schema | request: {request.json}, schema: {MatchSchema}')
+        validate_schema(instance=request.json, schema=MatchSchema)
+        parse_date(request.json.get("date"))
+        logger.debug('Server/Create Live Match - input validation succeeded')
+
+        parsed_request = parse_match_from_request(request.json)
+        logger.debug(f'Server/Create Live Match - calling MongoDbService/create_live_match | request: {parsed_request}')
+        _id = await admission.run('live_match', db.create_live_match, parsed_request)
+        logger.debug(f'Server/Create Live Match - MongoDbService/create_live_match succeeded | match id : {_id}')
 
     except (ValidationError, ValueError) as error:
-        logger.error(f'Server/Create Ended Match failed - validation error | error: {error}')
+        logger.error(f'Server/Create Live Match failed - validation error | error: {error}')
         return rjson(
             {
                 'status': 'Error',
                 'message': str(error)
             }, status=400)
 
+    except OverloadedError as error:
+        logger.error(f'Server/Create Live Match failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
     except Exception as error:
-        logger.error(f'Server/Create Ended Match failed - error: {error}')
+        logger.error(f'Server/Create Live Match failed - error: {error}')
         return rjson(
             {
                 'status': 'Error',
@@ -848,18 +2374,126 @@ async def post_handler_match(request):
             }, status=400)
 
     else:
-        logger.info(f'Server/Create Ended Match succeeded - id: {_id}')
+        logger.info(f'Server/Create Live Match succeeded - id: {_id}')
         return rjson({
             'status': "success",
-            'message': 'the match added',
+            'message': 'the live match started',
             'id': str(_id)
         }, status=200)
 
     finally:
-        logger.info(f'Server/Create Ended Match - end')
+        logger.info(f'Server/Create Live Match - end')
+
+
+@app.post('/live_match/<match_id:string>/goal')
+@profiled
+async def post_handler_live_match_goal(request, match_id):
+    """
+    Add a goal to a live Match - the goals are buffered and written every live_match.flush_interval seconds
+    :param request:
+        team : String - the name of the team that scored
+    :return
+    request example
+        {
+            "team": "real madrid"
+        }
+    """
+    logger.info(f'Server/Add Live Match Goal - start | id: {match_id}, request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Add Live Match Goal - calling validate_schema | request: {request.json}, schema: {LiveGoalSchema}')
+        validate_schema(instance=request.json, schema=LiveGoalSchema)
+        logger.debug('Server/Add Live Match Goal - input validation succeeded')
+
+        logger.debug(f'Server/Add Live Match Goal - calling LiveMatchService/add_goal')
+        pending_goals = live_matches.add_goal(db, ObjectId(match_id), request.json.get("team"))
+        logger.debug(f'Server/Add Live Match Goal - LiveMatchService/add_goal succeeded | pending goals: {pending_goals}')
+
+    except (ValidationError, ValueError) as error:
+        logger.error(f'Server/Add Live Match Goal failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(getattr(error, 'message', error))
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Add Live Match Goal failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Add Live Match Goal succeeded - id: {match_id}')
+        return rjson({
+            'status': "success",
+            'message': 'the goal added',
+            'id': match_id
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Add Live Match Goal - end')
+
+
+@app.post('/live_match/<match_id:string>/finalize')
+@profiled
+async def post_handler_live_match_finalize(request, match_id):
+    """
+    End a live Match - its score is saved and the teams are updated like in POST /ended_match
+    :param
+        match_id : String - the live match id
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "the live match ended",
+            "match": {"id": match_id, "home_team": "real madrid", "away_team": "hapoel jerusalem", "score": "2-1"}
+        }
+    """
+    logger.info(f'Server/Finalize Live Match - start | id: {match_id}')
+    try:
+        _match_id = ObjectId(match_id)
+        logger.debug(f'Server/Finalize Live Match - calling LiveMatchService/flush')
+        await asyncio.get_event_loop().run_in_executor(None, live_matches.flush, db, [_match_id])
+        logger.debug(f'Server/Finalize Live Match - LiveMatchService/flush succeeded')
+
+        logger.debug(f'Server/Finalize Live Match - calling MongoDbService/finalize_live_match')
+        _match = await admission.run('live_match', db.finalize_live_match, _match_id)
+        live_matches.forget(_match_id)
+        logger.debug(f'Server/Finalize Live Match - MongoDbService/finalize_live_match succeeded | match: {_match}')
+
+    except OverloadedError as error:
+        logger.error(f'Server/Finalize Live Match failed - overloaded | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=error.status, headers={'Retry-After': str(error.retry_after)})
+
+    except Exception as error:
+        logger.error(f'Server/Finalize Live Match failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Finalize Live Match succeeded - match: {_match}')
+        return rjson({
+            'status': "success",
+            'message': 'the live match ended',
+            'match': _match
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Finalize Live Match - end')
 
 
 @app.get('/match/<home_team:string>/<away_team:string>/<date:string>')
+@profiled
 async def get_handler_match_by_name_season(request, home_team, away_team, date):
     """
     Get a Team by name & season
@@ -887,9 +2521,7 @@ async def get_handler_match_by_name_season(request, home_team, away_team, date):
         logger.debug(
             f'Server/Get Match by home_team, away_team & date - calling validate_schema | request: {parsed_request}, schema: {MatchSchema}')
         validate_schema(instance=parsed_request, schema=MatchSchema)
-        date = request.get("date", None),
-        if date != datetime.strptime(date, "%Y-%m-%d").strftime('%Y-%m-%d'):
-            raise ValueError('Date must be in the format: YYYY-MM-DD')
+        parse_date(date)
         logger.debug('Server/Get Match by home_team, away_team & date - input validation succeeded')
 
         logger.debug(
@@ -933,6 +2565,7 @@ async def get_handler_match_by_name_season(request, home_team, away_team, date):
 
 
 @app.get('/match/<match_id:string>')
+@profiled
 async def get_handler_team_by_id(request, match_id):
     """
     Get a team
@@ -982,5 +2615,325 @@ async def get_handler_team_by_id(request, match_id):
         logger.info(f'Server/Get Match by id - end')
 
 
+@app.get('/head_to_head/<team_a:string>/<team_b:string>')
+@profiled
+async def get_handler_head_to_head(request, team_a, team_b):
+    """
+    Get the record of all the meetings between two teams, regardless of the venue
+    :param
+        team_a : String - the first team name
+        team_b : String - the second team name
+        recent : Number - (query) the number of recent meetings to return
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "head_to_head": {"team_a": "real madrid", "team_b": "hapoel jerusalem", "matches": 3, "team_a_wins": 1,
+                             "team_b_wins": 1, "draws": 1, "team_a_goals": 4, "team_b_goals": 3, "recent": [match]}
+        }
+    """
+    logger.info(f'Server/Get Head to Head - start | team_a: {team_a}, team_b: {team_b}, args: {request.args}')
+    try:
+        recent_matches = int(request.args.get('recent', config['head_to_head']['recent_matches']))
+        if recent_matches < 1:
+            raise ValueError('recent must be a positive number')
+        logger.debug('Server/Get Head to Head - input validation succeeded')
+
+        logger.debug(f'Server/Get Head to Head - calling MongoDbService/find_head_to_head')
+        head_to_head = db.find_head_to_head(team_a, team_b, recent_matches)
+        logger.debug(f'Server/Get Head to Head - MongoDbService/find_head_to_head succeeded | head to head: {head_to_head}')
+
+    except ValueError as error:
+        logger.error(f'Server/Get Head to Head failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Head to Head failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Head to Head succeeded - head to head: {head_to_head}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'head_to_head': head_to_head
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get Head to Head - end')
+
+
+@app.post('/matches/batch')
+@profiled
+async def post_handler_matches_batch(request):
+    """
+    Get matches by their ids with one query, the results are in the order of the ids and a missing id
+    is returned as {"id": id, "status": "not_found"} (or "invalid_id")
+    :param request:
+        ids : Array - the matches ids, up to batch.max_ids
+        fields : Array (optional) - the fields to return (the id is always returned)
+    :return
+    request example
+        {
+            "ids": ["5f1c...", "5f1d..."],
+            "fields": ["name", "season"]
+        }
+    """
+    logger.info(f'Server/Get Matches Batch - start | request: {request.json}')
+    try:
+        logger.debug(
+            f'Server/Get Matches Batch - calling validate_schema | request: {request.json}, schema: {BatchSchema}')
+        validate_schema(instance=request.json, schema=BatchSchema)
+        ids = request.json.get("ids")
+        if len(ids) > config['batch']['max_ids']:
+            raise ValueError(f'up to {config["batch"]["max_ids"]} ids can be requested at once')
+        logger.debug('Server/Get Matches Batch - input validation succeeded')
+
+        logger.debug(f'Server/Get Matches Batch - calling MongoDbService/find_matches_batch')
+        _matches = db.find_matches_batch(ids, request.json.get("fields"))
+        logger.debug(f'Server/Get Matches Batch - MongoDbService/find_matches_batch succeeded')
+
+    except ValidationError as error:
+        logger.error(f'Server/Get Matches Batch failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except ValueError as error:
+        logger.error(f'Server/Get Matches Batch failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Matches Batch failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Matches Batch succeeded - matches: {len(_matches)}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'matches': _matches
+        }, status=200, dumps=json_dumps, default=str)
+
+    finally:
+        logger.info(f'Server/Get Matches Batch - end')
+
+
+@app.get('/matches')
+@profiled
+async def get_handler_matches_by_date_range(request):
+    """
+    Get the matches played in a date range (including both dates) sorted by date
+    :param
+        from : String (query) - the first date in format: YYYY-MM-DD
+        to : String (query) - the last date in format: YYYY-MM-DD, up to matches.max_range_days after from
+        team : String (query, optional) - only the matches of this team
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "matches": [{"id": match_id, "home_team": "real madrid", "away_team": "hapoel jerusalem",
+                         "date": "2020-03-20", "score": "2-0"}]
+        }
+    """
+    logger.info(f'Server/Get Matches by date range - start | args: {request.args}')
+    try:
+        from_date = request.args.get('from')
+        to_date = request.args.get('to', from_date)
+        days = (parse_date(to_date) - parse_date(from_date)).days
+        if not 0 <= days <= config['matches']['max_range_days']:
+            raise ValueError(f'to must be from 0 to {config["matches"]["max_range_days"]} days after from')
+        team_name = request.args.get('team')
+        logger.debug('Server/Get Matches by date range - input validation succeeded')
+
+        logger.debug(f'Server/Get Matches by date range - calling MongoDbService/find_matches_by_date_range')
+        matches = db.find_matches_by_date_range(from_date, to_date, team_name)
+        logger.debug(f'Server/Get Matches by date range - MongoDbService/find_matches_by_date_range succeeded | '
+                     f'matches: {len(matches)}')
+
+    except ValueError as error:
+        logger.error(f'Server/Get Matches by date range failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Get Matches by date range failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        logger.info(f'Server/Get Matches by date range succeeded - matches: {len(matches)}')
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'matches': matches
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get Matches by date range - end')
+
+
+"""
+Export Routes
+"""
+
+
+@app.get('/export/<name:string>/<season:number>')
+@profiled
+async def get_handler_export(request, name, season):
+    """
+    Export the teams or the matches of a league season as a gzip CSV, streamed in chunks.
+    The matches table refers to the teams by the team_id column of the teams table
+    :param
+        name : String - the league name
+        season : Number - the season year
+        table : String (query, optional) - matches (default) or teams
+    :return
+        a gzip CSV attachment
+    """
+    logger.info(f'Server/Export League - start | name: {name}, season: {season}, args: {request.args}')
+    try:
+        parsed_request = {
+            "name": name,
+            "season": season
+        }
+        logger.debug(
+            f'Server/Export League - calling validate_schema | request: {parsed_request}, schema: {LeagueSchema}')
+        validate_schema(instance=parsed_request, schema=LeagueSchema)
+        table = request.args.get("table", "matches")
+        if table not in ("matches", "teams"):
+            raise ValueError('table must be matches or teams')
+        logger.debug('Server/Export League - input validation succeeded')
+
+        logger.debug(f'Server/Export League - calling MongoDbService/find_league | request: {parsed_request}')
+        _league = db.find_league(parsed_request)
+        logger.debug(f'Server/Export League - MongoDbService/find_league succeeded | league: {_league}')
+        if _league is None:
+            raise Exception('The league is not exists')
+        parsed_league = parse_league_from_db(_league)
+
+        logger.debug(f'Server/Export League - calling MongoDbService/stream_teams_of_league')
+        team_ids = team_dictionary(team['name'] for team in db.stream_teams_of_league(parsed_league))
+        logger.debug(f'Server/Export League - MongoDbService/stream_teams_of_league succeeded | teams: {len(team_ids)}')
+
+        if table == "teams":
+            chunks = export_teams(db.stream_teams_of_league(parsed_league), team_ids)
+        else:
+            chunks = export_matches(db.stream_matches_of_league(season, team_ids), team_ids)
+
+    except ValidationError as error:
+        logger.error(f'Server/Export League failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error.message)
+            }, status=400)
+
+    except ValueError as error:
+        logger.error(f'Server/Export League failed - validation error | error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    except Exception as error:
+        logger.error(f'Server/Export League failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        async def write_chunks(response):
+            try:
+                for chunk in chunks:
+                    await response.write(chunk)
+            except Exception as error:
+                logger.error(f'Server/Export League failed while streaming - error: {error}')
+                raise
+            logger.info(f'Server/Export League succeeded - name: {name}, season: {season}, table: {table}')
+
+        filename = f'{name}-{int(season)}-{table}.csv.gz'
+        return stream(write_chunks, content_type='application/gzip',
+                      headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+    finally:
+        logger.info(f'Server/Export League - end')
+
+
+"""
+Metrics Routes
+"""
+
+
+@app.get('/metrics')
+@profiled
+async def get_handler_metrics(request):
+    """
+    Get the server metrics of this worker
+    :return
+    response example
+        {
+            "status": "success",
+            "message": "success",
+            "admission": {"ended_match": {"concurrency": 8, "queue_size": 200, "active": 8, "queued": 31,
+                                          "admitted": 1200, "shed": 17, "timed_out": 2}},
+            "event_loop": {"lag_ms": 0.4, "lag_p50_ms": 0.3, "lag_p99_ms": 12.1, "lag_max_ms": 250.2, "blocked_count": 1,
+                           "recent_blocking_calls": [{"blocked_for": 0.25, "call": "MongoDbService.find_team"}]}
+        }
+    """
+    logger.info(f'Server/Get Metrics - start')
+    try:
+        _admission = admission.metrics()
+        _event_loop = loop_monitor.metrics()
+
+    except Exception as error:
+        logger.error(f'Server/Get Metrics failed - error: {error}')
+        return rjson(
+            {
+                'status': 'Error',
+                'message': str(error)
+            }, status=400)
+
+    else:
+        return rjson({
+            'status': "success",
+            'message': 'success',
+            'admission': _admission,
+            'event_loop': _event_loop
+        }, status=200)
+
+    finally:
+        logger.info(f'Server/Get Metrics - end')
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000)
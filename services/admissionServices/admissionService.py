@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.profilingServices.profilingService import current_profile
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+"""
+The Admission Service runs the blocking MongoDbService writes of a route on a thread pool, at most `concurrency`
+of them at a time. Up to `queue_size` more requests wait for a slot, the rest are shed at once (429),
+and a request that waited longer than `queue_timeout` seconds is shed too (503), so the event loop stays free
+for the read routes while the writes are overloaded
+"""
+
+
+class OverloadedError(Exception):
+    def __init__(self, message, status, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RouteGate:
+    def __init__(self, route, concurrency, queue_size, queue_timeout):
+        self.route = route
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.semaphore = None
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+
+    def metrics(self):
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out
+        }
+
+
+class AdmissionService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.retry_after = config['admission']['retry_after']
+        self.executor = ThreadPoolExecutor(max_workers=config['admission']['workers'],
+                                           thread_name_prefix='admission')
+        self.default_limits = config['admission']['default']
+        self.route_limits = config['admission']['routes']
+        self.gates = {}
+
+    def get_gate(self, route):
+        gate = self.gates.get(route)
+        if gate is None:
+            limits = {**self.default_limits, **self.route_limits.get(route, {})}
+            gate = RouteGate(route, limits['concurrency'], limits['queue_size'], limits['queue_timeout'])
+            self.gates[route] = gate
+        if gate.semaphore is None:
+            # created lazily so it belongs to the running (worker) loop
+            gate.semaphore = asyncio.Semaphore(gate.concurrency)
+        return gate
+
+    async def run(self, route, function, *args):
+        """
+        Run function(*args) on the thread pool once the route has a free slot,
+        raise OverloadedError when the route queue is full or the wait timed out
+        """
+        gate = self.get_gate(route)
+        if gate.active + gate.queued >= gate.concurrency + gate.queue_size:
+            gate.shed += 1
+            logger.warning(f'AdmissionService/run - request shed, the queue is full | route: {route}, '
+                           f'active: {gate.active}, queued: {gate.queued}')
+            raise OverloadedError(f'{route} is overloaded, try again later', 429, self.retry_after)
+
+        gate.queued += 1
+        try:
+            await asyncio.wait_for(gate.semaphore.acquire(), timeout=gate.queue_timeout)
+        except asyncio.TimeoutError:
+            gate.timed_out += 1
+            logger.warning(f'AdmissionService/run - request shed, the queue wait timed out | route: {route}, '
+                           f'active: {gate.active}, queued: {gate.queued}')
+            raise OverloadedError(f'{route} is overloaded, try again later', 503, self.retry_after)
+        finally:
+            gate.queued -= 1
+
+        gate.active += 1
+        gate.admitted += 1
+        session = current_profile.get()
+        if session is not None:
+            function = session.wrap(function)
+        try:
+            return await asyncio.get_event_loop().run_in_executor(self.executor, partial(function, *args))
+        finally:
+            gate.active -= 1
+            gate.semaphore.release()
+
+    def metrics(self):
+        return {route: gate.metrics() for route, gate in sorted(self.gates.items())}
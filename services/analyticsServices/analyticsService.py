@@ -0,0 +1,397 @@
+#!/usr/bin/python3
+
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from threading import Lock
+
+import numpy as np
+from bson import ObjectId
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.matchProvider import parse_score
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+SNAPSHOT_MAGIC = b'FMTSNAP1'
+# the arrays start at multiples of the alignment, so the mapped arrays are aligned for every dtype
+SNAPSHOT_ALIGNMENT = 64
+SNAPSHOT_ARRAYS = ('home', 'away', 'home_goals', 'away_goals', 'date')
+
+"""
+The Analytics Service keeps every season's ended matches as compact NumPy arrays and computes the league tables
+from them with vectorized operations instead of looping over the team documents
+"""
+
+
+class SeasonArrays:
+    def __init__(self, season):
+        self.season = season
+        self.team_names = []
+        self.team_index = {}
+        self.home = np.empty(0, dtype=np.int32)
+        self.away = np.empty(0, dtype=np.int32)
+        self.home_goals = np.empty(0, dtype=np.int16)
+        self.away_goals = np.empty(0, dtype=np.int16)
+        self.date = np.empty(0, dtype=np.int32)
+        self.last_id = None
+        # the corrected results of the season when the arrays were loaded (see MongoDbService/correct_match_result)
+        self.corrections = 0
+        self.refreshed_at = 0.0
+        self.lock = Lock()
+
+    def reset(self):
+        self.team_names = []
+        self.team_index = {}
+        for name in SNAPSHOT_ARRAYS:
+            setattr(self, name, np.empty(0, dtype=getattr(self, name).dtype))
+        self.last_id = None
+
+    def team_id(self, name):
+        if name not in self.team_index:
+            self.team_index[name] = len(self.team_names)
+            self.team_names.append(name)
+        return self.team_index[name]
+
+    def extend(self, matches):
+        home, away, home_goals, away_goals, date = [], [], [], [], []
+        for match in matches:
+            home_score, away_score = parse_score(match['score'])
+            home.append(self.team_id(match['home_team']))
+            away.append(self.team_id(match['away_team']))
+            home_goals.append(home_score)
+            away_goals.append(away_score)
+            date.append(datetime.strptime(match['date'], '%Y-%m-%d').toordinal())
+            self.last_id = match['result_id']
+
+        if home:
+            self.home = np.concatenate((self.home, np.asarray(home, dtype=np.int32)))
+            self.away = np.concatenate((self.away, np.asarray(away, dtype=np.int32)))
+            self.home_goals = np.concatenate((self.home_goals, np.asarray(home_goals, dtype=np.int16)))
+            self.away_goals = np.concatenate((self.away_goals, np.asarray(away_goals, dtype=np.int16)))
+            self.date = np.concatenate((self.date, np.asarray(date, dtype=np.int32)))
+        return len(home)
+
+    def __len__(self):
+        return len(self.home)
+
+
+class AnalyticsService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.refresh_interval = config['analytics']['refresh_interval']
+        self.seasons = {}
+        self.lock = Lock()
+
+    def get_season(self, db, season, force_refresh=False):
+        """
+        Return the season arrays, loading them on first use and afterwards only appending the matches
+        that were written since the last refresh - a corrected result of the season reloads the arrays
+        """
+        season = int(season)
+        with self.lock:
+            season_arrays = self.seasons.get(season)
+            if season_arrays is None:
+                season_arrays = SeasonArrays(season)
+                self.seasons[season] = season_arrays
+
+        # a season refresh does not wait for the refresh of another season
+        with season_arrays.lock:
+            if force_refresh or time.monotonic() - season_arrays.refreshed_at >= self.refresh_interval:
+                logger.debug(f'AnalyticsService/get_season - refreshing | season: {season}, '
+                             f'last id: {season_arrays.last_id}')
+                corrections = db.find_result_corrections(season)
+                if corrections != season_arrays.corrections:
+                    logger.debug(f'AnalyticsService/get_season - results were corrected, reloading | '
+                                 f'season: {season}, corrections: {corrections}')
+                    season_arrays.reset()
+                    season_arrays.corrections = corrections
+                added = season_arrays.extend(db.find_ended_matches_of_season(season, season_arrays.last_id))
+                season_arrays.refreshed_at = time.monotonic()
+                logger.debug(f'AnalyticsService/get_season - refreshed | season: {season}, added: {added}, '
+                             f'total: {len(season_arrays)}')
+
+            return season_arrays
+
+    def warm_start(self, db, path):
+        """
+        Load the season arrays of a snapshot file and append the matches written after the snapshot was taken
+        """
+        seasons = load_snapshot(path)
+        with self.lock:
+            for season_arrays in seasons:
+                self.seasons[season_arrays.season] = season_arrays
+        for season_arrays in seasons:
+            logger.info(f'AnalyticsService/warm_start - season loaded | season: {season_arrays.season}, '
+                        f'matches: {len(season_arrays)}, last id: {season_arrays.last_id}')
+            self.get_season(db, season_arrays.season, force_refresh=True)
+        return len(seasons)
+
+    def invalidate(self, season=None):
+        with self.lock:
+            if season is None:
+                self.seasons = {}
+            else:
+                self.seasons.pop(int(season), None)
+
+
+def _aligned(offset):
+    return -(-offset // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+
+
+def write_snapshot(path, seasons):
+    """
+    Write the season arrays to a snapshot file - the magic, the header length, a JSON header
+    and the raw arrays, every array starts at an aligned offset (relative to the end of the header)
+    so the file can be mapped as is. The file is replaced atomically, workers that mapped the old file keep it
+    """
+    seasons = list(seasons)
+    entries = []
+    offset = 0
+    for season_arrays in seasons:
+        arrays = {}
+        for name in SNAPSHOT_ARRAYS:
+            values = getattr(season_arrays, name)
+            arrays[name] = {"dtype": values.dtype.str, "offset": offset, "length": len(values)}
+            offset = _aligned(offset + values.nbytes)
+        entries.append({
+            "season": season_arrays.season,
+            "team_names": season_arrays.team_names,
+            "last_id": str(season_arrays.last_id) if season_arrays.last_id is not None else None,
+            "corrections": season_arrays.corrections,
+            "arrays": arrays
+        })
+
+    header = json.dumps({"version": 1, "created_at": time.time(), "seasons": entries}).encode()
+    data_start = _aligned(len(SNAPSHOT_MAGIC) + 8 + len(header))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(SNAPSHOT_MAGIC)
+        snapshot_file.write(struct.pack('<Q', len(header)))
+        snapshot_file.write(header)
+        for season_arrays, entry in zip(seasons, entries):
+            for name in SNAPSHOT_ARRAYS:
+                snapshot_file.seek(data_start + entry['arrays'][name]['offset'])
+                snapshot_file.write(np.ascontiguousarray(getattr(season_arrays, name)).tobytes())
+        snapshot_file.truncate(data_start + offset)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temporary_path, path)
+    return len(seasons)
+
+
+def load_snapshot(path):
+    """
+    Map a snapshot file and return its season arrays - the arrays are read only views of the mapped pages,
+    so the workers that load the same file share its pages in the page cache. SeasonArrays.extend
+    copies them into private arrays once new matches arrive
+    """
+    with open(path, 'rb') as snapshot_file:
+        mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise Exception(f'{path} is not an analytics snapshot')
+    header_start = len(SNAPSHOT_MAGIC) + 8
+    (header_length,) = struct.unpack_from('<Q', mapped, len(SNAPSHOT_MAGIC))
+    header = json.loads(mapped[header_start:header_start + header_length].decode())
+    data_start = _aligned(header_start + header_length)
+
+    seasons = []
+    for entry in header['seasons']:
+        season_arrays = SeasonArrays(entry['season'])
+        season_arrays.team_names = entry['team_names']
+        season_arrays.team_index = {name: index for index, name in enumerate(entry['team_names'])}
+        for name, array in entry['arrays'].items():
+            if array['length']:
+                setattr(season_arrays, name, np.frombuffer(mapped, dtype=array['dtype'], count=array['length'],
+                                                           offset=data_start + array['offset']))
+            else:
+                setattr(season_arrays, name, np.empty(0, dtype=array['dtype']))
+        season_arrays.last_id = ObjectId(entry['last_id']) if entry['last_id'] is not None else None
+        season_arrays.corrections = entry.get('corrections', 0)
+        seasons.append(season_arrays)
+    return seasons
+
+
+def select_teams(season_arrays, team_names=None):
+    """
+    Return the indices and the names of the requested teams (all the season teams when team_names is empty)
+    and a mask of the matches played between them. A team without an ended match yet gets the index
+    len(season_arrays.team_names) - a slot that no match counts to, so its stats are zeros (see count_size)
+    """
+    if team_names:
+        names = sorted(set(team_names))
+        unplayed = len(season_arrays.team_names)
+        teams = np.asarray([season_arrays.team_index.get(name, unplayed) for name in names], dtype=np.int32)
+    else:
+        names = list(season_arrays.team_names)
+        teams = np.arange(len(names), dtype=np.int32)
+    mask = np.isin(season_arrays.home, teams) & np.isin(season_arrays.away, teams)
+    return teams, names, mask
+
+
+def count_size(season_arrays):
+    # the season teams and the slot of the teams without an ended match (see select_teams)
+    return len(season_arrays.team_names) + 1
+
+
+def _results(home_goals, away_goals):
+    return home_goals > away_goals, home_goals == away_goals, home_goals < away_goals
+
+
+def _count(index, weights, size):
+    return np.bincount(index, weights=weights, minlength=size).astype(np.int64)
+
+
+def _rank(teams, names, points, goal_difference, goals_scored):
+    return np.lexsort((np.asarray(names), -goals_scored[teams], -goal_difference[teams], -points[teams]))
+
+
+def compute_standings(season_arrays, team_names=None):
+    size = count_size(season_arrays)
+    teams, names, mask = select_teams(season_arrays, team_names)
+    home, away = season_arrays.home[mask], season_arrays.away[mask]
+    home_goals = season_arrays.home_goals[mask].astype(np.int64)
+    away_goals = season_arrays.away_goals[mask].astype(np.int64)
+    home_win, draw, away_win = _results(home_goals, away_goals)
+
+    wins = _count(home, home_win, size) + _count(away, away_win, size)
+    draws = _count(home, draw, size) + _count(away, draw, size)
+    losses = _count(home, away_win, size) + _count(away, home_win, size)
+    goals_scored = _count(home, home_goals, size) + _count(away, away_goals, size)
+    goals_received = _count(home, away_goals, size) + _count(away, home_goals, size)
+    goal_difference = goals_scored - goals_received
+    points = 3 * wins + draws
+
+    order = _rank(teams, names, points, goal_difference, goals_scored)
+    return [{
+        "position": position + 1,
+        "team": names[index],
+        "played": int(wins[team] + draws[team] + losses[team]),
+        "number_of_wins": int(wins[team]),
+        "number_of_draws": int(draws[team]),
+        "number_of_losses": int(losses[team]),
+        "number_of_scored_goals": int(goals_scored[team]),
+        "number_of_received_goals": int(goals_received[team]),
+        "goal_difference": int(goal_difference[team]),
+        "points": int(points[team])
+    } for position, (index, team) in enumerate(zip(order.tolist(), teams[order].tolist()))]
+
+
+def compute_standings_from_stats(stats, team_names):
+    """
+    Return the table of the teams from their stats (see standingsSnapshotProvider), ranked like compute_standings
+    """
+    rows = []
+    for name in set(team_names):
+        team_stats = stats.get(name, {})
+        wins, draws, losses = team_stats.get('wins', 0), team_stats.get('draws', 0), team_stats.get('losses', 0)
+        goals_scored, goals_received = team_stats.get('scored', 0), team_stats.get('received', 0)
+        rows.append({
+            "team": name,
+            "played": wins + draws + losses,
+            "number_of_wins": wins,
+            "number_of_draws": draws,
+            "number_of_losses": losses,
+            "number_of_scored_goals": goals_scored,
+            "number_of_received_goals": goals_received,
+            "goal_difference": goals_scored - goals_received,
+            "points": 3 * wins + draws
+        })
+    rows.sort(key=lambda row: (-row['points'], -row['goal_difference'], -row['number_of_scored_goals'], row['team']))
+    return [{"position": position + 1, **row} for position, row in enumerate(rows)]
+
+
+def compute_home_away_splits(season_arrays, team_names=None):
+    size = count_size(season_arrays)
+    teams, names, mask = select_teams(season_arrays, team_names)
+    home, away = season_arrays.home[mask], season_arrays.away[mask]
+    home_goals = season_arrays.home_goals[mask].astype(np.int64)
+    away_goals = season_arrays.away_goals[mask].astype(np.int64)
+    home_win, draw, away_win = _results(home_goals, away_goals)
+
+    splits = {
+        "home": {
+            "number_of_wins": _count(home, home_win, size),
+            "number_of_draws": _count(home, draw, size),
+            "number_of_losses": _count(home, away_win, size),
+            "number_of_scored_goals": _count(home, home_goals, size),
+            "number_of_received_goals": _count(home, away_goals, size)
+        },
+        "away": {
+            "number_of_wins": _count(away, away_win, size),
+            "number_of_draws": _count(away, draw, size),
+            "number_of_losses": _count(away, home_win, size),
+            "number_of_scored_goals": _count(away, away_goals, size),
+            "number_of_received_goals": _count(away, home_goals, size)
+        }
+    }
+    return [{
+        "team": name,
+        **{venue: {stat: int(values[team]) for stat, values in stats.items()} for venue, stats in splits.items()}
+    } for name, team in sorted(zip(names, teams.tolist()))]
+
+
+def compute_clean_sheets(season_arrays, team_names=None):
+    size = count_size(season_arrays)
+    teams, names, mask = select_teams(season_arrays, team_names)
+    home, away = season_arrays.home[mask], season_arrays.away[mask]
+    home_clean_sheets = _count(home, season_arrays.away_goals[mask] == 0, size)
+    away_clean_sheets = _count(away, season_arrays.home_goals[mask] == 0, size)
+    clean_sheets = home_clean_sheets + away_clean_sheets
+
+    order = np.lexsort((np.asarray(names), -clean_sheets[teams]))
+    return [{
+        "team": names[index],
+        "clean_sheets": int(clean_sheets[team]),
+        "home_clean_sheets": int(home_clean_sheets[team]),
+        "away_clean_sheets": int(away_clean_sheets[team])
+    } for index, team in zip(order.tolist(), teams[order].tolist())]
+
+
+def compute_matchday_tables(season_arrays, team_names=None):
+    """
+    Return the cumulative table after every match date of the season - a matchday is a date with at least one result
+    """
+    size = count_size(season_arrays)
+    teams, names, mask = select_teams(season_arrays, team_names)
+    home, away = season_arrays.home[mask], season_arrays.away[mask]
+    home_goals = season_arrays.home_goals[mask].astype(np.int64)
+    away_goals = season_arrays.away_goals[mask].astype(np.int64)
+    home_win, draw, away_win = _results(home_goals, away_goals)
+    dates, matchday = np.unique(season_arrays.date[mask], return_inverse=True)
+
+    shape = (len(dates), size)
+    points, played, goals_scored, goals_received = (np.zeros(shape, dtype=np.int64) for _ in range(4))
+    np.add.at(points, (matchday, home), 3 * home_win + draw)
+    np.add.at(points, (matchday, away), 3 * away_win + draw)
+    np.add.at(played, (matchday, home), 1)
+    np.add.at(played, (matchday, away), 1)
+    np.add.at(goals_scored, (matchday, home), home_goals)
+    np.add.at(goals_scored, (matchday, away), away_goals)
+    np.add.at(goals_received, (matchday, home), away_goals)
+    np.add.at(goals_received, (matchday, away), home_goals)
+    points, played, goals_scored, goals_received = (np.cumsum(values, axis=0)
+                                                    for values in (points, played, goals_scored, goals_received))
+    goal_difference = goals_scored - goals_received
+
+    tables = []
+    for day, date in enumerate(dates.tolist()):
+        order = _rank(teams, names, points[day], goal_difference[day], goals_scored[day])
+        tables.append({
+            "matchday": day + 1,
+            "date": datetime.fromordinal(date).strftime('%Y-%m-%d'),
+            "table": [{
+                "position": position + 1,
+                "team": names[index],
+                "played": int(played[day, team]),
+                "goal_difference": int(goal_difference[day, team]),
+                "points": int(points[day, team])
+            } for position, (index, team) in enumerate(zip(order.tolist(), teams[order].tolist()))]
+        })
+    return tables
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+
+import numpy as np
+
+from services.analyticsServices.analyticsService import compute_standings, select_teams
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.matchProvider import LIVE_STATUS
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+# average goals of one side in a match, used while a season has no results yet
+DEFAULT_GOALS_PER_SIDE = 1.3
+MATCH_MINUTES = config['simulation']['match_minutes']
+
+"""
+The Simulation Service plays the remaining fixtures of a league many times with a Poisson goals model
+built from the current team stats, and counts how often every team finishes first, in the top places or relegated.
+A live match is simulated from its running score, only the goals of the minutes left are drawn
+"""
+
+
+def live_minutes(fixture, now):
+    """
+    Return the played minutes of a live fixture (from the creation of the live match, capped to MATCH_MINUTES),
+    None for a fixture that is not live
+    """
+    if fixture.get('status') != LIVE_STATUS:
+        return None
+    elapsed = (now - fixture['_id'].generation_time).total_seconds() // 60
+    return int(min(max(elapsed, 0), MATCH_MINUTES))
+
+
+def live_version(fixtures, now):
+    """
+    Return the state of the live fixtures - the cached simulation of a league is stale once a live match
+    scores or plays another minute
+    """
+    return tuple(sorted((str(fixture['_id']), fixture.get('home_goals', 0), fixture.get('away_goals', 0), minutes)
+                        for fixture, minutes in ((fixture, live_minutes(fixture, now)) for fixture in fixtures)
+                        if minutes is not None))
+
+
+def build_simulation(season_arrays, team_names, fixtures, now=None):
+    """
+    Build the (picklable) simulation input of a league - the current table, and the running score and the scoring
+    rate (of the minutes left) of both sides in every remaining fixture between the league teams
+    """
+    now = now or datetime.now(timezone.utc)
+    team_names = sorted(set(team_names))
+    local_index = {name: index for index, name in enumerate(team_names)}
+    size = len(team_names)
+    points, goal_difference, goals_scored, goals_received, played = (np.zeros(size, dtype=np.int64)
+                                                                     for _ in range(5))
+    for row in compute_standings(season_arrays, team_names):
+        team = local_index[row['team']]
+        points[team] = row['points']
+        goal_difference[team] = row['goal_difference']
+        goals_scored[team] = row['number_of_scored_goals']
+        goals_received[team] = row['number_of_received_goals']
+        played[team] = row['played']
+
+    fixtures = [fixture for fixture in fixtures
+                if fixture['home_team'] in local_index and fixture['away_team'] in local_index]
+    home = np.asarray([local_index[fixture['home_team']] for fixture in fixtures], dtype=np.int64)
+    away = np.asarray([local_index[fixture['away_team']] for fixture in fixtures], dtype=np.int64)
+    minutes = [live_minutes(fixture, now) for fixture in fixtures]
+    home_seed = np.asarray([fixture.get('home_goals', 0) if played is not None else 0
+                            for fixture, played in zip(fixtures, minutes)], dtype=np.int64)
+    away_seed = np.asarray([fixture.get('away_goals', 0) if played is not None else 0
+                            for fixture, played in zip(fixtures, minutes)], dtype=np.int64)
+    remaining = np.asarray([1.0 if played is None else 1.0 - played / MATCH_MINUTES for played in minutes],
+                           dtype=np.float64)
+
+    matches = played.sum() // 2
+    if matches:
+        goals_per_side = goals_scored.sum() / (2 * matches)
+    else:
+        goals_per_side = DEFAULT_GOALS_PER_SIDE
+
+    # one pseudo match at the league average keeps teams with few (or no) results away from zero rates
+    attack = (goals_scored + goals_per_side) / ((played + 1) * goals_per_side)
+    defence = (goals_received + goals_per_side) / ((played + 1) * goals_per_side)
+    _, _, mask = select_teams(season_arrays, team_names)
+    if mask.any():
+        home_rate = season_arrays.home_goals[mask].mean()
+        away_rate = season_arrays.away_goals[mask].mean()
+    else:
+        home_rate = away_rate = goals_per_side
+
+    return {
+        "team_names": team_names,
+        "points": points,
+        "goal_difference": goal_difference,
+        "goals_scored": goals_scored,
+        "home": home,
+        "away": away,
+        "home_seed": home_seed,
+        "away_seed": away_seed,
+        "home_rate": max(home_rate, 0.1) * attack[home] * defence[away] * remaining,
+        "away_rate": max(away_rate, 0.1) * attack[away] * defence[home] * remaining
+    }
+
+
+def simulate_chunk(simulation, runs, seed_sequence, top_places, relegation_places):
+    """
+    Simulate the remaining fixtures `runs` times and return how many times every team
+    won the title, finished in the top places and was relegated
+    """
+    rng = np.random.default_rng(seed_sequence)
+    size = len(simulation['team_names'])
+    fixtures = len(simulation['home'])
+    home_incidence = np.zeros((fixtures, size), dtype=np.float64)
+    away_incidence = np.zeros((fixtures, size), dtype=np.float64)
+    home_incidence[np.arange(fixtures), simulation['home']] = 1
+    away_incidence[np.arange(fixtures), simulation['away']] = 1
+
+    home_goals = simulation['home_seed'] + rng.poisson(simulation['home_rate'], size=(runs, fixtures))
+    away_goals = simulation['away_seed'] + rng.poisson(simulation['away_rate'], size=(runs, fixtures))
+    home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+
+    points = simulation['points'] + (home_points @ home_incidence + away_points @ away_incidence).astype(np.int64)
+    goal_difference = simulation['goal_difference'] + \
+        ((home_goals - away_goals) @ (home_incidence - away_incidence)).astype(np.int64)
+    goals_scored = simulation['goals_scored'] + \
+        (home_goals @ home_incidence + away_goals @ away_incidence).astype(np.int64)
+
+    # teams that are level on points, goal difference and goals are separated at random
+    order = np.lexsort((rng.random((runs, size)), -goals_scored, -goal_difference, -points), axis=-1)
+    positions = np.empty_like(order)
+    positions[np.arange(runs)[:, None], order] = np.arange(size)
+
+    return np.stack((
+        (positions == 0).sum(axis=0),
+        (positions < top_places).sum(axis=0),
+        (positions >= size - relegation_places).sum(axis=0)
+    ))
+
+
+class SimulationService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.default_runs = config['simulation']['default_runs']
+        self.max_runs = config['simulation']['max_runs']
+        self.chunk_runs = config['simulation']['chunk_runs']
+        self.workers = config['simulation']['workers']
+        self.top_places = config['simulation']['top_places']
+        self.relegation_places = config['simulation']['relegation_places']
+        self.cache_size = config['simulation']['cache_size']
+        self.pool = None
+        # (league id, season, runs) -> (version, probabilities), the least recently used key is dropped first
+        self.cache = OrderedDict()
+        self.lock = Lock()
+
+    def get_pool(self):
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self.pool
+
+    def parse_runs(self, runs):
+        runs = self.default_runs if runs is None else int(runs)
+        if not 0 < runs <= self.max_runs:
+            raise ValueError(f'runs must be between 1 and {self.max_runs}')
+        return runs
+
+    def league_places(self, size):
+        """
+        Return the top places and the relegation places of a league of size teams - clamped so that not every team
+        is in the top places and the relegation places do not overlap them
+        """
+        top_places = min(self.top_places, max(size - 1, 0))
+        relegation_places = min(self.relegation_places, size - top_places, max(size - 1, 0))
+        return top_places, relegation_places
+
+    def find_cached(self, key, version):
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == version:
+            self.cache.move_to_end(key)
+            return cached[1]
+        return None
+
+    def add_cached(self, key, version, result):
+        self.cache[key] = (version, result)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def simulate(self, key, version, simulation, runs):
+        """
+        Run the simulation chunks on the process pool, the result is cached (see find_cached) until the season
+        has a new ended match or a corrected result (version)
+        """
+        size = len(simulation['team_names'])
+        top_places, relegation_places = self.league_places(size)
+        counts = np.zeros((3, size), dtype=np.int64)
+        if size:
+            chunks = [min(self.chunk_runs, runs - start) for start in range(0, runs, self.chunk_runs)]
+            seeds = np.random.SeedSequence().spawn(len(chunks))
+            loop = asyncio.get_event_loop()
+            pool = self.get_pool()
+            logger.debug(f'SimulationService/simulate - start | key: {key}, runs: {runs}, chunks: {len(chunks)}, '
+                         f'fixtures: {len(simulation["home"])}')
+            results = await asyncio.gather(*(loop.run_in_executor(pool, simulate_chunk, simulation, chunk, seed,
+                                                                  top_places, relegation_places)
+                                             for chunk, seed in zip(chunks, seeds)))
+            counts = np.sum(results, axis=0)
+
+        result = sorted(({
+            "team": name,
+            "points": int(simulation['points'][team]),
+            "title": float(counts[0, team]) / runs,
+            f"top_{top_places}": float(counts[1, team]) / runs,
+            "relegation": float(counts[2, team]) / runs
+        } for team, name in enumerate(simulation['team_names'])),
+            key=lambda row: (-row['title'], -row[f'top_{top_places}'], row['relegation'], row['team']))
+
+        self.add_cached(key, version, result)
+        return result
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+
+import time
+from threading import Lock
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.archiveProvider import archive_name, find_archived_seasons
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+"""
+The Archive Service routes the reads of an archived season to the archive collections. The archived seasons are
+cached and reloaded every refresh_interval seconds - the archive command waits that long before it deletes an
+archived season from the hot collections, so every worker reads the season from the archive by then.
+A read without a season (by id) falls back to the archive collection when it is not found in the hot one
+"""
+
+
+class ArchiveService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.refresh_interval = config['archive']['refresh_interval']
+        self.seasons = frozenset()
+        self.loaded_at = None
+        self.lock = Lock()
+
+    def load(self, db):
+        seasons = frozenset(int(season['_id']) for season in find_archived_seasons(db))
+        with self.lock:
+            self.seasons = seasons
+            self.loaded_at = time.monotonic()
+        logger.info(f'ArchiveService/load - archived seasons loaded | seasons: {sorted(seasons)}')
+        return seasons
+
+    def archived_seasons(self, db):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at >= self.refresh_interval:
+            return self.load(db)
+        return self.seasons
+
+    def is_archived(self, db, season):
+        return season is not None and int(season) in self.archived_seasons(db)
+
+    def collection(self, db, name, season=None):
+        """
+        Return the collection of a season - the archive collection when the season is archived
+        """
+        return db.client.FMT[archive_name(name) if self.is_archived(db, season) else name]
+
+    def collections_of_seasons(self, db, name, seasons):
+        """
+        Split the seasons by their collection, return (collection, seasons) of the collections with any of the seasons
+        """
+        archived_seasons = self.archived_seasons(db)
+        hot = [int(season) for season in seasons if int(season) not in archived_seasons]
+        archived = [int(season) for season in seasons if int(season) in archived_seasons]
+        return [(db.client.FMT[collection], collection_seasons)
+                for collection, collection_seasons in ((name, hot), (archive_name(name), archived))
+                if collection_seasons]
+
+    def collections(self, db, name):
+        """
+        Return the hot collection and the archive collection, when any season is archived
+        """
+        if self.archived_seasons(db):
+            return [db.client.FMT[name], db.client.FMT[archive_name(name)]]
+        return [db.client.FMT[name]]
+
+    def find_one(self, db, name, query, projection=None):
+        for collection in self.collections(db, name):
+            document = collection.find_one(query, projection)
+            if document is not None:
+                return document
+        return None
+
+    def find_by_ids(self, db, name, ids, projection=None):
+        """
+        Find documents by id in the hot collection and the ids that are not there in the archive collection
+        """
+        documents = []
+        missing_ids = list(ids)
+        for collection in self.collections(db, name):
+            if not missing_ids:
+                break
+            found = list(collection.find({'_id': {'$in': missing_ids}}, projection))
+            found_ids = {document['_id'] for document in found}
+            missing_ids = [_id for _id in missing_ids if _id not in found_ids]
+            documents += found
+        return documents
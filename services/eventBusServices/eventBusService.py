@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+
+import asyncio
+import json
+from threading import Lock
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+"""
+The Event Bus Service is an in-process publish / subscribe channel - the database service publishes the match results
+and the team updates of a season, and every subscriber (a websocket) gets them on its own bounded queue
+"""
+
+
+class Event:
+    __slots__ = ('type', 'teams', 'payload')
+
+    def __init__(self, event_type, teams, payload):
+        self.type = event_type
+        self.teams = teams
+        self.payload = payload
+
+
+class Subscription:
+    def __init__(self, topic, queue_size):
+        self.topic = topic
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def put(self, event):
+        # a slow subscriber loses its oldest events instead of slowing down the publisher
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def pop_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventBusService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.queue_size = config['event_bus']['queue_size']
+        self.subscriptions = {}
+        self.loop = None
+        self.lock = Lock()
+
+    def subscribe(self, topic):
+        subscription = Subscription(topic, self.queue_size)
+        with self.lock:
+            self.loop = asyncio.get_event_loop()
+            self.subscriptions.setdefault(topic, set()).add(subscription)
+        logger.debug(f'EventBusService/subscribe - subscribed | topic: {topic}, '
+                     f'subscribers: {len(self.subscriptions[topic])}')
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.topic, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.topic, None)
+        logger.debug(f'EventBusService/unsubscribe - unsubscribed | topic: {subscription.topic}')
+
+    def publish(self, topic, event, teams=()):
+        """
+        Serialize the event once and hand the same payload to every subscriber of the topic,
+        it is safe to publish from a thread that is not running the event loop
+        """
+        if topic not in self.subscriptions:
+            return 0
+        event = Event(event['type'], frozenset(teams), json.dumps(event, default=str))
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self.loop:
+            return self.dispatch(topic, event)
+        self.loop.call_soon_threadsafe(self.dispatch, topic, event)
+        return len(self.subscriptions.get(topic, ()))
+
+    def dispatch(self, topic, event):
+        subscriptions = list(self.subscriptions.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+        return len(subscriptions)
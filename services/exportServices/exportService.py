@@ -0,0 +1,104 @@
+#!/usr/bin/python3
+
+import csv
+import io
+import json
+import zlib
+
+from services.mongoDbService.matchProvider import parse_score, parse_match_from_db, ENDED_STATUS, LIVE_STATUS
+from services.ratingServices.ratingService import INITIAL_RATING
+
+# the uncompressed CSV bytes buffered before a compressed chunk is emitted
+CHUNK_SIZE = 64 * 1024
+
+TEAM_COLUMNS = ["team_id", "name", "season", "number_of_wins", "number_of_draws", "number_of_losses",
+                "number_of_scored_goals", "number_of_received_goals", "points", "goal_difference", "rating"]
+MATCH_COLUMNS = ["match_id", "home_team_id", "away_team_id", "home_goals", "away_goals", "date", "status"]
+FUTURE_STATUS = 'future'
+
+"""
+The Export Service writes a league season as gzip CSV - a teams table and a matches table where the team names
+are replaced by the team_id of the teams table (the index of the team in the league sorted by name).
+The rows are read from a cursor and compressed chunk by chunk, so the memory does not grow with the season size.
+The match history of a team is written the same way as NDJSON - a match object per line
+"""
+
+
+def team_dictionary(team_names):
+    return {name: team_id for team_id, name in enumerate(sorted(set(team_names)))}
+
+
+def gzip_csv(columns, rows, chunk_size=CHUNK_SIZE):
+    """
+    Yield the gzip compressed chunks of a CSV with the given header and rows
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if text.tell() >= chunk_size:
+            chunk = compressor.compress(text.getvalue().encode())
+            text.seek(0)
+            text.truncate()
+            if chunk:
+                yield chunk
+    yield compressor.compress(text.getvalue().encode()) + compressor.flush()
+
+
+def ndjson(documents, chunk_size=CHUNK_SIZE):
+    """
+    Yield the chunks of the documents as newline delimited JSON
+    """
+    text = io.StringIO()
+    for document in documents:
+        text.write(json.dumps(document, default=str))
+        text.write('\n')
+        if text.tell() >= chunk_size:
+            yield text.getvalue().encode()
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode()
+
+
+def team_rows(teams, team_ids):
+    for team in teams:
+        yield [team_ids[team['name']], team['name'], team['season'], team.get('number_of_wins', 0),
+               team.get('number_of_draws', 0), team.get('number_of_losses', 0),
+               team.get('number_of_scored_goals', 0), team.get('number_of_received_goals', 0),
+               team.get('points', 0), team.get('goal_difference', 0), team.get('rating', INITIAL_RATING)]
+
+
+def match_rows(matches, team_ids):
+    for match in matches:
+        if match.get('score') is not None:
+            home_goals, away_goals = parse_score(match['score'])
+            status = ENDED_STATUS
+        elif match.get('status') == LIVE_STATUS:
+            home_goals, away_goals = match.get('home_goals', 0), match.get('away_goals', 0)
+            status = LIVE_STATUS
+        else:
+            home_goals, away_goals = '', ''
+            status = FUTURE_STATUS
+        yield [str(match['_id']), team_ids[match['home_team']], team_ids[match['away_team']], home_goals, away_goals,
+               match['date'], status]
+
+
+def history_rows(matches, team_name):
+    for match in matches:
+        result = 'D' if match.get('is_draw') else 'W' if match.get('team_won') == team_name else 'L'
+        yield {**parse_match_from_db(match), "result": result}
+
+
+def export_teams(teams, team_ids):
+    return gzip_csv(TEAM_COLUMNS, team_rows(teams, team_ids))
+
+
+def export_matches(matches, team_ids):
+    return gzip_csv(MATCH_COLUMNS, match_rows(matches, team_ids))
+
+
+def export_team_history(matches, team_name):
+    return ndjson(history_rows(matches, team_name))
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+from datetime import datetime, timedelta
+
+"""
+The Fixture Service builds a double round robin schedule (the circle method) - every team plays every other team
+once in each half of the season, the second half repeats the first one with the venues swapped
+"""
+
+
+def round_robin(team_names):
+    """
+    Return the rounds of the first half of the season as (home team, away team) pairs. In round r the last team
+    plays team r and team r + i plays team r - i (modulo the other teams), the venues alternate with the round
+    for the last team and with i for the others - every team is at most one home match off the others
+    and never plays more than two matches in a row at home (or away) in a half
+    """
+    teams = sorted(set(team_names))
+    if len(teams) % 2:
+        # the team drawn against the bye rests that round
+        teams.append(None)
+    others = len(teams) - 1
+    fixed_team = teams[others]
+
+    rounds = []
+    for round_index in range(others):
+        pairs = [(teams[round_index], fixed_team) if round_index % 2 == 0 else (fixed_team, teams[round_index])]
+        for offset in range(1, len(teams) // 2):
+            home_team, away_team = teams[(round_index + offset) % others], teams[(round_index - offset) % others]
+            if offset % 2 == 0:
+                home_team, away_team = away_team, home_team
+            pairs.append((home_team, away_team))
+        rounds.append([(home_team, away_team) for home_team, away_team in pairs
+                       if home_team is not None and away_team is not None])
+    return rounds
+
+
+def double_round_robin(team_names):
+    first_half = round_robin(team_names)
+    return first_half + [[(away_team, home_team) for home_team, away_team in pairs] for pairs in first_half]
+
+
+def schedule_fixtures(team_names, start_date, days_between_rounds, break_days):
+    """
+    Return the fixtures of a double round robin, a round is played every `days_between_rounds` days
+    and the second half starts `break_days` days after the last round of the first half
+    """
+    rounds = double_round_robin(team_names)
+    first_half_rounds = len(rounds) // 2
+    date = datetime.strptime(start_date, '%Y-%m-%d')
+    fixtures = []
+    for matchday, pairs in enumerate(rounds, start=1):
+        for home_team, away_team in pairs:
+            fixtures.append({
+                "home_team": home_team,
+                "away_team": away_team,
+                "date": date.strftime('%Y-%m-%d'),
+                "matchday": matchday
+            })
+        date += timedelta(days=break_days if matchday == first_half_rounds else days_between_rounds)
+    return fixtures
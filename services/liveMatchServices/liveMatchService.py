@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+
+import asyncio
+from threading import Lock
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.matchProvider import LIVE_STATUS
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+"""
+The Live Match Service buffers the goals of the in-progress matches in memory and writes them to the matches
+collection every flush interval - all the goals of a match between two flushes become a single $inc.
+The goals of a match that was finalized meanwhile (by any worker) are rejected, and the match is forgotten,
+so its next goal is refused
+"""
+
+
+class LiveMatchService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.flush_interval = config['live_match']['flush_interval']
+        self.live_matches = {}
+        self.pending = {}
+        self.lock = Lock()
+
+    def find_live_match(self, db, match_id):
+        """
+        Return the teams of a live match, the match is read from the DB only the first time
+        """
+        teams = self.live_matches.get(match_id)
+        if teams is None:
+            _match = db.find_match({'_id': match_id})
+            if _match.get('status') != LIVE_STATUS:
+                raise Exception('The match is not live')
+            teams = (_match['home_team'], _match['away_team'])
+            self.live_matches[match_id] = teams
+        return teams
+
+    def add_goal(self, db, match_id, team):
+        home_team, away_team = self.find_live_match(db, match_id)
+        if team not in (home_team, away_team):
+            raise ValueError(f'team must be {home_team} or {away_team}')
+        with self.lock:
+            goals = self.pending.setdefault(match_id, [0, 0])
+            goals[0 if team == home_team else 1] += 1
+            return tuple(goals)
+
+    def take_pending(self, match_ids=None):
+        with self.lock:
+            if match_ids is None:
+                pending, self.pending = self.pending, {}
+            else:
+                pending = {match_id: self.pending.pop(match_id) for match_id in match_ids if match_id in self.pending}
+        return pending
+
+    def restore_pending(self, pending):
+        with self.lock:
+            for match_id, (home_goals, away_goals) in pending.items():
+                goals = self.pending.setdefault(match_id, [0, 0])
+                goals[0] += home_goals
+                goals[1] += away_goals
+
+    def flush(self, db, match_ids=None):
+        pending = self.take_pending(match_ids)
+        if not pending:
+            return 0
+        try:
+            modified, finished = db.update_live_scores(pending)
+        except Exception as error:
+            # keep the goals for the next flush instead of losing them
+            logger.error(f'LiveMatchService/flush failed - goals kept for the next flush | error: {error}')
+            self.restore_pending(pending)
+            raise
+        for match_id in finished:
+            logger.warning(f'LiveMatchService/flush - goals of a finalized match rejected | match id: {match_id}, '
+                           f'goals: {pending[match_id]}')
+            self.forget(match_id)
+        return modified
+
+    def forget(self, match_id):
+        self.live_matches.pop(match_id, None)
+
+    async def run_flusher(self, db):
+        logger.info(f'LiveMatchService/run_flusher - start | flush interval: {self.flush_interval}')
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self.flush, db)
+            except Exception as error:
+                logger.error(f'LiveMatchService/run_flusher - flush failed | error: {error}')
@@ -0,0 +1,128 @@
+#!/usr/bin/python3
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MONGO_DB_SERVICE_FILE = os.path.join('mongoDbService', 'mongoDbService.py')
+LOGGING_DIRECTORY = f'{os.sep}logging{os.sep}'
+
+"""
+The Loop Monitor Service measures the event loop lag - a task that sleeps `interval` seconds records how late it
+woke up. A watchdog thread checks the task heartbeat, when the loop did not run for longer than the blocking
+threshold it captures the stack of the loop thread and finds the MongoDbService method or the logger call
+that blocks it
+"""
+
+
+def find_blocking_call(stack):
+    """
+    Return the MongoDbService method or the logger call of the stack (the outermost frame is first),
+    otherwise the innermost frame of the project
+    """
+    for frame in stack:
+        if frame.filename.endswith(MONGO_DB_SERVICE_FILE):
+            return f'MongoDbService.{frame.name}'
+    for caller, frame in zip(stack, stack[1:]):
+        if LOGGING_DIRECTORY in frame.filename and LOGGING_DIRECTORY not in caller.filename:
+            return f'logger.{frame.name} at {os.path.relpath(caller.filename, PROJECT_DIRECTORY)}:{caller.lineno}'
+    for frame in reversed(stack):
+        if frame.filename.startswith(PROJECT_DIRECTORY):
+            return f'{os.path.relpath(frame.filename, PROJECT_DIRECTORY)}:{frame.lineno} ({frame.name})'
+    return f'{stack[-1].filename}:{stack[-1].lineno} ({stack[-1].name})' if stack else 'unknown'
+
+
+class LoopMonitorService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.interval = config['loop_monitor']['interval']
+        self.blocking_threshold = config['loop_monitor']['blocking_threshold']
+        self.lags = deque(maxlen=config['loop_monitor']['window'])
+        self.blocking_events = deque(maxlen=config['loop_monitor']['max_blocking_events'])
+        self.blocked_count = 0
+        self.max_lag = 0.0
+        self.last_tick = None
+        self.loop_thread_id = None
+        self.watchdog = None
+        self.lock = threading.Lock()
+
+    def start(self, app):
+        self.loop_thread_id = threading.get_ident()
+        self.last_tick = time.monotonic()
+        app.add_task(self.run())
+        if self.watchdog is None:
+            self.watchdog = threading.Thread(target=self.watch, name='loop-monitor-watchdog', daemon=True)
+            self.watchdog.start()
+        logger.info(f'LoopMonitorService/start - interval: {self.interval}, '
+                    f'blocking threshold: {self.blocking_threshold}')
+
+    async def run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            with self.lock:
+                self.last_tick = now
+                self.lags.append(lag)
+                self.max_lag = max(self.max_lag, lag)
+
+    def watch(self):
+        event = None
+        while True:
+            time.sleep(self.blocking_threshold / 4)
+            blocked_for = time.monotonic() - self.last_tick - self.interval
+            if blocked_for < self.blocking_threshold:
+                if event is not None:
+                    logger.warning(f'LoopMonitorService/watch - the event loop was blocked | '
+                                   f'blocked for: {event["blocked_for"]:.3f}s, call: {event["call"]}')
+                event = None
+                continue
+
+            if event is None:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                if frame is None:
+                    continue
+                stack = traceback.extract_stack(frame)
+                event = {
+                    "detected_at": time.time(),
+                    "blocked_for": round(blocked_for, 3),
+                    "call": find_blocking_call(stack),
+                    "stack": [f'{os.path.relpath(frame.filename, PROJECT_DIRECTORY)}:{frame.lineno} ({frame.name})'
+                              for frame in stack if frame.filename.startswith(PROJECT_DIRECTORY)]
+                }
+                with self.lock:
+                    self.blocked_count += 1
+                    self.blocking_events.append(event)
+            else:
+                event["blocked_for"] = round(blocked_for, 3)
+
+    def metrics(self):
+        with self.lock:
+            lags = sorted(self.lags)
+            events = list(self.blocking_events)[-10:]
+            blocked_count = self.blocked_count
+            max_lag = self.max_lag
+
+        def percentile(value):
+            return round(lags[min(int(value * len(lags)), len(lags) - 1)] * 1000, 3) if lags else 0.0
+
+        return {
+            "lag_ms": round(self.lags[-1] * 1000, 3) if self.lags else 0.0,
+            "lag_p50_ms": percentile(0.5),
+            "lag_p99_ms": percentile(0.99),
+            "lag_max_ms": round(max_lag * 1000, 3),
+            "blocked_count": blocked_count,
+            "recent_blocking_calls": events
+        }
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+from datetime import datetime
+
+from pymongo import ReplaceOne
+
+from services.loggerServices.loggerService import LoggerService
+
+logger = LoggerService().logger
+ARCHIVE_SUFFIX = '_archive'
+# the collections a season is archived from
+ARCHIVED_COLLECTIONS = ('matches', 'teams')
+
+"""
+An archived season is copied to the compressed archive collections (matches_archive and teams_archive) and recorded
+in archived_seasons, then deleted from the hot collections - see ArchiveService for the read routing
+"""
+
+
+def archive_name(collection):
+    return f'{collection}{ARCHIVE_SUFFIX}'
+
+
+def season_query(collection, season):
+    # the season of a team is a number or a string (teams created by the results before)
+    if collection == 'teams':
+        return {'season': {'$in': [int(season), str(int(season))]}}
+    return {'season': int(season)}
+
+
+def find_archived_seasons(self):
+    return self.client.FMT["archived_seasons"].find({}, {'_id': 1})
+
+
+def count_unended_matches_of_season(self, season):
+    return self.client.FMT["matches"].count_documents({'season': int(season), 'score': {'$exists': False}})
+
+
+def copy_season_to_archive(self, collection, season, batch_size=1000):
+    """
+    Copy the season documents to the archive collection in batches of upserts by id, so a copy stopped in the
+    middle is completed by running it again. Return the number of documents of the season in the archive
+    """
+    archive = self.client.FMT[archive_name(collection)]
+    operations = []
+    for document in self.client.FMT[collection].find(season_query(collection, season), batch_size=batch_size):
+        operations.append(ReplaceOne({'_id': document['_id']}, document, upsert=True))
+        if len(operations) >= batch_size:
+            archive.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        archive.bulk_write(operations, ordered=False)
+    return archive.count_documents(season_query(collection, season))
+
+
+def count_season_documents(self, collection, season):
+    return self.client.FMT[collection].count_documents(season_query(collection, season))
+
+
+def mark_season_archived(self, season, counts):
+    return self.client.FMT["archived_seasons"].update_one(
+        {'_id': int(season)}, {'$set': {**counts, 'archived_at': datetime.utcnow()}}, upsert=True)
+
+
+def delete_season(self, collection, season):
+    return self.client.FMT[collection].delete_many(season_query(collection, season)).deleted_count
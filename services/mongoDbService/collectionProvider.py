@@ -1,10 +1,35 @@
 #!/usr/bin/python3
+from datetime import datetime
+
 import pymongo
 
+from pymongo import UpdateOne
+
+from services.configServices.configService import ConfigService
 from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.matchProvider import (find_matches_without_team_ids, bulk_update_matches,
+                                                   encode_match, find_ended_matches_without_result_id,
+                                                   find_matches_with_string_dates, find_matches_by_ids, parse_date,
+                                                   parse_score, TEAM_FIELDS)
+from services.mongoDbService.teamProvider import (find_teams_without_points, find_teams_without_recent_form,
+                                                  bulk_update_teams, recent_form_entry, RECENT_FORM_SIZE,
+                                                  LEADERBOARD_METRICS)
+from services.ratingServices.ratingService import INITIAL_RATING
 
+config = ConfigService().config
 logger = LoggerService().logger
-COLLECTIONS_NAMES = ['leagues', 'teams', 'matches']
+COLLECTIONS_NAMES = ['leagues', 'teams', 'matches', 'team_registry', 'counters', 'standings_snapshots',
+                     'archived_seasons', 'matches_archive', 'teams_archive', 'migrations']
+# the archive collections are rarely read, their blocks are compressed harder than the hot collections
+COLLECTIONS_OPTIONS = {
+    collection: {'storageEngine': {'wiredTiger': {
+        'configString': f'block_compressor={config["archive"]["block_compressor"]}'}}}
+    for collection in ('matches_archive', 'teams_archive')
+}
+# indexes replaced by newer ones - the matches are unique by the team ids instead of the team names
+LEGACY_INDEXES = {
+    'matches': ['home_team_1_away_team_1_date_1']
+}
 
 """
 The Collection Provider add to the MongoDB all the collections and index them
@@ -16,11 +41,19 @@ def create_collections(self):
     for collection in COLLECTIONS_NAMES:
         if collection not in existing_collection:
             create_collection(self, collection)
+        else:
+            drop_legacy_indexes(self, collection)
+    # the migrations run before the indexes of the existing collections, a new unique index may need migrated fields
+    migrate_collections(self)
+    for collection in COLLECTIONS_NAMES:
+        if collection in existing_collection:
+            # make sure indexes added after the collection was created exist as well
+            index_collections(self, collection)
 
 
 def create_collection(self, collection):
     try:
-        self.client.FMT.create_collection(collection)
+        self.client.FMT.create_collection(collection, **COLLECTIONS_OPTIONS.get(collection, {}))
         index_collections(self, collection)
         logger.info(f'MongoDbService/create_collection - collection "{collection}" created successfully')
     except Exception as error:
@@ -34,6 +67,8 @@ def create_index_leagues(self):
     self.client.FMT.leagues.create_index(
         [("name", pymongo.ASCENDING), ("season", pymongo.ASCENDING)],
         unique=True)
+    # the leagues of a team, a recorded result updates the standings snapshots of the leagues of its teams
+    self.client.FMT.leagues.create_index([("teams", pymongo.ASCENDING)])
     return True
 
 
@@ -41,13 +76,62 @@ def create_index_teams(self):
     self.client.FMT.teams.create_index(
         [("name", pymongo.ASCENDING), ("season", pymongo.ASCENDING)],
         unique=True)
+    # the ratings and the leaderboards sort by a metric and break ties by the team name
+    for field in LEADERBOARD_METRICS.values():
+        self.client.FMT.teams.create_index(
+            [("season", pymongo.ASCENDING), (field, pymongo.DESCENDING), ("name", pymongo.ASCENDING)])
     return True
 
 
 def create_index_matches(self):
     self.client.FMT.matches.create_index(
-        [("home_team", pymongo.ASCENDING), ("away_team", pymongo.ASCENDING), ("date", pymongo.ASCENDING)],
+        [("home_team_id", pymongo.ASCENDING), ("away_team_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)],
+        unique=True)
+    self.client.FMT.matches.create_index(
+        [("teams_pair", pymongo.ASCENDING), ("date", pymongo.DESCENDING)])
+    self.client.FMT.matches.create_index(
+        [("result_id", pymongo.ASCENDING)], sparse=True)
+    # the season queries and the date range queries - of all the matches or of one team
+    self.client.FMT.matches.create_index(
+        [("season", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+    self.client.FMT.matches.create_index(
+        [("home_team_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+    self.client.FMT.matches.create_index(
+        [("away_team_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+    return True
+
+
+def create_index_team_registry(self):
+    self.client.FMT.team_registry.create_index([("name", pymongo.ASCENDING)], unique=True)
+    return True
+
+
+def create_index_standings_snapshots(self):
+    self.client.FMT.standings_snapshots.create_index(
+        [("league_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)],
+        unique=True)
+    return True
+
+
+def create_index_matches_archive(self):
+    # only the indexes of the season reads, the head to head and the team date ranges - nothing is written here
+    self.client.FMT.matches_archive.create_index(
+        [("season", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+    self.client.FMT.matches_archive.create_index(
+        [("teams_pair", pymongo.ASCENDING), ("date", pymongo.DESCENDING)])
+    self.client.FMT.matches_archive.create_index(
+        [("home_team_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+    self.client.FMT.matches_archive.create_index(
+        [("away_team_id", pymongo.ASCENDING), ("date", pymongo.ASCENDING)])
+    return True
+
+
+def create_index_teams_archive(self):
+    self.client.FMT.teams_archive.create_index(
+        [("name", pymongo.ASCENDING), ("season", pymongo.ASCENDING)],
         unique=True)
+    self.client.FMT.teams_archive.create_index(
+        [("season", pymongo.ASCENDING), ("name", pymongo.ASCENDING)])
     return True
 
 
@@ -58,5 +142,172 @@ def index_collections(self, collection):
         create_index_teams(self)
     elif collection == 'matches':
         create_index_matches(self)
+    elif collection == 'team_registry':
+        create_index_team_registry(self)
+    elif collection == 'counters':
+        pass
+    elif collection == 'standings_snapshots':
+        create_index_standings_snapshots(self)
+    elif collection == 'archived_seasons':
+        pass
+    elif collection == 'migrations':
+        pass
+    elif collection == 'matches_archive':
+        create_index_matches_archive(self)
+    elif collection == 'teams_archive':
+        create_index_teams_archive(self)
     else:
         raise Exception("Invalid Collection")
+
+
+def drop_legacy_indexes(self, collection):
+    existing_indexes = self.client.FMT[collection].index_information()
+    for index in LEGACY_INDEXES.get(collection, []):
+        if index in existing_indexes:
+            self.client.FMT[collection].drop_index(index)
+            logger.info(f'MongoDbService/drop_legacy_indexes - index "{index}" of "{collection}" dropped')
+
+
+def migrate_team_ratings(self, batch_size=1000):
+    # teams created before the ratings were added start from the initial rating
+    result = self.client.FMT.teams.update_many({'rating': {'$exists': False}}, {'$set': {'rating': INITIAL_RATING}})
+    if result.modified_count:
+        logger.info(f'MongoDbService/migrate_team_ratings - teams rating initialized | teams: {result.modified_count}')
+    return result.modified_count
+
+
+def migrate_team_points(self, batch_size=1000):
+    # teams created before the leaderboards get their points and goal difference
+    operations = []
+    migrated = 0
+    for team in find_teams_without_points(self, batch_size):
+        operations.append(UpdateOne({'_id': team['_id']}, {'$set': {
+            'points': 3 * team.get('number_of_wins', 0) + team.get('number_of_draws', 0),
+            'goal_difference': team.get('number_of_scored_goals', 0) - team.get('number_of_received_goals', 0)
+        }}))
+        if len(operations) >= batch_size:
+            migrated += bulk_update_teams(self, operations).modified_count
+            operations = []
+    if operations:
+        migrated += bulk_update_teams(self, operations).modified_count
+    if migrated:
+        logger.info(f'MongoDbService/migrate_team_points - teams points added | teams: {migrated}')
+    return migrated
+
+
+def migrate_match_team_ids(self, batch_size=1000):
+    # matches created before the team registry replace the team names with the team ids (and the teams pair key)
+    operations = []
+    migrated = 0
+    for match in find_matches_without_team_ids(self, batch_size):
+        names = {field: match[field] for field in TEAM_FIELDS if match.get(field) is not None}
+        operations.append(UpdateOne({'_id': match['_id']}, {
+            '$set': encode_match(self, names, create=True),
+            '$unset': {field: '' for field in TEAM_FIELDS}
+        }))
+        if len(operations) >= batch_size:
+            migrated += bulk_update_matches(self, operations).modified_count
+            operations = []
+    if operations:
+        migrated += bulk_update_matches(self, operations).modified_count
+    if migrated:
+        logger.info(f'MongoDbService/migrate_match_team_ids - matches team names replaced by team ids | '
+                    f'matches: {migrated}')
+    return migrated
+
+
+def migrate_match_dates(self, batch_size=1000):
+    # matches created before the native dates store the date as a date and get their season
+    operations = []
+    migrated = 0
+    for match in find_matches_with_string_dates(self, batch_size):
+        try:
+            date = parse_date(match['date'])
+        except ValueError:
+            logger.warning(f'MongoDbService/migrate_match_dates - invalid match date | id: {match["_id"]}, '
+                           f'date: {match["date"]}')
+            continue
+        operations.append(UpdateOne({'_id': match['_id']}, {'$set': {'date': date, 'season': date.year}}))
+        if len(operations) >= batch_size:
+            migrated += bulk_update_matches(self, operations).modified_count
+            operations = []
+    if operations:
+        migrated += bulk_update_matches(self, operations).modified_count
+    if migrated:
+        logger.info(f'MongoDbService/migrate_match_dates - matches dates converted | matches: {migrated}')
+    return migrated
+
+
+def migrate_match_result_ids(self, batch_size=1000):
+    # ended matches recorded before the result id use their own id
+    operations = []
+    migrated = 0
+    for match in find_ended_matches_without_result_id(self, batch_size):
+        operations.append(UpdateOne({'_id': match['_id']}, {'$set': {'result_id': match['_id']}}))
+        if len(operations) >= batch_size:
+            migrated += bulk_update_matches(self, operations).modified_count
+            operations = []
+    if operations:
+        migrated += bulk_update_matches(self, operations).modified_count
+    if migrated:
+        logger.info(f'MongoDbService/migrate_match_result_ids - matches result id added | matches: {migrated}')
+    return migrated
+
+
+def migrate_recent_form(self, batch_size=1000):
+    # teams created before the recent form get the last results of their matches arrays (after the matches migration)
+    operations = []
+    migrated = 0
+    for team in find_teams_without_recent_form(self, batch_size):
+        results = {match_id: result for result, field in (('W', 'matches_wins'), ('L', 'matches_loss'),
+                                                           ('D', 'matches_draw'))
+                   for match_id in team.get(field, [])}
+        recent_form = []
+        for match in find_matches_by_ids(self, list(results), ['home_team', 'away_team', 'score', 'date']):
+            home_goals, away_goals = parse_score(match['score'])
+            if match['home_team'] == team['name']:
+                entry = recent_form_entry(results[match['_id']], home_goals, away_goals, match['away_team'],
+                                          match['date'])
+            else:
+                entry = recent_form_entry(results[match['_id']], away_goals, home_goals, match['home_team'],
+                                          match['date'])
+            recent_form.append(entry)
+        recent_form.sort(key=lambda entry: entry['date'])
+        operations.append(UpdateOne({'_id': team['_id']}, {'$set': {'recent_form': recent_form[-RECENT_FORM_SIZE:]}}))
+        if len(operations) >= batch_size:
+            migrated += bulk_update_teams(self, operations).modified_count
+            operations = []
+    if operations:
+        migrated += bulk_update_teams(self, operations).modified_count
+    if migrated:
+        logger.info(f'MongoDbService/migrate_recent_form - teams recent form added | teams: {migrated}')
+    return migrated
+
+
+# the data migrations in the order they run - a new migration is added at the end with a new name
+MIGRATIONS = [
+    ('team_ratings', migrate_team_ratings),
+    ('team_points', migrate_team_points),
+    ('match_team_ids', migrate_match_team_ids),
+    ('match_dates', migrate_match_dates),
+    ('match_result_ids', migrate_match_result_ids),
+    ('team_recent_form', migrate_recent_form)
+]
+
+
+def migrate_collections(self):
+    """
+    Run the migrations that are not recorded in the migrations collection yet and record them - the migrations scan
+    whole collections, so every later start skips them. A migration is safe to run again (it only updates
+    the documents it has not migrated), two workers that start together may both run it
+    """
+    applied = {migration['_id'] for migration in self.client.FMT.migrations.find({}, {'_id': 1})}
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        migrated = migrate(self)
+        self.client.FMT.migrations.update_one({'_id': name}, {'$setOnInsert': {
+            'applied_at': datetime.utcnow(), 'documents': migrated}}, upsert=True)
+        logger.info(f'MongoDbService/migrate_collections - migration applied | migration: {name}, '
+                    f'documents: {migrated}')
+    return True
@@ -12,6 +12,36 @@ def find_league(self, data):
     return self.client.FMT["leagues"].find_one(data)
 
 
+def find_leagues_by_ids(self, league_ids, projection=None):
+    return self.client.FMT["leagues"].find({'_id': {'$in': league_ids}}, projection)
+
+
+def find_leagues_with_team_names(self, names, seasons):
+    """
+    Find the leagues of every name and season with their team names - one aggregation instead of
+    a team query per league
+    """
+    seasons = [value for season in seasons for value in (int(season), str(int(season)))]
+    return self.client.FMT["leagues"].aggregate([
+        {'$match': {'name': {'$in': names}, 'season': {'$in': seasons}}},
+        {'$lookup': {'from': 'teams', 'localField': 'teams', 'foreignField': '_id', 'as': 'teams'}},
+        {'$project': {'name': 1, 'season': 1, 'team_names': '$teams.name'}}
+    ])
+
+
+def find_leagues_of_season(self, season):
+    return self.client.FMT["leagues"].find({'season': {'$in': [int(season), str(int(season))]}}, {'teams': 1})
+
+
+def find_leagues_of_teams(self, home_team_ids, away_team_ids, season):
+    """
+    Find the leagues with both teams - a team may have a document per season type (number or string)
+    """
+    query = {'$and': [{'teams': {'$in': home_team_ids}}, {'teams': {'$in': away_team_ids}}],
+             'season': {'$in': [int(season), str(int(season))]}}
+    return self.client.FMT["leagues"].find(query, {'_id': 1})
+
+
 def add_team_to_league(self, league_id, team_id):
     return self.client.FMT["leagues"].update_one({'_id': league_id}, {'$push': {'teams': team_id}})
 
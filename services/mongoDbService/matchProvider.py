@@ -1,19 +1,379 @@
 #!/usr/bin/python3
+from datetime import datetime
+from heapq import merge
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from services.archiveServices.archiveService import ArchiveService
 from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.archiveProvider import archive_name
+from services.teamRegistryServices.teamRegistryService import TeamRegistryService
 
 logger = LoggerService().logger
+registry = TeamRegistryService()
+archive = ArchiveService()
+LIVE_STATUS = 'live'
+ENDED_STATUS = 'ended'
+# the team name fields of a match -> the team id fields stored in the matches collection
+TEAM_FIELDS = {
+    "home_team": "home_team_id",
+    "away_team": "away_team_id",
+    "team_won": "team_won_id",
+    "team_lost": "team_lost_id"
+}
+TEAMS_PROJECTION = {'home_team_id': 1, 'away_team_id': 1}
+DUPLICATE_KEY_CODE = 11000
+DATE_FORMAT = '%Y-%m-%d'
+# the result fields of a win that a draw does not have
+WIN_FIELDS = ('team_won_id', 'team_lost_id', 'team_lose_score')
+RESULT_CORRECTIONS_COUNTER = 'result_corrections'
+
+"""
+The matches refer to the teams by their registry id (see TeamRegistryService) and store the date as a native date
+with the season (the year of the date), the providers take and return team names and YYYY-MM-DD dates -
+encode_match and decode_match translate between the two. The season reads are routed to matches_archive
+for an archived season (see ArchiveService)
+"""
+
+
+def parse_date(date):
+    """
+    Parse a YYYY-MM-DD date, the only date format of the routes
+    """
+    try:
+        parsed_date = datetime.strptime(date, DATE_FORMAT)
+    except (TypeError, ValueError):
+        parsed_date = None
+    if parsed_date is None or parsed_date.strftime(DATE_FORMAT) != date:
+        raise ValueError('Date must be in the format: YYYY-MM-DD')
+    return parsed_date
+
+
+def format_date(date):
+    return date.strftime(DATE_FORMAT) if isinstance(date, datetime) else date
+
+
+def encode_match(self, data, create=False):
+    """
+    Replace the team names of a match (or a match query) with the team ids and the date with a native date,
+    a new team name is registered when create is set. A stored match also gets its season
+    and the teams pair key of the head to head index
+    """
+    encoded = {}
+    for field, value in data.items():
+        if field in TEAM_FIELDS:
+            encoded[TEAM_FIELDS[field]] = None if value is None else registry.team_id(self, value, create)
+        elif field == 'date' and isinstance(value, str):
+            encoded[field] = parse_date(value)
+        else:
+            encoded[field] = value
+    if create and encoded.get('home_team_id') is not None and encoded.get('away_team_id') is not None:
+        encoded['teams_pair'] = teams_pair_key(encoded['home_team_id'], encoded['away_team_id'])
+    if create and isinstance(encoded.get('date'), datetime):
+        encoded['season'] = encoded['date'].year
+    return encoded
+
+
+def decode_match(self, match):
+    if match is None:
+        return None
+    decoded = {}
+    for field, value in match.items():
+        if field.endswith('_id') and field[:-3] in TEAM_FIELDS:
+            decoded[field[:-3]] = None if value is None else registry.team_name(self, value)
+        elif field == 'date':
+            decoded[field] = format_date(value)
+        elif field not in ('teams_pair', 'season'):
+            decoded[field] = value
+    return decoded
+
+
+def decode_matches(self, matches):
+    for match in matches:
+        yield decode_match(self, match)
+
+
+def encode_team_names(self, team_names):
+    return [team_id for team_id in (registry.team_id(self, name) for name in team_names) if team_id is not None]
 
 
 def create_match(self, data):
-    return self.client.FMT["matches"].insert_one(data).inserted_id
+    return self.client.FMT["matches"].insert_one(encode_match(self, data, create=True)).inserted_id
+
+
+def create_matches(self, matches):
+    """
+    Insert the matches in one unordered insert_many - a match that breaks the unique index is skipped and the rest
+    are inserted. Return the number of inserted matches and the (index, match) of every conflict
+    """
+    try:
+        inserted = len(self.client.FMT["matches"].insert_many(
+            [encode_match(self, match, create=True) for match in matches], ordered=False).inserted_ids)
+    except BulkWriteError as error:
+        duplicates = [write_error['index'] for write_error in error.details['writeErrors']
+                      if write_error['code'] == DUPLICATE_KEY_CODE]
+        if len(duplicates) < len(error.details['writeErrors']):
+            raise
+        return error.details['nInserted'], [(index, matches[index]) for index in duplicates]
+    return inserted, []
 
 
 def update_match(self, data):
-    return self.client.FMT["matches"].update_one(data, upsert=True).inserted_id
+    return self.client.FMT["matches"].update_one(encode_match(self, data), upsert=True).inserted_id
 
 
 def find_match(self, data):
-    return self.client.FMT["matches"].find_one(data)
+    query = encode_match(self, data)
+    if isinstance(query.get('date'), datetime):
+        return decode_match(self, archive.collection(self, "matches", query['date'].year).find_one(query))
+    return decode_match(self, archive.find_one(self, "matches", query))
+
+
+def find_matches_by_ids(self, match_ids, fields=None):
+    projection = None if fields is None else {TEAM_FIELDS.get(field, field): 1 for field in fields}
+    return decode_matches(self, archive.find_by_ids(self, "matches", match_ids, projection))
+
+
+def finish_live_match(self, match_id, data, home_goals, away_goals):
+    """
+    End a live match, only if its goals are still home_goals and away_goals - a goal written meanwhile matches nothing
+    """
+    return self.client.FMT["matches"].update_one(
+        {'_id': match_id, 'status': LIVE_STATUS, 'home_goals': home_goals, 'away_goals': away_goals},
+        {'$set': encode_match(self, data, create=True)})
+
+
+def find_finished_matches(self, match_ids):
+    """
+    Return the ids of the matches that are not live anymore
+    """
+    return [match['_id'] for match in self.client.FMT["matches"].find(
+        {'_id': {'$in': list(match_ids)}, 'status': {'$ne': LIVE_STATUS}}, {'_id': 1})]
+
+
+def correct_match_result(self, match_id, old_score, data):
+    """
+    Replace the result of an ended match, only if it is still old_score - a concurrent correction matches nothing
+    """
+    encoded = encode_match(self, data, create=True)
+    update = {'$set': encoded}
+    if data['is_draw']:
+        update['$unset'] = dict.fromkeys(WIN_FIELDS, '')
+    return self.client.FMT["matches"].update_one({'_id': match_id, 'score': old_score}, update)
+
+
+def restore_match(self, match_id, score, match):
+    """
+    Put back a match replaced by correct_match_result, only if it still has the corrected score
+    """
+    return self.client.FMT["matches"].replace_one(
+        {'_id': match_id, 'score': score},
+        encode_match(self, {field: value for field, value in match.items() if field != '_id'}, create=True))
+
+
+def count_result_correction(self, season):
+    return self.client.FMT["counters"].update_one({'_id': f'{RESULT_CORRECTIONS_COUNTER}_{int(season)}'},
+                                                  {'$inc': {'sequence': 1}}, upsert=True)
+
+
+def find_result_corrections(self, season):
+    """
+    Return the number of corrected results of the season - the season arrays of AnalyticsService are reloaded
+    when it changes
+    """
+    counter = self.client.FMT["counters"].find_one({'_id': f'{RESULT_CORRECTIONS_COUNTER}_{int(season)}'})
+    return counter['sequence'] if counter is not None else 0
+
+
+def find_ended_matches_of_season(self, season, after_id=None):
+    query = {'season': int(season), 'score': {'$exists': True}}
+    if after_id is not None:
+        query['result_id'] = {'$gt': after_id}
+    matches = archive.collection(self, "matches", season)
+    return decode_matches(self, matches.find(query, {**TEAMS_PROJECTION, 'score': 1, 'date': 1,
+                                                     'result_id': 1}).sort('result_id', 1))
+
+
+def stream_ended_matches_of_season(self, season, batch_size=1000):
+    query = {'season': int(season), 'score': {'$exists': True}}
+    matches = archive.collection(self, "matches", season)
+    return decode_matches(self, matches.find(query, {**TEAMS_PROJECTION, 'score': 1, 'date': 1},
+                                             batch_size=batch_size).sort([('date', 1), ('_id', 1)]))
+
+
+def bulk_update_matches(self, operations):
+    return self.client.FMT["matches"].bulk_write(operations, ordered=False)
+
+
+def stream_matches_of_season(self, season, team_names, batch_size=1000):
+    team_ids = encode_team_names(self, team_names)
+    query = {'season': int(season), 'home_team_id': {'$in': team_ids}, 'away_team_id': {'$in': team_ids}}
+    matches = archive.collection(self, "matches", season)
+    return decode_matches(self, matches.find(query, {**TEAMS_PROJECTION, 'score': 1, 'date': 1, 'status': 1,
+                                                     'home_goals': 1, 'away_goals': 1},
+                                             batch_size=batch_size).sort([('date', 1), ('_id', 1)]))
+
+
+def find_match_seasons(self):
+    return self.client.FMT["matches"].aggregate([
+        {'$match': {'score': {'$exists': True}}},
+        {'$group': {'_id': '$season'}}
+    ])
+
+
+def find_future_matches_of_season(self, season):
+    query = {'season': int(season), 'score': {'$exists': False}}
+    matches = archive.collection(self, "matches", season)
+    # a live match is returned with its running score
+    return decode_matches(self, matches.find(query, {**TEAMS_PROJECTION, 'date': 1, 'status': 1, 'home_goals': 1,
+                                                     'away_goals': 1}))
+
+
+def find_matches_by_date_range(self, from_date, to_date, team_name=None):
+    """
+    Find the matches played from from_date to to_date (including both) sorted by date - the query is bounded by
+    the seasons of the range (the season & date index), or by the team (the team & date indexes).
+    A range over hot and archived seasons merges the sorted results of both collections
+    """
+    date_range = {'$gte': parse_date(from_date), '$lte': parse_date(to_date)}
+    seasons = range(date_range['$gte'].year, date_range['$lte'].year + 1)
+    team_id = None
+    if team_name is not None:
+        team_id = registry.team_id(self, team_name)
+        if team_id is None:
+            return iter(())
+
+    cursors = []
+    for matches, collection_seasons in archive.collections_of_seasons(self, "matches", seasons):
+        query = {'season': {'$in': collection_seasons}, 'date': date_range}
+        if team_id is not None:
+            query = {'$or': [{'home_team_id': team_id, 'date': date_range},
+                             {'away_team_id': team_id, 'date': date_range}],
+                     'season': {'$in': collection_seasons}}
+        cursors.append(matches.find(query).sort([('date', 1), ('_id', 1)]))
+    if len(cursors) == 1:
+        return decode_matches(self, cursors[0])
+    return decode_matches(self, merge(*cursors, key=lambda match: (match['date'], match['_id'])))
+
+
+def stream_team_matches(self, team_name, season=None, batch_size=1000):
+    """
+    Stream the ended matches of a team sorted by date - of every season, or of one season. The seasons of the archive
+    are merged in, a cursor per collection on the team & date indexes
+    """
+    team_id = registry.team_id(self, team_name)
+    if team_id is None:
+        return iter(())
+    query = {'$or': [{'home_team_id': team_id}, {'away_team_id': team_id}], 'score': {'$exists': True}}
+    if season is not None:
+        collections = [(archive.collection(self, "matches", season), {'season': int(season)})]
+    else:
+        archived_seasons = sorted(archive.archived_seasons(self))
+        collections = [(self.client.FMT["matches"], {'season': {'$nin': archived_seasons}} if archived_seasons else {})]
+        if archived_seasons:
+            collections.append((self.client.FMT[archive_name("matches")], {'season': {'$in': archived_seasons}}))
+
+    cursors = [matches.find({**query, **season_query}, batch_size=batch_size).sort([('date', 1), ('_id', 1)])
+               for matches, season_query in collections]
+    if len(cursors) == 1:
+        return decode_matches(self, cursors[0])
+    return decode_matches(self, merge(*cursors, key=lambda match: (match['date'], match['_id'])))
+
+
+def find_match_dates_of_season(self, season, team_names):
+    """
+    Return the dates of the season matches between the teams, a matchday is one of these dates
+    """
+    team_ids = encode_team_names(self, team_names)
+    matches = archive.collection(self, "matches", season)
+    return sorted(matches.distinct('date', {'season': int(season), 'home_team_id': {'$in': team_ids},
+                                            'away_team_id': {'$in': team_ids}}))
+
+
+def find_matches_of_date(self, date, team_names):
+    team_ids = encode_team_names(self, team_names)
+    query = {'season': date.year, 'date': date, 'home_team_id': {'$in': team_ids}, 'away_team_id': {'$in': team_ids}}
+    return decode_matches(self, archive.collection(self, "matches", date.year).find(query).sort('_id', 1))
+
+
+def find_head_to_head(self, team_a, team_b, recent_matches):
+    """
+    Aggregate the record of two teams and their most recent meetings - one query on the teams pair index,
+    and one on the archive collection when any season is archived (the records are added up)
+    """
+    team_a, team_b = registry.team_id(self, team_a), registry.team_id(self, team_b)
+    goals = {'$map': {'input': {'$split': ['$score', '-']}, 'in': {'$toInt': '$$this'}}}
+    team_a_is_home = {'$eq': ['$home_team_id', team_a]}
+    pipeline = [
+        {'$sort': {'date': -1}},
+        {'$facet': {
+            'record': [
+                {'$addFields': {'goals': goals}},
+                {'$group': {
+                    '_id': None,
+                    'matches': {'$sum': 1},
+                    'team_a_wins': {'$sum': {'$cond': [{'$eq': ['$team_won_id', team_a]}, 1, 0]}},
+                    'team_b_wins': {'$sum': {'$cond': [{'$eq': ['$team_won_id', team_b]}, 1, 0]}},
+                    'draws': {'$sum': {'$cond': ['$is_draw', 1, 0]}},
+                    'team_a_goals': {'$sum': {'$cond': [team_a_is_home, {'$arrayElemAt': ['$goals', 0]},
+                                                        {'$arrayElemAt': ['$goals', 1]}]}},
+                    'team_b_goals': {'$sum': {'$cond': [team_a_is_home, {'$arrayElemAt': ['$goals', 1]},
+                                                        {'$arrayElemAt': ['$goals', 0]}]}}
+                }}
+            ],
+            'recent': [{'$limit': recent_matches}]
+        }}
+    ]
+    query = {'teams_pair': teams_pair_key(team_a, team_b), 'score': {'$exists': True}}
+    archived_seasons = sorted(archive.archived_seasons(self))
+    if not archived_seasons:
+        head_to_head = self.client.FMT["matches"].aggregate([{'$match': query}, *pipeline])
+    else:
+        # an archived season is read from the archive only - it is in both collections until it is deleted
+        head_to_head = [
+            *self.client.FMT["matches"].aggregate(
+                [{'$match': {**query, 'season': {'$nin': archived_seasons}}}, *pipeline]),
+            *self.client.FMT[archive_name("matches")].aggregate(
+                [{'$match': {**query, 'season': {'$in': archived_seasons}}}, *pipeline])
+        ]
+        record = {}
+        for result in head_to_head:
+            for stats in result['record']:
+                for field, value in stats.items():
+                    if field != '_id':
+                        record[field] = record.get(field, 0) + value
+        recent = sorted((match for result in head_to_head for match in result['recent']),
+                        key=lambda match: match['date'], reverse=True)[:recent_matches]
+        head_to_head = [{'record': [record] if record else [], 'recent': recent}]
+    for result in head_to_head:
+        result['recent'] = [decode_match(self, match) for match in result['recent']]
+        yield result
+
+
+def find_ended_matches_without_result_id(self, batch_size=1000):
+    return self.client.FMT["matches"].find({'score': {'$exists': True}, 'result_id': {'$exists': False}}, {'_id': 1},
+                                           batch_size=batch_size)
+
+
+def find_matches_with_string_dates(self, batch_size=1000):
+    return self.client.FMT["matches"].find({'date': {'$type': 'string'}}, {'date': 1}, batch_size=batch_size)
+
+
+def find_matches_without_team_ids(self, batch_size=1000):
+    return self.client.FMT["matches"].find({'home_team_id': {'$exists': False}},
+                                           {'home_team': 1, 'away_team': 1, 'team_won': 1, 'team_lost': 1},
+                                           batch_size=batch_size)
+
+
+def teams_pair_key(team_a, team_b):
+    """
+    The same key for both venues - the two team ids in sorted order packed into one integer
+    """
+    if team_a is None or team_b is None:
+        return None
+    low, high = sorted((team_a, team_b))
+    return (low << 32) | high
 
 
 def parse_match_from_request(request):
@@ -35,17 +395,18 @@ def parse_ended_match_to_db(request):
         "home_team": request.get("home_team"),
         "away_team": request.get("away_team"),
         "date": request.get("date"),
-        "score": request.get("score")
+        "score": request.get("score"),
+        # increasing in the order the results are recorded, unlike _id of a match created before it ended
+        "result_id": ObjectId()
     }
-    home_team_score = parsed_match["score"].split('-')[0]
-    away_team_score = parsed_match["score"].split('-')[1]
+    home_team_score, away_team_score = parsed_match["score"].split('-')
     #   parse match result
-    if home_team_score == away_team_score:
+    if int(home_team_score) == int(away_team_score):
         parsed_match['is_draw'] = True
         parsed_match['team_won_score'] = home_team_score
     else:
         parsed_match['is_draw'] = False
-        if home_team_score > away_team_score:
+        if int(home_team_score) > int(away_team_score):
             parsed_match['team_won'] = parsed_match['home_team']
             parsed_match['team_won_score'] = home_team_score
             parsed_match['team_lost'] = parsed_match['away_team']
@@ -59,6 +420,11 @@ def parse_ended_match_to_db(request):
     return parsed_match
 
 
+def parse_score(score):
+    home_team_score, away_team_score = score.split('-')
+    return int(home_team_score), int(away_team_score)
+
+
 def parse_match_from_db(request):
     return {
         "id": str(request.get("_id")),
@@ -68,5 +434,7 @@ def parse_match_from_db(request):
         "score": request.get("score", None),
         "is_draw": request.get("is_draw", None),
         "team_won": request.get("team_won", None),
-        "team_lost": request.get("team_lost", None)
+        "team_lost": request.get("team_lost", None),
+        "rating_change": request.get("rating_change", None),
+        "status": request.get("status", None)
     }
@@ -1,19 +1,96 @@
 #!/usr/bin/python3
 
+from datetime import datetime
+
 import pymongo
-from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 
+from services.archiveServices.archiveService import ArchiveService
 from services.configServices.configService import ConfigService
+from services.eventBusServices.eventBusService import EventBusService
+from services.fixtureServices.fixtureService import schedule_fixtures
 from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.archiveProvider import (copy_season_to_archive, count_season_documents,
+                                                     count_unended_matches_of_season, mark_season_archived,
+                                                     delete_season, archive_name, ARCHIVED_COLLECTIONS)
 from services.mongoDbService.collectionProvider import create_collections
-from services.mongoDbService.leagueProvider import (create_league, find_league, add_team_to_league)
+from services.mongoDbService.leagueProvider import (create_league, find_league, add_team_to_league,
+                                                    find_leagues_by_ids, find_leagues_with_team_names,
+                                                    find_leagues_of_teams, find_leagues_of_season,
+                                                    parse_league_from_db)
 from services.mongoDbService.teamProvider import (create_team, find_team, update_team_with_draw,
                                                   update_winning_team, update_losing_team, init_team,
-                                                  parse_team_from_db)
-from services.mongoDbService.matchProvider import (create_match, find_match, parse_ended_match_to_db, )
+                                                  parse_team_from_db, find_teams_by_rating, reset_teams_rating,
+                                                  bulk_update_teams, find_top_teams, stream_teams, find_teams_by_ids,
+                                                  find_teams_by_names, find_team_name_seasons, correct_team_result,
+                                                  publish_team_update, LEADERBOARD_METRICS)
+from services.mongoDbService.matchProvider import (create_match, find_match, parse_ended_match_to_db,
+                                                   find_ended_matches_of_season, find_future_matches_of_season,
+                                                   stream_ended_matches_of_season, bulk_update_matches, parse_score,
+                                                   find_head_to_head, parse_match_from_db, finish_live_match,
+                                                   stream_matches_of_season, find_match_seasons, find_matches_by_ids,
+                                                   create_matches, find_matches_by_date_range, format_date, parse_date,
+                                                   find_match_dates_of_season, find_matches_of_date,
+                                                   stream_team_matches, correct_match_result, restore_match,
+                                                   find_finished_matches,
+                                                   count_result_correction,
+                                                   find_result_corrections, LIVE_STATUS, ENDED_STATUS)
+from services.mongoDbService.standingsSnapshotProvider import (record_standings_delta, find_standings_snapshot,
+                                                               find_standings_deltas, set_standings_totals,
+                                                               replace_standings_snapshots, match_stats, add_stats,
+                                                               subtract_stats)
+from services.ratingServices.ratingService import (INITIAL_RATING, match_rating_change)
+from services.teamRegistryServices.teamRegistryService import TeamRegistryService
+from services.teamSearchServices.teamSearchService import TeamSearchService
+from services.writeBehindServices.writeBehindService import WriteBehindService
 
 config = ConfigService().config
 logger = LoggerService().logger
+event_bus = EventBusService()
+write_behind = WriteBehindService()
+registry = TeamRegistryService()
+team_search = TeamSearchService()
+archive = ArchiveService()
+
+# a finalize reads the goals again when a goal is written between its read and its update
+FINALIZE_ATTEMPTS = 3
+NOT_FOUND_STATUS = 'not_found'
+INVALID_ID_STATUS = 'invalid_id'
+
+
+def parse_batch_request(ids, fields, parse):
+    """
+    Return the distinct valid object ids of a batch request and the validated fields (None for all the fields)
+    """
+    if fields is not None:
+        allowed_fields = set(parse({}))
+        unknown_fields = [field for field in fields if field not in allowed_fields]
+        if unknown_fields:
+            raise ValueError(f'unknown fields: {", ".join(unknown_fields)}, fields must be of: '
+                             f'{", ".join(sorted(allowed_fields))}')
+    object_ids = list({ObjectId(_id) for _id in ids if ObjectId.is_valid(_id)})
+    return object_ids, fields
+
+
+def parse_batch_result(ids, fields, documents, parse):
+    """
+    Return the parsed documents in the order of the requested ids, with a status marker for the missing ids
+    """
+    found = {str(document['_id']): document for document in documents}
+    results = []
+    for _id in ids:
+        if not ObjectId.is_valid(_id):
+            results.append({"id": _id, "status": INVALID_ID_STATUS})
+        elif _id not in found:
+            results.append({"id": _id, "status": NOT_FOUND_STATUS})
+        else:
+            parsed = parse(found[_id])
+            if fields is not None:
+                parsed = {field: parsed[field] for field in dict.fromkeys(['id', *fields])}
+            results.append(parsed)
+    return results
 
 
 class MongoDbService:
@@ -22,6 +99,10 @@ class MongoDbService:
         self.client = pymongo.MongoClient(config['mongodb']['url'], config['mongodb']['port'])
         logger.debug(f'MongoDbService/init - calling collectionProvider/create_collections')
         create_collections(self)
+        logger.debug(f'MongoDbService/init - calling TeamRegistryService/load')
+        registry.load(self)
+        logger.debug(f'MongoDbService/init - calling ArchiveService/load')
+        archive.load(self)
         logger.info(f'MongoDbService/init - end')
 
     def create_league(self, data):
@@ -84,9 +165,11 @@ class MongoDbService:
     def create_team(self, data):
         logger.info(f'MongoDbService/create_team - start | data: {data}')
         try:
+            self.check_season_not_archived(data.get("season"))
             logger.debug(f'MongoDbService/create_team - calling teamProvider/create_team')
             _id = create_team(self, init_team(data))
             logger.debug(f'MongoDbService/create_team - teamProvider/create_team succeeded | id: {_id}')
+            team_search.add(data["name"])
 
         # Team already exists
         except DuplicateKeyError as error:
@@ -100,6 +183,24 @@ class MongoDbService:
         else:
             return _id
 
+    def find_team_name_seasons(self):
+        logger.info(f'MongoDbService/find_team_name_seasons - start')
+        try:
+            logger.debug(f'MongoDbService/find_team_name_seasons - calling teamProvider/find_team_name_seasons')
+            seasons = {}
+            for team in find_team_name_seasons(self):
+                if team["_id"]:
+                    seasons[team["_id"]] = seasons.get(team["_id"], 0) + team["seasons"]
+            logger.debug(f'MongoDbService/find_team_name_seasons - teamProvider/find_team_name_seasons succeeded | '
+                         f'teams: {len(seasons)}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_team_name_seasons failed | error: {error}')
+            raise
+
+        else:
+            return seasons
+
     def find_team(self, data):
         logger.info(f'MongoDbService/find_team - start | data: {data}')
         try:
@@ -120,6 +221,7 @@ class MongoDbService:
     def create_match(self, data):
         logger.info(f'MongoDbService/create_match - start | data: {data}')
         try:
+            self.check_season_not_archived(parse_date(data["date"]).year)
             logger.debug(f'MongoDbService/create_match - calling matchProvider/create_match')
             _id = create_match(self, data)
             logger.debug(f'MongoDbService/create_match - matchProvider/create_match succeeded | id: {_id}')
@@ -136,6 +238,53 @@ class MongoDbService:
         else:
             return _id
 
+    def generate_fixtures(self, league_id, start_date, days_between_rounds, break_days):
+        """
+        Insert the double round robin fixtures of the league teams in one insert_many,
+        a fixture that already exists is reported as a conflict
+        """
+        logger.info(f'MongoDbService/generate_fixtures - start | league id: {league_id}, start date: {start_date}')
+        try:
+            logger.debug(f'MongoDbService/generate_fixtures - calling leagueProvider/find_league')
+            _league = find_league(self, {'_id': league_id})
+            logger.debug(f'MongoDbService/generate_fixtures - leagueProvider/find_league succeeded | league: {_league}')
+
+            if _league is None:
+                raise Exception('The league is not exists')
+            self.check_season_not_archived(_league['season'])
+
+            logger.debug(f'MongoDbService/generate_fixtures - calling teamProvider/find_teams_by_ids')
+            team_names = [team['name'] for team in find_teams_by_ids(self, _league.get('teams', []), {'name': 1})]
+            logger.debug(f'MongoDbService/generate_fixtures - teamProvider/find_teams_by_ids succeeded | '
+                         f'teams: {team_names}')
+
+            if len(set(team_names)) < 2:
+                raise ValueError('The league must have at least 2 teams')
+
+            fixtures = schedule_fixtures(team_names, start_date, days_between_rounds, break_days)
+            # the season of a match is the year of its date
+            if {fixtures[0]['date'][:4], fixtures[-1]['date'][:4]} != {str(int(_league['season']))}:
+                raise ValueError(f'The fixtures must be played in {int(_league["season"])} - '
+                                 f'the last matchday is on {fixtures[-1]["date"]}')
+
+            logger.debug(f'MongoDbService/generate_fixtures - calling matchProvider/create_matches | '
+                         f'fixtures: {len(fixtures)}')
+            matches = [{key: fixture[key] for key in ('home_team', 'away_team', 'date')} for fixture in fixtures]
+            inserted, conflicts = create_matches(self, matches)
+            logger.debug(f'MongoDbService/generate_fixtures - matchProvider/create_matches succeeded | '
+                         f'inserted: {inserted}, conflicts: {len(conflicts)}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/generate_fixtures failed | error: {error}')
+            raise
+
+        else:
+            return {
+                "inserted": inserted,
+                "conflicts": [fixtures[index] for index, _ in conflicts],
+                "fixtures": fixtures
+            }
+
     def create_match_with_score(self, data):
         logger.info(f'MongoDbService/create_match_with_score - start | data: {data}')
         try:
@@ -143,6 +292,12 @@ class MongoDbService:
             parsed_match = parse_ended_match_to_db(data)
             logger.debug(
                 f'MongoDbService/create_match_with_score - matchProvider/parse_ended_match_to_db succeeded | match: {parsed_match}')
+            self.check_season_not_archived(parse_date(parsed_match["date"]).year)
+
+            logger.debug(f'MongoDbService/create_match_with_score - calling find_match_rating_change')
+            parsed_match['rating_change'] = self.find_match_rating_change(parsed_match)
+            logger.debug(
+                f'MongoDbService/create_match_with_score - find_match_rating_change succeeded | rating change: {parsed_match["rating_change"]}')
 
             logger.debug(f'MongoDbService/create_match_with_score - calling matchProvider/create_match')
             _id = create_match(self, parsed_match)
@@ -152,6 +307,9 @@ class MongoDbService:
             self.update_teams_with_match_result(parsed_match, _id)
             logger.debug(f'MongoDbService/create_match_with_score - matchProvider/create_match succeeded')
 
+            self.update_standings_snapshots(parsed_match)
+            self.publish_match_result(parsed_match, _id)
+
         # Match already exists
         except DuplicateKeyError as error:
             logger.error(f'MongoDbService/create_match_with_score failed - duplicate key error | error: {error}')
@@ -164,33 +322,455 @@ class MongoDbService:
         else:
             return _id
 
+    def create_live_match(self, data):
+        logger.info(f'MongoDbService/create_live_match - start | data: {data}')
+        try:
+            self.check_season_not_archived(parse_date(data["date"]).year)
+            logger.debug(f'MongoDbService/create_live_match - calling matchProvider/create_match')
+            _id = create_match(self, {**data, "status": LIVE_STATUS, "home_goals": 0, "away_goals": 0})
+            logger.debug(f'MongoDbService/create_live_match - matchProvider/create_match succeeded | id: {_id}')
+
+        # Match already exists
+        except DuplicateKeyError as error:
+            logger.error(f'MongoDbService/create_live_match failed - duplicate key error | error: {error}')
+            raise Exception('Match is already exists - home team, away team and date combination must be unique')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/create_live_match failed | error: {error}')
+            raise
+
+        else:
+            return _id
+
+    def update_live_scores(self, goals):
+        logger.info(f'MongoDbService/update_live_scores - start | goals: {goals}')
+        try:
+            operations = [UpdateOne({'_id': match_id, 'status': LIVE_STATUS},
+                                    {'$inc': {'home_goals': home_goals, 'away_goals': away_goals}})
+                          for match_id, (home_goals, away_goals) in goals.items()]
+            logger.debug(f'MongoDbService/update_live_scores - calling matchProvider/bulk_update_matches')
+            _result = bulk_update_matches(self, operations)
+            logger.debug(
+                f'MongoDbService/update_live_scores - matchProvider/bulk_update_matches succeeded | modified: {_result.modified_count}')
+
+            finished = []
+            if _result.matched_count < len(operations):
+                finished = find_finished_matches(self, goals)
+                logger.warning(f'MongoDbService/update_live_scores - goals of matches that are not live were dropped '
+                               f'| dropped: {len(operations) - _result.matched_count}, matches: {finished}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/update_live_scores failed | error: {error}')
+            raise
+
+        else:
+            return _result.modified_count, finished
+
+    def finalize_live_match(self, match_id):
+        logger.info(f'MongoDbService/finalize_live_match - start | match id: {match_id}')
+        try:
+            for attempt in range(FINALIZE_ATTEMPTS):
+                logger.debug(f'MongoDbService/finalize_live_match - calling matchProvider/find_match')
+                _match = find_match(self, {'_id': match_id, 'status': LIVE_STATUS})
+                logger.debug(f'MongoDbService/finalize_live_match - matchProvider/find_match succeeded | match: {_match}')
+
+                if _match is None:
+                    raise Exception('The live match is already finalized' if attempt else 'The live match is not exists')
+
+                # the final score is the persisted goals, the goals a worker still buffers are rejected by its flush
+                parsed_match = parse_ended_match_to_db(
+                    {**_match, "score": f'{_match["home_goals"]}-{_match["away_goals"]}'})
+                parsed_match['rating_change'] = self.find_match_rating_change(parsed_match)
+                parsed_match['status'] = ENDED_STATUS
+
+                logger.debug(f'MongoDbService/finalize_live_match - calling matchProvider/finish_live_match')
+                if finish_live_match(self, match_id, parsed_match, _match["home_goals"],
+                                     _match["away_goals"]).modified_count:
+                    break
+                logger.debug(f'MongoDbService/finalize_live_match - the goals changed, reading the match again')
+            else:
+                raise Exception('The live match goals kept changing - retry the finalize')
+            logger.debug(f'MongoDbService/finalize_live_match - matchProvider/finish_live_match succeeded')
+
+            logger.debug(f'MongoDbService/finalize_live_match - calling update_teams_with_match_result')
+            self.update_teams_with_match_result(parsed_match, match_id)
+            logger.debug(f'MongoDbService/finalize_live_match - update_teams_with_match_result succeeded')
+
+            self.update_standings_snapshots(parsed_match)
+            self.publish_match_result(parsed_match, match_id)
+
+        except Exception as error:
+            logger.error(f'MongoDbService/finalize_live_match failed | error: {error}')
+            raise
+
+        else:
+            return parse_match_from_db({**parsed_match, "_id": match_id})
+
+    def correct_match_result(self, match_id, score):
+        """
+        Replace the score of an ended match - the teams get the difference of the old and the new result
+        (the counters, the match moved between the result arrays and the recent form entry) in one bulk write and
+        the standings snapshots get the difference as a delta, so nothing of the season is recomputed.
+        The match is replaced first (only if it still has the old score) and put back when the teams update fails.
+        The rating change is computed again from the current ratings of the teams with the old rating change of
+        the match taken out, the rating changes of the later matches are kept (POST /ratings/recompute replays
+        the whole season)
+        """
+        logger.info(f'MongoDbService/correct_match_result - start | match id: {match_id}, score: {score}')
+        try:
+            logger.debug(f'MongoDbService/correct_match_result - calling matchProvider/find_match')
+            _match = find_match(self, {'_id': match_id})
+            logger.debug(f'MongoDbService/correct_match_result - matchProvider/find_match succeeded | match: {_match}')
+
+            if _match is None or _match.get("score") is None:
+                raise Exception('The ended match is not exists')
+            self.check_season_not_archived(parse_date(_match["date"]).year)
+            if _match["score"] == score:
+                return parse_match_from_db(_match)
+
+            old_score = _match["score"]
+            old_rating_change = _match.get("rating_change") or 0
+            parsed_match = parse_ended_match_to_db({**_match, "score": score})
+            # the result keeps its place in the order the results are recorded
+            parsed_match['result_id'] = _match.get("result_id", parsed_match['result_id'])
+            parsed_match['rating_change'] = self.find_match_rating_change(parsed_match, old_rating_change)
+            if _match.get("status") is not None:
+                parsed_match['status'] = _match["status"]
+
+            logger.debug(f'MongoDbService/correct_match_result - calling matchProvider/correct_match_result')
+            if not correct_match_result(self, match_id, old_score, parsed_match).modified_count:
+                raise Exception('The match result was corrected concurrently - retry the correction')
+            logger.debug(f'MongoDbService/correct_match_result - matchProvider/correct_match_result succeeded')
+
+            logger.debug(f'MongoDbService/correct_match_result - calling update_teams_with_result_correction')
+            try:
+                self.update_teams_with_result_correction(parsed_match, old_score, old_rating_change, match_id)
+            except Exception:
+                # the teams still have the old result - put the old match back so the correction can be retried
+                logger.debug(f'MongoDbService/correct_match_result - calling matchProvider/restore_match')
+                restore_match(self, match_id, score, _match)
+                logger.debug(f'MongoDbService/correct_match_result - matchProvider/restore_match succeeded')
+                raise
+            count_result_correction(self, parse_date(_match["date"]).year)
+            logger.debug(f'MongoDbService/correct_match_result - update_teams_with_result_correction succeeded')
+
+            self.update_standings_snapshots(parsed_match, old_score)
+            self.publish_match_result(parsed_match, match_id)
+
+        except Exception as error:
+            logger.error(f'MongoDbService/correct_match_result failed | error: {error}')
+            raise
+
+        else:
+            return parse_match_from_db({**parsed_match, "_id": match_id})
+
+    def update_teams_with_result_correction(self, data, old_score, old_rating_change, match_id):
+        """
+        Apply the difference of the old and the corrected result to both teams in one bulk write - when only one
+        of the teams is updated, its update is reverted, so a failure leaves both teams with the old result
+        """
+        logger.info(f'MongoDbService/update_teams_with_result_correction - start | data: {data}, '
+                    f'old score: {old_score}, match id: {match_id}')
+        try:
+            home_team_name = data.get("home_team")
+            away_team_name = data.get("away_team")
+            season = int(data.get("date").split('-')[0])
+            home_team_data = self.find_season_team(home_team_name, season)
+            away_team_data = self.find_season_team(away_team_name, season)
+            old_home_goals, old_away_goals = parse_score(old_score)
+            home_goals, away_goals = parse_score(data["score"])
+            rating_change = data.get("rating_change", 0) - old_rating_change
+
+            corrections = [
+                (home_team_data, *correct_team_result(home_team_data, (old_home_goals, old_away_goals),
+                                                      (home_goals, away_goals), match_id, rating_change,
+                                                      away_team_name, data["date"])),
+                (away_team_data, *correct_team_result(away_team_data, (old_away_goals, old_home_goals),
+                                                      (away_goals, home_goals), match_id, -rating_change,
+                                                      home_team_name, data["date"]))
+            ]
+            if write_behind.enabled:
+                # the buffered result of the match must be written before its array entry is moved
+                write_behind.flush(self)
+
+            logger.debug(f'MongoDbService/update_teams_with_result_correction - calling teamProvider/bulk_update_teams')
+            try:
+                _result = bulk_update_teams(self, [operation for _, operation, _, _ in corrections])
+            except BulkWriteError as error:
+                failed = {write_error['index'] for write_error in error.details['writeErrors']}
+                reverts = [correct_team_result(home_team_data, (home_goals, away_goals),
+                                               (old_home_goals, old_away_goals), match_id, -rating_change,
+                                               away_team_name, data["date"])[0],
+                           correct_team_result(away_team_data, (away_goals, home_goals),
+                                               (old_away_goals, old_home_goals), match_id, rating_change,
+                                               home_team_name, data["date"])[0]]
+                reverts = [revert for index, revert in enumerate(reverts) if index not in failed]
+                if reverts:
+                    logger.debug(f'MongoDbService/update_teams_with_result_correction - reverting the updated team')
+                    bulk_update_teams(self, reverts)
+                raise
+            logger.debug(f'MongoDbService/update_teams_with_result_correction - teamProvider/bulk_update_teams '
+                         f'succeeded | modified: {_result.modified_count}')
+
+            for team_data, _, increments, result in corrections:
+                publish_team_update(team_data, increments, result, match_id)
+
+        except Exception as error:
+            logger.error(f'MongoDbService/update_teams_with_result_correction failed | error: {error}')
+            raise
+
+        else:
+            return _result.modified_count
+
+    def publish_match_result(self, data, match_id):
+        return event_bus.publish(int(data["date"].split('-')[0]),
+                                 {"type": "match_result", **parse_match_from_db({**data, "_id": match_id})},
+                                 teams=(data["home_team"], data["away_team"]))
+
+    def update_standings_snapshots(self, data, previous_score=None):
+        """
+        Add a recorded result to the standings snapshots of the leagues of its teams (a corrected result adds the
+        change from previous_score) - a failure is logged and not raised, the result is already recorded
+        and the snapshots can be rebuilt with the backfill
+        """
+        logger.info(f'MongoDbService/update_standings_snapshots - start | data: {data}')
+        try:
+            season = int(data["date"].split('-')[0])
+            logger.debug(f'MongoDbService/update_standings_snapshots - calling teamProvider/find_teams_by_names')
+            team_ids = {data["home_team"]: [], data["away_team"]: []}
+            for team in find_teams_by_names(self, list(team_ids), season, {'name': 1}):
+                team_ids[team['name']].append(team['_id'])
+            league_ids = [league['_id'] for league in find_leagues_of_teams(self, team_ids[data["home_team"]],
+                                                                            team_ids[data["away_team"]], season)]
+            logger.debug(f'MongoDbService/update_standings_snapshots - leagueProvider/find_leagues_of_teams '
+                         f'succeeded | leagues: {league_ids}')
+
+            home_stats, away_stats = match_stats(*parse_score(data["score"]))
+            if previous_score is not None:
+                previous_home_stats, previous_away_stats = match_stats(*parse_score(previous_score))
+                home_stats = subtract_stats(home_stats, previous_home_stats)
+                away_stats = subtract_stats(away_stats, previous_away_stats)
+            stats = {str(registry.team_id(self, data["home_team"])): home_stats,
+                     str(registry.team_id(self, data["away_team"])): away_stats}
+            logger.debug(f'MongoDbService/update_standings_snapshots - calling '
+                         f'standingsSnapshotProvider/record_standings_delta')
+            record_standings_delta(self, league_ids, season, parse_date(data["date"]), stats)
+            logger.debug(f'MongoDbService/update_standings_snapshots - '
+                         f'standingsSnapshotProvider/record_standings_delta succeeded')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/update_standings_snapshots failed | error: {error}')
+            return False
+
+        else:
+            return True
+
+    def find_standings_as_of(self, league_id, as_of):
+        """
+        Return the stats of the league teams (by team name) after the results of the as_of date - the nearest
+        checkpoint plus the deltas after it. When the deltas are many the result is saved as a new checkpoint
+        """
+        logger.info(f'MongoDbService/find_standings_as_of - start | league id: {league_id}, as of: {as_of}')
+        try:
+            logger.debug(f'MongoDbService/find_standings_as_of - calling standingsSnapshotProvider/find_standings_snapshot')
+            _snapshot = find_standings_snapshot(self, league_id, parse_date(as_of))
+            totals = {}
+            if _snapshot is not None and 'totals' in _snapshot:
+                totals = _snapshot['totals']
+            elif _snapshot is not None:
+                _checkpoint = find_standings_snapshot(self, league_id, _snapshot['date'], checkpoint=True)
+                if _checkpoint is not None:
+                    totals = _checkpoint['totals']
+                checkpoint_date = None if _checkpoint is None else _checkpoint['date']
+                _deltas = list(find_standings_deltas(self, league_id, checkpoint_date, _snapshot['date']))
+                for delta in _deltas:
+                    add_stats(totals, delta['delta'])
+                logger.debug(f'MongoDbService/find_standings_as_of - standingsSnapshotProvider/find_standings_deltas '
+                             f'succeeded | checkpoint: {checkpoint_date}, deltas: {len(_deltas)}')
+
+                if len(_deltas) >= config['standings_snapshots']['checkpoint_interval']:
+                    set_standings_totals(self, _snapshot['_id'], _snapshot['stamp'], totals)
+                    logger.debug(f'MongoDbService/find_standings_as_of - checkpoint saved | '
+                                 f'date: {_snapshot["date"]}')
+
+            _stats = {registry.team_name(self, int(team_id)): stats for team_id, stats in totals.items()}
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_standings_as_of failed | error: {error}')
+            raise
+
+        else:
+            return _stats
+
+    def backfill_standings_snapshots(self, season):
+        """
+        Rebuild the standings snapshots of the season leagues from the ended matches,
+        every checkpoint_interval-th match date of a league is a checkpoint
+        """
+        logger.info(f'MongoDbService/backfill_standings_snapshots - start | season: {season}')
+        try:
+            checkpoint_interval = config['standings_snapshots']['checkpoint_interval']
+            leagues = {}
+            for league in find_leagues_of_season(self, season):
+                team_names = {team['name'] for team in find_teams_by_ids(self, league.get('teams', []), {'name': 1})}
+                leagues[league['_id']] = (team_names, {})
+
+            logger.debug(f'MongoDbService/backfill_standings_snapshots - calling '
+                         f'matchProvider/stream_ended_matches_of_season | leagues: {len(leagues)}')
+            for match in stream_ended_matches_of_season(self, season):
+                home_stats, away_stats = match_stats(*parse_score(match['score']))
+                stats = {str(registry.team_id(self, match['home_team'])): home_stats,
+                         str(registry.team_id(self, match['away_team'])): away_stats}
+                for team_names, deltas in leagues.values():
+                    if match['home_team'] in team_names and match['away_team'] in team_names:
+                        add_stats(deltas.setdefault(match['date'], {}), stats)
+
+            _snapshots = 0
+            for league_id, (_, deltas) in leagues.items():
+                totals = {}
+                snapshots = []
+                for matchday, date in enumerate(sorted(deltas), start=1):
+                    add_stats(totals, deltas[date])
+                    snapshot = {'league_id': league_id, 'season': int(season), 'date': parse_date(date),
+                                'delta': deltas[date], 'stamp': 0}
+                    if matchday % checkpoint_interval == 0:
+                        snapshot['totals'] = {team_id: dict(stats) for team_id, stats in totals.items()}
+                    snapshots.append(snapshot)
+                _snapshots += replace_standings_snapshots(self, league_id, snapshots)
+            logger.debug(f'MongoDbService/backfill_standings_snapshots - '
+                         f'standingsSnapshotProvider/replace_standings_snapshots succeeded | snapshots: {_snapshots}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/backfill_standings_snapshots failed | error: {error}')
+            raise
+
+        else:
+            return _snapshots
+
+    def check_season_not_archived(self, season):
+        if archive.is_archived(self, season):
+            raise Exception(f'The season {int(season)} is archived - the archived seasons are read only')
+
+    def archive_season(self, season, batch_size=1000):
+        """
+        Copy the matches and the teams of an ended season to the archive collections and mark the season archived,
+        the reads of the season are served from the archive from now on. The hot documents are deleted
+        by purge_archived_season
+        """
+        logger.info(f'MongoDbService/archive_season - start | season: {season}')
+        try:
+            if int(season) >= datetime.utcnow().year:
+                raise ValueError(f'The season {season} is not over - only the past seasons can be archived')
+            logger.debug(f'MongoDbService/archive_season - calling archiveProvider/count_unended_matches_of_season')
+            unended_matches = count_unended_matches_of_season(self, season)
+            if unended_matches:
+                raise ValueError(f'The season {season} has {unended_matches} matches without a result')
+
+            # the buffered team increments must land before the teams are copied
+            write_behind.flush(self)
+            _counts = {}
+            for collection in ARCHIVED_COLLECTIONS:
+                logger.debug(f'MongoDbService/archive_season - calling archiveProvider/copy_season_to_archive | '
+                             f'collection: {collection}')
+                archived = copy_season_to_archive(self, collection, season, batch_size)
+                hot = count_season_documents(self, collection, season)
+                if archived != hot:
+                    raise Exception(f'The archive of {collection} has {archived} documents of the season '
+                                    f'instead of {hot}')
+                _counts[collection] = archived
+            logger.debug(f'MongoDbService/archive_season - archiveProvider/copy_season_to_archive succeeded | '
+                         f'counts: {_counts}')
+
+            mark_season_archived(self, season, _counts)
+            archive.load(self)
+
+        except Exception as error:
+            logger.error(f'MongoDbService/archive_season failed | error: {error}')
+            raise
+
+        else:
+            return _counts
+
+    def purge_archived_season(self, season):
+        """
+        Delete an archived season from the hot collections, so their indexes only hold the live seasons
+        """
+        logger.info(f'MongoDbService/purge_archived_season - start | season: {season}')
+        try:
+            if int(season) not in archive.load(self):
+                raise ValueError(f'The season {season} is not archived')
+            _deleted = {}
+            for collection in ARCHIVED_COLLECTIONS:
+                if count_season_documents(self, archive_name(collection), season) < \
+                        count_season_documents(self, collection, season):
+                    raise Exception(f'The archive of {collection} is missing documents of the season')
+                logger.debug(f'MongoDbService/purge_archived_season - calling archiveProvider/delete_season | '
+                             f'collection: {collection}')
+                _deleted[collection] = delete_season(self, collection, season)
+            logger.debug(f'MongoDbService/purge_archived_season - archiveProvider/delete_season succeeded | '
+                         f'deleted: {_deleted}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/purge_archived_season failed | error: {error}')
+            raise
+
+        else:
+            return _deleted
+
+    def find_match_rating_change(self, data, previous_change=0):
+        """
+        Return the rating change of the home team in a result, from the current ratings of the teams -
+        previous_change is the change of a result that is corrected and is taken out of the ratings first
+        """
+        logger.info(f'MongoDbService/find_match_rating_change - start | data: {data}')
+        try:
+            season = int(data.get("date").split('-')[0])
+            seasons = {'$in': [season, str(season)]}
+            home_team = find_team(self, {"name": data.get("home_team"), "season": seasons}) or {}
+            away_team = find_team(self, {"name": data.get("away_team"), "season": seasons}) or {}
+            home_goals, away_goals = parse_score(data.get("score"))
+            rating_change = match_rating_change(home_team.get("rating", INITIAL_RATING) - previous_change,
+                                                away_team.get("rating", INITIAL_RATING) + previous_change,
+                                                home_goals, away_goals)
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_match_rating_change failed | error: {error}')
+            raise
+
+        else:
+            return rating_change
+
+    def find_season_team(self, name, season):
+        """
+        Return the filter of the team document of the season, the season of a team is a number or a string
+        (teams created by the results before) - a missing team is created with a number season
+        """
+        _team = find_team(self, {"name": name, "season": {'$in': [season, str(season)]}})
+        if _team is None:
+            create_team(self, init_team({"name": name, "season": season}))
+            team_search.add(name)
+            return {"name": name, "season": season}
+        return {"name": name, "season": _team["season"]}
+
     def update_teams_with_match_result(self, data, match_id):
         global team_won_data, team_lost_data
         logger.info(f'MongoDbService/update_teams_with_match_result - start | data: {data}, match id = {match_id}')
         try:
             home_team_name = data.get("home_team")
             away_team_name = data.get("away_team")
-            season = data.get("date").split('-')[0]
-            home_team_data = {
-                "name": home_team_name,
-                "season": season
-            }
-            away_team_data = {
-                "name": away_team_name,
-                "season": season
-            }
-
-            if not find_team(self, home_team_data):
-                create_team(self, init_team(home_team_data))
+            season = int(data.get("date").split('-')[0])
+            home_team_data = self.find_season_team(home_team_name, season)
+            away_team_data = self.find_season_team(away_team_name, season)
 
-            if not find_team(self, away_team_data):
-                create_team(self, init_team(away_team_data))
+            home_rating_change = data.get("rating_change", 0)
 
             if data['is_draw']:
                 logger.debug(
                     f'MongoDbService/update_teams_with_match_result - calling teamProvider/update_team_with_draw | home team: {home_team_data}, away team: {away_team_data}')
-                update_team_with_draw(self, home_team_data, data["team_won_score"], match_id)
-                update_team_with_draw(self, away_team_data, data["team_won_score"], match_id)
+                update_team_with_draw(self, home_team_data, data["team_won_score"], match_id, home_rating_change,
+                                      away_team_name, data["date"])
+                update_team_with_draw(self, away_team_data, data["team_won_score"], match_id, -home_rating_change,
+                                      home_team_name, data["date"])
                 logger.debug(
                     f'MongoDbService/update_teams_with_match_result - teamProvider/update_team_with_draw succeeded')
                 return True
@@ -198,18 +778,22 @@ class MongoDbService:
             elif data['team_won'] == home_team_name:
                 team_won_data = home_team_data
                 team_lost_data = away_team_data
+                team_won_rating_change = home_rating_change
             else:
                 team_won_data = away_team_data
                 team_lost_data = home_team_data
+                team_won_rating_change = -home_rating_change
 
             logger.debug(
                 f'MongoDbService/update_teams_with_match_result - calling teamProvider/update_winning_team | winnig team: {team_won_data}')
-            update_winning_team(self, team_won_data, data["team_won_score"], data["team_lose_score"], match_id)
+            update_winning_team(self, team_won_data, data["team_won_score"], data["team_lose_score"], match_id,
+                                team_won_rating_change, team_lost_data["name"], data["date"])
             logger.debug(f'MongoDbService/update_teams_with_match_result - teamProvider/update_winning_team succeeded')
 
             logger.debug(
                 f'MongoDbService/update_teams_with_match_result - calling teamProvider/update_losing_team | lossing team: {team_lost_data}')
-            update_losing_team(self, team_lost_data, data["team_lose_score"], data["team_won_score"], match_id)
+            update_losing_team(self, team_lost_data, data["team_lose_score"], data["team_won_score"], match_id,
+                               -team_won_rating_change, team_won_data["name"], data["date"])
             logger.debug(f'MongoDbService/update_teams_with_match_result - teamProvider/update_losing_team succeeded')
 
         except Exception as error:
@@ -233,6 +817,372 @@ class MongoDbService:
         else:
             return _match
 
+    def find_ended_matches_of_season(self, season, after_id=None):
+        logger.info(f'MongoDbService/find_ended_matches_of_season - start | season: {season}, after id: {after_id}')
+        try:
+            logger.debug(f'MongoDbService/find_ended_matches_of_season - calling matchProvider/find_ended_matches_of_season')
+            _matches = find_ended_matches_of_season(self, season, after_id)
+            logger.debug(f'MongoDbService/find_ended_matches_of_season - matchProvider/find_ended_matches_of_season succeeded')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_ended_matches_of_season failed | error: {error}')
+            raise
+
+        else:
+            return _matches
+
+    def find_result_corrections(self, season):
+        logger.info(f'MongoDbService/find_result_corrections - start | season: {season}')
+        try:
+            logger.debug(f'MongoDbService/find_result_corrections - calling matchProvider/find_result_corrections')
+            _corrections = find_result_corrections(self, season)
+            logger.debug(f'MongoDbService/find_result_corrections - matchProvider/find_result_corrections succeeded '
+                         f'| corrections: {_corrections}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_result_corrections failed | error: {error}')
+            raise
+
+        else:
+            return _corrections
+
+    def find_future_matches_of_season(self, season):
+        logger.info(f'MongoDbService/find_future_matches_of_season - start | season: {season}')
+        try:
+            logger.debug(f'MongoDbService/find_future_matches_of_season - calling matchProvider/find_future_matches_of_season')
+            _matches = list(find_future_matches_of_season(self, season))
+            logger.debug(
+                f'MongoDbService/find_future_matches_of_season - matchProvider/find_future_matches_of_season succeeded | matches: {len(_matches)}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_future_matches_of_season failed | error: {error}')
+            raise
+
+        else:
+            return _matches
+
+    def find_matches_by_date_range(self, from_date, to_date, team_name=None):
+        logger.info(f'MongoDbService/find_matches_by_date_range - start | from: {from_date}, to: {to_date}, '
+                    f'team: {team_name}')
+        try:
+            logger.debug(f'MongoDbService/find_matches_by_date_range - calling matchProvider/find_matches_by_date_range')
+            _matches = [parse_match_from_db(match)
+                        for match in find_matches_by_date_range(self, from_date, to_date, team_name)]
+            logger.debug(f'MongoDbService/find_matches_by_date_range - matchProvider/find_matches_by_date_range '
+                         f'succeeded | matches: {len(_matches)}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_matches_by_date_range failed | error: {error}')
+            raise
+
+        else:
+            return _matches
+
+    def find_matchday(self, season, matchday, team_names):
+        """
+        Return the date and the matches of a matchday - the matchday-th date of the season
+        with a match (ended, live or future) between the teams
+        """
+        logger.info(f'MongoDbService/find_matchday - start | season: {season}, matchday: {matchday}')
+        try:
+            logger.debug(f'MongoDbService/find_matchday - calling matchProvider/find_match_dates_of_season')
+            _dates = find_match_dates_of_season(self, season, team_names)
+            logger.debug(f'MongoDbService/find_matchday - matchProvider/find_match_dates_of_season succeeded | '
+                         f'matchdays: {len(_dates)}')
+
+            if not 0 < matchday <= len(_dates):
+                raise Exception(f'The matchday is not exists - the season has {len(_dates)} matchdays')
+
+            logger.debug(f'MongoDbService/find_matchday - calling matchProvider/find_matches_of_date')
+            _matches = [parse_match_from_db(match)
+                        for match in find_matches_of_date(self, _dates[matchday - 1], team_names)]
+            logger.debug(f'MongoDbService/find_matchday - matchProvider/find_matches_of_date succeeded | '
+                         f'matches: {len(_matches)}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_matchday failed | error: {error}')
+            raise
+
+        else:
+            return format_date(_dates[matchday - 1]), _matches
+
+    def find_teams_ratings(self, data, season):
+        logger.info(f'MongoDbService/find_teams_ratings - start | data: {data}, season: {season}')
+        try:
+            logger.debug(f'MongoDbService/find_teams_ratings - calling teamProvider/find_teams_by_rating')
+            _teams = [{
+                "id": str(team.get("_id")),
+                "name": team.get("name"),
+                "rating": round(team.get("rating", INITIAL_RATING), 2)
+            } for team in find_teams_by_rating(self, data['teams'], season)]
+            logger.debug(f'MongoDbService/find_teams_ratings - teamProvider/find_teams_by_rating succeeded | teams: {_teams}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_teams_ratings failed | error: {error}')
+            raise
+
+        else:
+            return _teams
+
+    def find_teams_batch(self, ids, fields=None):
+        logger.info(f'MongoDbService/find_teams_batch - start | ids: {len(ids)}, fields: {fields}')
+        try:
+            object_ids, fields = parse_batch_request(ids, fields, parse_team_from_db)
+            projection = None if fields is None else {field: 1 for field in fields}
+            logger.debug(f'MongoDbService/find_teams_batch - calling teamProvider/find_teams_by_ids')
+            _teams = parse_batch_result(ids, fields, find_teams_by_ids(self, object_ids, projection), parse_team_from_db)
+            logger.debug(f'MongoDbService/find_teams_batch - teamProvider/find_teams_by_ids succeeded')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_teams_batch failed | error: {error}')
+            raise
+
+        else:
+            return _teams
+
+    def find_matches_batch(self, ids, fields=None):
+        logger.info(f'MongoDbService/find_matches_batch - start | ids: {len(ids)}, fields: {fields}')
+        try:
+            object_ids, fields = parse_batch_request(ids, fields, parse_match_from_db)
+            logger.debug(f'MongoDbService/find_matches_batch - calling matchProvider/find_matches_by_ids')
+            _matches = parse_batch_result(ids, fields, find_matches_by_ids(self, object_ids, fields),
+                                          parse_match_from_db)
+            logger.debug(f'MongoDbService/find_matches_batch - matchProvider/find_matches_by_ids succeeded')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_matches_batch failed | error: {error}')
+            raise
+
+        else:
+            return _matches
+
+    def find_leagues_batch(self, ids, fields=None):
+        logger.info(f'MongoDbService/find_leagues_batch - start | ids: {len(ids)}, fields: {fields}')
+        try:
+            object_ids, fields = parse_batch_request(ids, fields, parse_league_from_db)
+            projection = None if fields is None else {field: 1 for field in fields}
+            logger.debug(f'MongoDbService/find_leagues_batch - calling leagueProvider/find_leagues_by_ids')
+            _leagues = parse_batch_result(ids, fields, find_leagues_by_ids(self, object_ids, projection),
+                                          parse_league_from_db)
+            logger.debug(f'MongoDbService/find_leagues_batch - leagueProvider/find_leagues_by_ids succeeded')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_leagues_batch failed | error: {error}')
+            raise
+
+        else:
+            return _leagues
+
+    def find_leagues_teams(self, names, seasons):
+        """
+        Return the team names of every found league by (name, season)
+        """
+        logger.info(f'MongoDbService/find_leagues_teams - start | names: {names}, seasons: {seasons}')
+        try:
+            logger.debug(f'MongoDbService/find_leagues_teams - calling leagueProvider/find_leagues_with_team_names')
+            _leagues = {(league['name'], int(league['season'])): league.get('team_names', [])
+                        for league in find_leagues_with_team_names(self, names, seasons)}
+            logger.debug(f'MongoDbService/find_leagues_teams - leagueProvider/find_leagues_with_team_names succeeded '
+                         f'| leagues: {len(_leagues)}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_leagues_teams failed | error: {error}')
+            raise
+
+        else:
+            return _leagues
+
+    def find_match_seasons(self):
+        logger.info(f'MongoDbService/find_match_seasons - start')
+        try:
+            logger.debug(f'MongoDbService/find_match_seasons - calling matchProvider/find_match_seasons')
+            _seasons = {int(season['_id']) for season in find_match_seasons(self) if season['_id'] is not None}
+            _seasons = sorted(_seasons | archive.archived_seasons(self))
+            logger.debug(f'MongoDbService/find_match_seasons - matchProvider/find_match_seasons succeeded | '
+                         f'seasons: {_seasons}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_match_seasons failed | error: {error}')
+            raise
+
+        else:
+            return _seasons
+
+    def stream_teams_of_league(self, data):
+        """
+        Return a cursor over the league teams (without the matches arrays) sorted by name
+        """
+        logger.info(f'MongoDbService/stream_teams_of_league - start | data: {data}')
+        try:
+            logger.debug(f'MongoDbService/stream_teams_of_league - calling teamProvider/stream_teams')
+            _teams = stream_teams(self, data['teams'], data.get('season'))
+
+        except Exception as error:
+            logger.error(f'MongoDbService/stream_teams_of_league failed | error: {error}')
+            raise
+
+        else:
+            return _teams
+
+    def stream_team_history(self, team_id, season=None):
+        """
+        Return the team and a cursor over its ended matches (of every season of the team name, or of one season)
+        sorted by date
+        """
+        logger.info(f'MongoDbService/stream_team_history - start | team id: {team_id}, season: {season}')
+        try:
+            logger.debug(f'MongoDbService/stream_team_history - calling teamProvider/find_team')
+            _team = find_team(self, {'_id': team_id})
+            logger.debug(f'MongoDbService/stream_team_history - teamProvider/find_team succeeded | team: {_team}')
+
+            if _team is None:
+                raise Exception('The team is not exists')
+
+            logger.debug(f'MongoDbService/stream_team_history - calling matchProvider/stream_team_matches')
+            _matches = stream_team_matches(self, _team['name'], season, config['history']['batch_size'])
+
+        except Exception as error:
+            logger.error(f'MongoDbService/stream_team_history failed | error: {error}')
+            raise
+
+        else:
+            return _team, _matches
+
+    def stream_matches_of_league(self, season, team_names):
+        """
+        Return a cursor over the season matches (ended, live and future) between the league teams sorted by date
+        """
+        logger.info(f'MongoDbService/stream_matches_of_league - start | season: {season}, teams: {team_names}')
+        try:
+            logger.debug(f'MongoDbService/stream_matches_of_league - calling matchProvider/stream_matches_of_season')
+            _matches = stream_matches_of_season(self, season, list(team_names))
+
+        except Exception as error:
+            logger.error(f'MongoDbService/stream_matches_of_league failed | error: {error}')
+            raise
+
+        else:
+            return _matches
+
+    def find_top_teams(self, data, season, metric, k, order):
+        logger.info(f'MongoDbService/find_top_teams - start | data: {data}, season: {season}, metric: {metric}, '
+                    f'k: {k}, order: {order}')
+        try:
+            if metric not in LEADERBOARD_METRICS:
+                raise ValueError(f'metric must be one of: {", ".join(LEADERBOARD_METRICS)}')
+            if order not in ('desc', 'asc'):
+                raise ValueError('order must be desc or asc')
+            field = LEADERBOARD_METRICS[metric]
+            direction = pymongo.DESCENDING if order == 'desc' else pymongo.ASCENDING
+
+            logger.debug(f'MongoDbService/find_top_teams - calling teamProvider/find_top_teams | field: {field}')
+            _teams = [{
+                "position": position + 1,
+                "id": str(team.get("_id")),
+                "name": team.get("name"),
+                metric: team.get(field, 0),
+                "points": team.get("points", 0),
+                "goal_difference": team.get("goal_difference", 0)
+            } for position, team in enumerate(find_top_teams(self, data['teams'], season, field, k, direction))]
+            logger.debug(f'MongoDbService/find_top_teams - teamProvider/find_top_teams succeeded | teams: {_teams}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_top_teams failed | error: {error}')
+            raise
+
+        else:
+            return _teams
+
+    def recompute_ratings(self, season, batch_size=1000):
+        """
+        Replay the ended matches of a season in date order and rebuild the ratings from scratch,
+        the matches are streamed from the cursor and their rating changes are written in batches
+        """
+        logger.info(f'MongoDbService/recompute_ratings - start | season: {season}')
+        try:
+            self.check_season_not_archived(season)
+            # the buffered rating increments must land before the ratings are reset
+            write_behind.flush(self)
+            ratings = {}
+            operations = []
+            replayed = 0
+            logger.debug(f'MongoDbService/recompute_ratings - calling matchProvider/stream_ended_matches_of_season')
+            for match in stream_ended_matches_of_season(self, season, batch_size):
+                home_rating = ratings.get(match["home_team"], INITIAL_RATING)
+                away_rating = ratings.get(match["away_team"], INITIAL_RATING)
+                rating_change = match_rating_change(home_rating, away_rating, *parse_score(match["score"]))
+                ratings[match["home_team"]] = home_rating + rating_change
+                ratings[match["away_team"]] = away_rating - rating_change
+                operations.append(UpdateOne({'_id': match['_id']}, {'$set': {'rating_change': rating_change}}))
+                replayed += 1
+
+                if len(operations) >= batch_size:
+                    bulk_update_matches(self, operations)
+                    operations = []
+
+            if operations:
+                bulk_update_matches(self, operations)
+            logger.debug(f'MongoDbService/recompute_ratings - replayed matches | matches: {replayed}')
+
+            logger.debug(f'MongoDbService/recompute_ratings - calling teamProvider/reset_teams_rating')
+            reset_teams_rating(self, season)
+            seasons = [int(season), str(int(season))]
+            team_operations = [UpdateOne({'name': name, 'season': {'$in': seasons}}, {'$set': {'rating': rating}})
+                               for name, rating in ratings.items()]
+            for start in range(0, len(team_operations), batch_size):
+                bulk_update_teams(self, team_operations[start:start + batch_size])
+            logger.debug(f'MongoDbService/recompute_ratings - teamProvider/bulk_update_teams succeeded')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/recompute_ratings failed | error: {error}')
+            raise
+
+        else:
+            return {"matches": replayed, "teams": len(ratings)}
+
+    def write_team_updates(self, operations):
+        logger.info(f'MongoDbService/write_team_updates - start | operations: {len(operations)}')
+        try:
+            logger.debug(f'MongoDbService/write_team_updates - calling teamProvider/bulk_update_teams')
+            _result = bulk_update_teams(self, operations)
+            logger.debug(f'MongoDbService/write_team_updates - teamProvider/bulk_update_teams succeeded | '
+                         f'modified: {_result.modified_count}')
+
+        except Exception as error:
+            logger.error(f'MongoDbService/write_team_updates failed | error: {error}')
+            raise
+
+        else:
+            return _result.modified_count
+
+    def find_head_to_head(self, team_a, team_b, recent_matches):
+        logger.info(f'MongoDbService/find_head_to_head - start | team a: {team_a}, team b: {team_b}')
+        try:
+            logger.debug(f'MongoDbService/find_head_to_head - calling matchProvider/find_head_to_head')
+            _head_to_head = next(find_head_to_head(self, team_a, team_b, recent_matches))
+            logger.debug(
+                f'MongoDbService/find_head_to_head - matchProvider/find_head_to_head succeeded | head to head: {_head_to_head}')
+
+            record = _head_to_head['record'][0] if _head_to_head['record'] else {}
+            _head_to_head = {
+                "team_a": team_a,
+                "team_b": team_b,
+                "matches": record.get("matches", 0),
+                "team_a_wins": record.get("team_a_wins", 0),
+                "team_b_wins": record.get("team_b_wins", 0),
+                "draws": record.get("draws", 0),
+                "team_a_goals": record.get("team_a_goals", 0),
+                "team_b_goals": record.get("team_b_goals", 0),
+                "recent": [parse_match_from_db(match) for match in _head_to_head['recent']]
+            }
+
+        except Exception as error:
+            logger.error(f'MongoDbService/find_head_to_head failed | error: {error}')
+            raise
+
+        else:
+            return _head_to_head
+
     def add_match_to_team(self, data):
         logger.info(f'MongoDbService/add_match_to_team - start | data: {data}')
         try:
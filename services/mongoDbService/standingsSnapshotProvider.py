@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+from pymongo import UpdateOne, UpdateMany, DESCENDING
+
+from services.loggerServices.loggerService import LoggerService
+
+logger = LoggerService().logger
+STAT_FIELDS = ('played', 'wins', 'draws', 'losses', 'scored', 'received')
+
+"""
+The standings snapshots keep the team stats of a league per match date - `delta` holds the stats of the results
+of that date only and a checkpoint also holds `totals`, the stats of the season up to (and including) that date.
+The table at a date is the nearest checkpoint plus the deltas after it, the teams are keyed by their registry id
+"""
+
+
+def match_stats(home_goals, away_goals):
+    """
+    Return the stats of the home team and of the away team in a result
+    """
+    home_stats = {'played': 1, 'wins': int(home_goals > away_goals), 'draws': int(home_goals == away_goals),
+                  'losses': int(home_goals < away_goals), 'scored': home_goals, 'received': away_goals}
+    away_stats = {'played': 1, 'wins': home_stats['losses'], 'draws': home_stats['draws'],
+                  'losses': home_stats['wins'], 'scored': away_goals, 'received': home_goals}
+    return home_stats, away_stats
+
+
+def add_stats(totals, stats):
+    for team_id, team_stats in stats.items():
+        team_totals = totals.setdefault(team_id, dict.fromkeys(STAT_FIELDS, 0))
+        for field, value in team_stats.items():
+            team_totals[field] += value
+    return totals
+
+
+def subtract_stats(stats, previous_stats):
+    """
+    Return the change from previous_stats to stats - the delta of a corrected result
+    """
+    return {field: value - previous_stats[field] for field, value in stats.items()}
+
+
+def record_standings_delta(self, league_ids, season, date, stats):
+    """
+    Add the stats of a result to the delta of its date in every league of the teams. The checkpoints at or after
+    the date are dropped and the stamps after it are increased - a checkpoint computed concurrently from the old
+    deltas (see set_standings_totals) is either dropped by the second unset or rejected by its stamp
+    """
+    increments = {f'delta.{team_id}.{field}': value
+                  for team_id, team_stats in stats.items() for field, value in team_stats.items()}
+    operations = []
+    for league_id in league_ids:
+        later_checkpoints = {'league_id': league_id, 'date': {'$gte': date}, 'totals': {'$exists': True}}
+        operations += [
+            UpdateOne({'league_id': league_id, 'date': date},
+                      {'$inc': {**increments, 'stamp': 1}, '$setOnInsert': {'season': int(season)}}, upsert=True),
+            UpdateMany(later_checkpoints, {'$unset': {'totals': ''}}),
+            UpdateMany({'league_id': league_id, 'date': {'$gt': date}}, {'$inc': {'stamp': 1}}),
+            UpdateMany(later_checkpoints, {'$unset': {'totals': ''}})
+        ]
+    if not operations:
+        return None
+    return self.client.FMT["standings_snapshots"].bulk_write(operations, ordered=True)
+
+
+def find_standings_snapshot(self, league_id, date, checkpoint=False):
+    """
+    Find the last snapshot of the league at or before the date (the last checkpoint when checkpoint is set)
+    """
+    query = {'league_id': league_id, 'date': {'$lte': date}}
+    if checkpoint:
+        query['totals'] = {'$exists': True}
+    return self.client.FMT["standings_snapshots"].find_one(query, {'delta': 0}, sort=[('date', DESCENDING)])
+
+
+def find_standings_deltas(self, league_id, after_date, until_date):
+    query = {'league_id': league_id, 'date': {'$lte': until_date}}
+    if after_date is not None:
+        query['date']['$gt'] = after_date
+    return self.client.FMT["standings_snapshots"].find(query, {'delta': 1, 'date': 1})
+
+
+def set_standings_totals(self, snapshot_id, stamp, totals):
+    """
+    Make a snapshot a checkpoint, unless a result was recorded at or before its date in the meantime
+    """
+    return self.client.FMT["standings_snapshots"].update_one({'_id': snapshot_id, 'stamp': stamp},
+                                                             {'$set': {'totals': totals}})
+
+
+def replace_standings_snapshots(self, league_id, snapshots):
+    self.client.FMT["standings_snapshots"].delete_many({'league_id': league_id})
+    if snapshots:
+        self.client.FMT["standings_snapshots"].insert_many(snapshots)
+    return len(snapshots)
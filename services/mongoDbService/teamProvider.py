@@ -1,7 +1,40 @@
 #!/usr/bin/python3
+from pymongo import UpdateOne
+
+from services.archiveServices.archiveService import ArchiveService
+from services.configServices.configService import ConfigService
+from services.eventBusServices.eventBusService import EventBusService
 from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.archiveProvider import archive_name
+from services.ratingServices.ratingService import INITIAL_RATING
+from services.writeBehindServices.writeBehindService import WriteBehindService
 
+config = ConfigService().config
 logger = LoggerService().logger
+event_bus = EventBusService()
+write_behind = WriteBehindService()
+archive = ArchiveService()
+
+# leaderboard metric name -> the team document field
+LEADERBOARD_METRICS = {
+    "goals_scored": "number_of_scored_goals",
+    "goals_received": "number_of_received_goals",
+    "wins": "number_of_wins",
+    "losses": "number_of_losses",
+    "draws": "number_of_draws",
+    "points": "points",
+    "goal_difference": "goal_difference",
+    "rating": "rating"
+}
+RECENT_FORM_SIZE = config['recent_form']['size']
+# recent form result -> the points of the result
+FORM_POINTS = {'W': 3, 'D': 1, 'L': 0}
+# recent form result -> the counter, the matches array and the team_update event result of the result
+RESULT_FIELDS = {
+    'W': ('number_of_wins', 'matches_wins', 'win'),
+    'D': ('number_of_draws', 'matches_draw', 'draw'),
+    'L': ('number_of_losses', 'matches_loss', 'loss')
+}
 
 
 def create_team(self, data):
@@ -12,32 +45,185 @@ def update_team(self, data):
     return self.client.FMT["teams"].update_one(data, upsert=True).inserted_id
 
 
-def update_team_with_draw(self, data, goals_scored, match_id):
-    return self.client.FMT["teams"].update_one(data, {'$inc': {'number_of_scored_goals': int(goals_scored),
-                                                               'number_of_received_goals': int(goals_scored),
-                                                               'number_of_draws': 1},
-                                                      '$push': {'matches_draw': match_id}},
-                                               upsert=False)
+def recent_form_entry(result, goals_scored, goals_received, opponent, date):
+    return {'result': result, 'score': f'{int(goals_scored)}-{int(goals_received)}', 'opponent': opponent,
+            'date': date}
+
+
+def push_recent_form(entries):
+    """
+    The $push of results to the recent form - kept in date order and capped to the last RECENT_FORM_SIZE results,
+    a result recorded late is placed by its date (and dropped if it is older than the kept results)
+    """
+    return {'$each': entries, '$sort': {'date': 1}, '$slice': -RECENT_FORM_SIZE}
+
+
+def update_team_with_draw(self, data, goals_scored, match_id, rating_change=0, opponent=None, date=None):
+    return apply_team_update(self, data, {'$inc': {'number_of_scored_goals': int(goals_scored),
+                                                   'number_of_received_goals': int(goals_scored),
+                                                   'number_of_draws': 1,
+                                                   'points': 1,
+                                                   'rating': rating_change},
+                                          '$push': {'matches_draw': match_id,
+                                                    'recent_form': push_recent_form([recent_form_entry(
+                                                        'D', goals_scored, goals_scored, opponent, date)])}},
+                             'draw', match_id)
+
+
+def update_winning_team(self, data, goals_scored, goals_received, match_id, rating_change=0, opponent=None,
+                        date=None):
+    return apply_team_update(self, data, {'$inc': {'number_of_scored_goals': int(goals_scored),
+                                                   'number_of_received_goals': int(goals_received),
+                                                   'number_of_wins': 1,
+                                                   'points': 3,
+                                                   'goal_difference': int(goals_scored) - int(goals_received),
+                                                   'rating': rating_change},
+                                          '$push': {'matches_wins': match_id,
+                                                    'recent_form': push_recent_form([recent_form_entry(
+                                                        'W', goals_scored, goals_received, opponent, date)])}},
+                             'win', match_id)
+
+
+def update_losing_team(self, data, goals_scored, goals_received, match_id, rating_change=0, opponent=None,
+                       date=None):
+    return apply_team_update(self, data, {'$inc': {'number_of_scored_goals': int(goals_scored),
+                                                   'number_of_received_goals': int(goals_received),
+                                                   'number_of_losses': 1,
+                                                   'goal_difference': int(goals_scored) - int(goals_received),
+                                                   'rating': rating_change},
+                                          '$push': {'matches_loss': match_id,
+                                                    'recent_form': push_recent_form([recent_form_entry(
+                                                        'L', goals_scored, goals_received, opponent, date)])}},
+                             'loss', match_id)
 
 
-def update_winning_team(self, data, goals_scored, goals_received, match_id):
-    return self.client.FMT["teams"].update_one(data, {'$inc': {'number_of_scored_goals': int(goals_scored),
-                                                               'number_of_received_goals': int(goals_received),
-                                                               'number_of_wins': 1},
-                                                      '$push': {'matches_wins': match_id}},
-                                               upsert=False)
+def form_result(goals_scored, goals_received):
+    return 'W' if goals_scored > goals_received else 'D' if goals_scored == goals_received else 'L'
 
 
-def update_losing_team(self, data, goals_scored, goals_received, match_id):
-    return self.client.FMT["teams"].update_one(data, {'$inc': {'number_of_scored_goals': int(goals_scored),
-                                                               'number_of_received_goals': int(goals_received),
-                                                               'number_of_losses': 1},
-                                                      '$push': {'matches_loss': match_id}},
-                                               upsert=False)
+def result_increments(goals_scored, goals_received):
+    """
+    Return the counters a result adds to a team, like update_winning_team, update_losing_team and update_team_with_draw
+    """
+    result = form_result(goals_scored, goals_received)
+    return {'number_of_scored_goals': goals_scored, 'number_of_received_goals': goals_received,
+            RESULT_FIELDS[result][0]: 1, 'points': FORM_POINTS[result],
+            'goal_difference': goals_scored - goals_received}
+
+
+def correct_team_result(data, old_goals, new_goals, match_id, rating_change, opponent, date):
+    """
+    Return the update that replaces a recorded result of a team with the corrected one, and its increments -
+    the difference of the counters, the match moved to the array of the new result and the recent form entry
+    of the match rewritten in place. old_goals and new_goals are (goals scored, goals received)
+    """
+    old_increments, new_increments = result_increments(*old_goals), result_increments(*new_goals)
+    increments = {field: new_increments.get(field, 0) - old_increments.get(field, 0)
+                  for field in {**old_increments, **new_increments}}
+    increments['rating'] = rating_change
+    increments = {field: value for field, value in increments.items() if value}
+
+    old_result, new_result = form_result(*old_goals), form_result(*new_goals)
+    update = {'$set': {'recent_form.$[entry].result': new_result,
+                       'recent_form.$[entry].score': f'{new_goals[0]}-{new_goals[1]}'}}
+    if increments:
+        update['$inc'] = increments
+    if old_result != new_result:
+        update['$pull'] = {RESULT_FIELDS[old_result][1]: match_id}
+        update['$push'] = {RESULT_FIELDS[new_result][1]: match_id}
+    operation = UpdateOne(data, update, array_filters=[{'entry.opponent': opponent, 'entry.date': date}])
+    return operation, increments, RESULT_FIELDS[new_result][2]
+
+
+def apply_team_update(self, data, update, result, match_id):
+    if write_behind.enabled:
+        _result = write_behind.add(self, data, update)
+    else:
+        _result = self.client.FMT["teams"].update_one(data, update, upsert=False)
+    publish_team_update(data, update['$inc'], result, match_id)
+    return _result
+
+
+def publish_team_update(data, increments, result, match_id):
+    event_bus.publish(int(data['season']), {
+        "type": "team_update",
+        "team": data['name'],
+        "season": int(data['season']),
+        "result": result,
+        "match_id": str(match_id),
+        "delta": increments
+    }, teams=(data['name'],))
 
 
 def find_team(self, data):
-    return self.client.FMT["teams"].find_one(data)
+    # the team of an archived season is found in the archive
+    return archive.find_one(self, "teams", data)
+
+
+def find_teams_by_names(self, names, season, projection=None):
+    query = {'name': {'$in': names}, 'season': {'$in': [int(season), str(int(season))]}}
+    return archive.collection(self, "teams", season).find(query, projection)
+
+
+def find_teams_by_ids(self, team_ids, projection=None):
+    return archive.find_by_ids(self, "teams", team_ids, projection)
+
+
+def stream_teams(self, team_ids, season=None, batch_size=1000):
+    projection = {'matches_wins': 0, 'matches_loss': 0, 'matches_draw': 0}
+    return archive.collection(self, "teams", season).find({'_id': {'$in': team_ids}}, projection,
+                                                          batch_size=batch_size).sort('name', 1)
+
+
+def find_teams_by_rating(self, team_ids, season):
+    query = {'_id': {'$in': team_ids}, 'season': {'$in': [int(season), str(int(season))]}}
+    return archive.collection(self, "teams", season).find(query, {'name': 1, 'season': 1, 'rating': 1}) \
+        .sort([('rating', -1), ('name', 1)])
+
+
+def find_top_teams(self, team_ids, season, field, k, direction):
+    """
+    Sort and limit in Mongo on the (season, field, name) index, ties are broken by the team name
+    """
+    query = {'_id': {'$in': team_ids}, 'season': {'$in': [int(season), str(int(season))]}}
+    projection = {'name': 1, 'season': 1, 'points': 1, 'goal_difference': 1, field: 1}
+    return archive.collection(self, "teams", season).find(query, projection) \
+        .sort([(field, direction), ('name', 1)]).limit(k)
+
+
+def find_team_name_seasons(self):
+    """
+    Count the seasons of every team name, of the hot and the archived seasons
+    """
+    group = {'$group': {'_id': '$name', 'seasons': {'$sum': 1}}}
+    archived_seasons = [*archive.archived_seasons(self)]
+    if not archived_seasons:
+        return self.client.FMT["teams"].aggregate([group])
+    archived_seasons += [str(season) for season in archived_seasons]
+    return [*self.client.FMT["teams"].aggregate([{'$match': {'season': {'$nin': archived_seasons}}}, group]),
+            *self.client.FMT[archive_name("teams")].aggregate([{'$match': {'season': {'$in': archived_seasons}}},
+                                                               group])]
+
+
+def find_teams_without_recent_form(self, batch_size=1000):
+    return self.client.FMT["teams"].find({'recent_form': {'$exists': False}},
+                                         {'name': 1, 'matches_wins': 1, 'matches_loss': 1, 'matches_draw': 1},
+                                         batch_size=batch_size)
+
+
+def find_teams_without_points(self, batch_size=1000):
+    return self.client.FMT["teams"].find({'points': {'$exists': False}},
+                                         {'number_of_wins': 1, 'number_of_draws': 1, 'number_of_scored_goals': 1,
+                                          'number_of_received_goals': 1}, batch_size=batch_size)
+
+
+def reset_teams_rating(self, season):
+    query = {'season': {'$in': [int(season), str(int(season))]}}
+    return self.client.FMT["teams"].update_many(query, {'$set': {'rating': INITIAL_RATING}})
+
+
+def bulk_update_teams(self, operations):
+    return self.client.FMT["teams"].bulk_write(operations, ordered=False)
 
 
 def parse_team_from_request(request):
@@ -58,7 +244,11 @@ def init_team(request):
         "number_of_draws": request.get("number_of_draws", 0),
         "matches_draw": request.get("matches_draw", []),
         "number_of_scored_goals": request.get("number_of_scored_goals", 0),
-        "number_of_received_goals": request.get("number_of_received_goals", 0)
+        "number_of_received_goals": request.get("number_of_received_goals", 0),
+        "points": request.get("points", 0),
+        "goal_difference": request.get("goal_difference", 0),
+        "rating": request.get("rating", INITIAL_RATING),
+        "recent_form": request.get("recent_form", [])
     }
 
 
@@ -78,6 +268,29 @@ def find_team_least_wins(teams):
     return min(teams, key=lambda d: d['number_of_wins'])
 
 
+def compute_form_table(teams):
+    """
+    Rank the teams by the points of their recent form (the last RECENT_FORM_SIZE results),
+    ties are broken by the goal difference of the recent form and the team name
+    """
+    rows = []
+    for team in teams:
+        recent_form = team.get('recent_form', [])
+        goal_difference = 0
+        for entry in recent_form:
+            goals_scored, goals_received = entry['score'].split('-')
+            goal_difference += int(goals_scored) - int(goals_received)
+        rows.append({
+            "team": team['name'],
+            "form": ''.join(entry['result'] for entry in recent_form),
+            "points": sum(FORM_POINTS[entry['result']] for entry in recent_form),
+            "goal_difference": goal_difference,
+            "recent_form": recent_form
+        })
+    rows.sort(key=lambda row: (-row['points'], -row['goal_difference'], row['team']))
+    return [{"position": position + 1, **row} for position, row in enumerate(rows)]
+
+
 def parse_team_from_db(request):
     return {
         "id": str(request.get("_id")),
@@ -90,5 +303,9 @@ def parse_team_from_db(request):
         "number_of_draws": request.get("number_of_draws", 0),
         "matches_draw": request.get("matches_draw", []),
         "number_of_scored_goals": request.get("number_of_scored_goals", 0),
-        "number_of_received_goals": request.get("number_of_received_goals", 0)
+        "number_of_received_goals": request.get("number_of_received_goals", 0),
+        "points": request.get("points", 0),
+        "goal_difference": request.get("goal_difference", 0),
+        "rating": request.get("rating", INITIAL_RATING),
+        "recent_form": request.get("recent_form", [])
     }
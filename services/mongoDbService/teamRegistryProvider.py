@@ -0,0 +1,26 @@
+#!/usr/bin/python3
+from pymongo import ReturnDocument
+
+from services.loggerServices.loggerService import LoggerService
+
+logger = LoggerService().logger
+TEAM_ID_COUNTER = 'team_id'
+
+
+def find_registered_team(self, name):
+    return self.client.FMT["team_registry"].find_one({'name': name})
+
+
+def find_registered_teams(self, team_ids=None):
+    query = {} if team_ids is None else {'_id': {'$in': list(team_ids)}}
+    return self.client.FMT["team_registry"].find(query)
+
+
+def next_team_id(self):
+    return self.client.FMT["counters"].find_one_and_update({'_id': TEAM_ID_COUNTER}, {'$inc': {'sequence': 1}},
+                                                          upsert=True,
+                                                          return_document=ReturnDocument.AFTER)['sequence']
+
+
+def register_team(self, team_id, name):
+    return self.client.FMT["team_registry"].insert_one({'_id': team_id, 'name': name}).inserted_id
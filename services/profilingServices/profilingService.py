@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+
+from bson import ObjectId
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+# breakdown category -> the path fragments of the modules that belong to it (the first match wins)
+CATEGORIES = (
+    ("serialization", (f'{os.sep}json{os.sep}', 'ujson', 'json_util', f'sanic{os.sep}response')),
+    ("mongo", (f'{os.sep}pymongo{os.sep}', f'{os.sep}bson{os.sep}')),
+    ("validation", (f'{os.sep}jsonschema{os.sep}',)),
+    ("logging", (f'{os.sep}logging{os.sep}',))
+)
+TOP_FUNCTIONS = 20
+
+current_profile = ContextVar('current_profile', default=None)
+
+"""
+The Profiling Service profiles a sample of the requests (or the requests sent with the admin header) -
+only the steps of the profiled request itself are measured, including its writes on the admission thread pool.
+Every profile is written to the profiles directory as a .prof file and a .json summary with the time spent
+in Mongo, validation, logging and serialization
+"""
+
+
+def category(function):
+    filename = function[0]
+    for name, fragments in CATEGORIES:
+        if any(fragment in filename for fragment in fragments):
+            return name
+    return None
+
+
+def breakdown(stats):
+    """
+    Sum the own time of the functions per category, the time of the built-in functions (socket reads,
+    C encoders) goes to the category of their callers
+    """
+    totals = {name: 0.0 for name, _ in CATEGORIES}
+    totals["other"] = 0.0
+    for function, (_, _, own_time, _, callers) in stats.stats.items():
+        function_category = category(function)
+        if function_category is not None:
+            totals[function_category] += own_time
+        elif function[0] == '~' and callers:
+            for caller, caller_stats in callers.items():
+                totals[category(caller) or "other"] += caller_stats[2]
+        else:
+            totals["other"] += own_time
+    return {name: round(seconds, 6) for name, seconds in totals.items()}
+
+
+class ProfileSession:
+    def __init__(self, route):
+        self.id = str(ObjectId())
+        self.route = route
+        self.profiles = [cProfile.Profile()]
+        self.lock = Lock()
+        self.started_at = time.perf_counter()
+
+    def wrap(self, function):
+        """
+        Profile a function that runs on another thread with its own profiler
+        """
+        def profiled_function(*args, **kwargs):
+            profile = cProfile.Profile()
+            with self.lock:
+                self.profiles.append(profile)
+            profile.enable()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profile.disable()
+        return profiled_function
+
+    def run(self, coroutine):
+        return ProfiledCoroutine(coroutine, self.profiles[0])
+
+    def stats(self):
+        with self.lock:
+            profiles = [profile for profile in self.profiles if profile.getstats()]
+        stats = pstats.Stats(profiles[0]) if profiles else None
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+class ProfiledCoroutine:
+    """
+    Drive a coroutine with the profiler enabled only while the coroutine itself runs,
+    the other requests that run while it awaits are not measured
+    """
+    def __init__(self, coroutine, profile):
+        self.coroutine = coroutine
+        self.profile = profile
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                if error is not None:
+                    awaited = self.coroutine.throw(error)
+                else:
+                    awaited = self.coroutine.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+            try:
+                value, error = (yield awaited), None
+            except BaseException as exception:
+                value, error = None, exception
+
+
+class ProfilingService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.sample_rate = config['profiling']['sample_rate']
+        self.header = config['profiling']['header']
+        self.admin_token = config['profiling']['admin_token']
+        self.directory = config['profiling']['directory']
+
+    def should_profile(self, request):
+        if self.admin_token and request.headers.get(self.header) == self.admin_token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def save(self, session, request, response):
+        wall_time = time.perf_counter() - session.started_at
+        stats = session.stats()
+        if stats is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{session.route}-{session.id}')
+        stats.dump_stats(f'{path}.prof')
+
+        top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        summary = {
+            "id": session.id,
+            "route": session.route,
+            "method": request.method,
+            "path": request.path,
+            "status": getattr(response, 'status', None),
+            "wall_time": round(wall_time, 6),
+            "profiled_time": round(stats.total_tt, 6),
+            "breakdown": breakdown(stats),
+            "top": [{
+                "function": f'{filename}:{line}({name})',
+                "calls": calls,
+                "own_time": round(own_time, 6),
+                "cumulative_time": round(cumulative_time, 6)
+            } for (filename, line, name), (_, calls, own_time, cumulative_time, _) in top]
+        }
+        with open(f'{path}.json', 'w') as summary_file:
+            json.dump(summary, summary_file, indent=2)
+        logger.info(f'ProfilingService/save - profile written | route: {session.route}, path: {path}.json, '
+                    f'wall time: {summary["wall_time"]}, breakdown: {summary["breakdown"]}')
+        return session.id
+
+
+def profiled(handler):
+    """
+    Profile the handler when the request is sampled or sent with the admin header, otherwise call it as is
+    """
+    profiling = ProfilingService()
+
+    @wraps(handler)
+    async def profiled_handler(request, *args, **kwargs):
+        if not profiling.should_profile(request):
+            return await handler(request, *args, **kwargs)
+
+        session = ProfileSession(handler.__name__)
+        token = current_profile.set(session)
+        response = None
+        try:
+            response = await session.run(handler(request, *args, **kwargs))
+            return response
+        finally:
+            current_profile.reset(token)
+            try:
+                if profiling.save(session, request, response) is not None and response is not None:
+                    response.headers['X-Profile-Id'] = session.id
+            except Exception as error:
+                logger.error(f'ProfilingService/profiled - saving the profile failed | error: {error}')
+
+    return profiled_handler
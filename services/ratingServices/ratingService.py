@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+
+from services.configServices.configService import ConfigService
+
+config = ConfigService().config
+
+INITIAL_RATING = config['rating']['initial']
+K_FACTOR = config['rating']['k_factor']
+HOME_ADVANTAGE = config['rating']['home_advantage']
+
+"""
+The Rating Service holds the Elo rating formulas - a match moves the home team rating by the returned change
+and the away team rating by the opposite change, so the sum of the ratings never changes
+"""
+
+
+def expected_score(rating, opponent_rating):
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def match_rating_change(home_rating, away_rating, home_goals, away_goals):
+    if home_goals > away_goals:
+        home_score = 1
+    elif home_goals == away_goals:
+        home_score = 0.5
+    else:
+        home_score = 0
+    # a wider margin moves the ratings further (the World Football Elo goal difference multiplier)
+    margin = abs(home_goals - away_goals)
+    if margin <= 1:
+        multiplier = 1
+    elif margin == 2:
+        multiplier = 1.5
+    else:
+        multiplier = (11 + margin) / 8
+    change = K_FACTOR * multiplier * (home_score - expected_score(home_rating + HOME_ADVANTAGE, away_rating))
+    return round(change, 2)
@@ -0,0 +1,201 @@
+#!/usr/bin/python3
+
+import asyncio
+import re
+import time
+from ast import literal_eval
+from datetime import datetime
+from urllib.parse import quote
+
+import httpx
+
+from services.loggerServices.loggerService import LoggerService
+
+logger = LoggerService().logger
+
+LOG_TIME_FORMAT = '%Y-%m-%d %H:%M:%S,%f'
+LINE_PATTERN = re.compile(r'^(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - INFO - '
+                          r'Server/(?P<title>.+?) - start \| (?P<fields>.*)$')
+# the title of the start log line of a route -> the method, the path and the fields of the line. {json} is the
+# request body and {args} the query arguments, the other fields are the path parameters
+REPLAY_ROUTES = {
+    'Create League': ('POST', '/league', 'request: {json}'),
+    'Get League by name & season': ('GET', '/league/{name}/{season}', 'name: {name}, season: {season}'),
+    'Get League by id': ('GET', '/league/{id}', 'id: {id}'),
+    'Add Team To League': ('POST', '/league/add_team', 'request: {json}'),
+    'Generate League Fixtures': ('POST', '/league/{id}/generate_fixtures', 'league id: {id}, request: {json}'),
+    'Get Team that score the most in league': ('GET', '/league/most_goals/{name}/{season}',
+                                               'name: {name}, season: {season}'),
+    'Get Team that score the least in league': ('GET', '/league/least_goals/{name}/{season}',
+                                                'name: {name}, season: {season}'),
+    'Get Team that win the most in league': ('GET', '/league/most_wins/{name}/{season}',
+                                             'name: {name}, season: {season}'),
+    'Get Team that win the least in league': ('GET', '/league/least_wins/{name}/{season}',
+                                              'name: {name}, season: {season}'),
+    'Get League Top Teams': ('GET', '/league/top/{metric}/{name}/{season}',
+                             'metric: {metric}, name: {name}, season: {season}, args: {args}'),
+    'Get League Standings': ('GET', '/league/standings/{name}/{season}',
+                             'name: {name}, season: {season}, args: {args}'),
+    'Get Standings': ('GET', '/standings', 'args: {args}'),
+    'Get League Home & Away Splits': ('GET', '/league/home_away/{name}/{season}', 'name: {name}, season: {season}'),
+    'Get League Clean Sheets': ('GET', '/league/clean_sheets/{name}/{season}', 'name: {name}, season: {season}'),
+    'Get League Form': ('GET', '/league/form/{name}/{season}', 'name: {name}, season: {season}'),
+    'Get League Matchday Tables': ('GET', '/league/matchdays/{name}/{season}', 'name: {name}, season: {season}'),
+    'Get League Matchday': ('GET', '/league/matchday/{name}/{season}/{matchday}',
+                            'name: {name}, season: {season}, matchday: {matchday}'),
+    'Get League Simulation': ('GET', '/league/simulate/{name}/{season}',
+                              'name: {name}, season: {season}, args: {args}'),
+    'Get League Ratings': ('GET', '/league/ratings/{name}/{season}', 'name: {name}, season: {season}'),
+    'Recompute Ratings': ('POST', '/ratings/recompute', 'request: {json}'),
+    'Get Leagues Batch': ('POST', '/leagues/batch', 'request: {json}'),
+    'Create Team': ('POST', '/team', 'request: {json}'),
+    'Get team by name & season': ('GET', '/team/{name}/{season}', 'name: {name}, season: {season}'),
+    'Get Team by id': ('GET', '/team/{id}', 'id: {id}'),
+    'Get Team History': ('GET', '/team/{id}/history', 'id: {id}, args: {args}'),
+    'Get Teams Batch': ('POST', '/teams/batch', 'request: {json}'),
+    'Get Teams Search': ('GET', '/teams/search', 'request: {args}'),
+    'Create Future Match': ('POST', '/future_match', 'request: {json}'),
+    'Create Ended Match': ('POST', '/ended_match', 'request: {json}'),
+    'Correct Ended Match': ('PUT', '/ended_match/{id}', 'id: {id}, request: {json}'),
+    'Create Live Match': ('POST', '/live_match', 'request: {json}'),
+    'Add Live Match Goal': ('POST', '/live_match/{id}/goal', 'id: {id}, request: {json}'),
+    'Finalize Live Match': ('POST', '/live_match/{id}/finalize', 'id: {id}'),
+    'Get Match by home_team, away_team & date': ('GET', '/match/{home_team}/{away_team}/{date}',
+                                                 'home_team: {home_team}, away_team: {away_team}, date: {date}'),
+    'Get Match by id': ('GET', '/match/{id}', 'id: {id}'),
+    'Get Head to Head': ('GET', '/head_to_head/{team_a}/{team_b}', 'team_a: {team_a}, team_b: {team_b}, '
+                                                                    'args: {args}'),
+    'Get Matches Batch': ('POST', '/matches/batch', 'request: {json}'),
+    'Get Matches by date range': ('GET', '/matches', 'args: {args}'),
+    'Export League': ('GET', '/export/{name}/{season}', 'name: {name}, season: {season}, args: {args}')
+}
+
+"""
+The Replay Service turns the start log lines of the routes (logs/FMT-*.log) back into requests and sends them to
+a server with the time gaps of the log (divided by the speed), at most `concurrency` requests at once.
+The report has the throughput and the latency percentiles of every route, and the lag - how late the requests
+were sent (the server, or the concurrency, could not keep up with the load of the log)
+"""
+
+
+def fields_pattern(fields):
+    parts = re.split(r'\{(\w+)\}', fields)
+    return re.compile(''.join(re.escape(part) if index % 2 == 0 else f'(?P<{part}>.*?)'
+                              for index, part in enumerate(parts)) + '$')
+
+
+FIELDS_PATTERNS = {title: fields_pattern(fields) for title, (_, _, fields) in REPLAY_ROUTES.items()}
+
+
+def parse_log_line(line):
+    """
+    Return the request of a route start log line - {time, title, method, path, json, args}, or None
+    for any other line (and a route that can not be replayed, like the websockets)
+    """
+    line_match = LINE_PATTERN.match(line.rstrip('\n'))
+    if line_match is None or line_match['title'] not in REPLAY_ROUTES:
+        return None
+    title = line_match['title']
+    fields_match = FIELDS_PATTERNS[title].match(line_match['fields'])
+    if fields_match is None:
+        return None
+    fields = fields_match.groupdict()
+    try:
+        body = literal_eval(fields.pop('json')) if 'json' in fields else None
+        args = literal_eval(fields.pop('args')) if 'args' in fields else None
+    except (ValueError, SyntaxError):
+        logger.error(f'ReplayService/parse_log_line - the request can not be parsed | line: {line.strip()}')
+        return None
+    method, path, _ = REPLAY_ROUTES[title]
+    return {
+        "time": datetime.strptime(line_match['time'], LOG_TIME_FORMAT),
+        "title": title,
+        "method": method,
+        "path": path.format(**{name: quote(value, safe='') for name, value in fields.items()}),
+        "json": body,
+        "args": args or None
+    }
+
+
+def parse_logs(paths, titles=None):
+    """
+    Yield the requests of the log files in the order of the files and the lines
+    """
+    for path in paths:
+        with open(path, errors='replace') as log_file:
+            for line in log_file:
+                request = parse_log_line(line)
+                if request is not None and (titles is None or request['title'] in titles):
+                    yield request
+
+
+def percentile(latencies, value):
+    return round(latencies[min(int(value * len(latencies)), len(latencies) - 1)] * 1000, 3) if latencies else 0.0
+
+
+def latency_report(latencies):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 0.5),
+        "p90_ms": percentile(latencies, 0.9),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0
+    }
+
+
+async def replay(requests, url, speed=1.0, concurrency=50, timeout=30.0):
+    """
+    Send the requests in the log time gaps divided by speed (a speed of 0 sends them as fast as the concurrency
+    allows) and return the report
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {}
+    statuses = {}
+    lags = []
+    pending = set()
+    first_time = None
+
+    async def send(client, request):
+        started_at = time.perf_counter()
+        try:
+            response = await client.request(request['method'], request['path'], json=request['json'],
+                                            params=request['args'])
+            status = response.status_code
+        except Exception as error:
+            logger.error(f'ReplayService/replay - request failed | path: {request["path"]}, error: {error}')
+            status = type(error).__name__
+        finally:
+            semaphore.release()
+        latencies.setdefault(request['title'], []).append(time.perf_counter() - started_at)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    limits = httpx.PoolLimits(soft_limit=concurrency, hard_limit=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, pool_limits=limits) as client:
+        started_at = time.perf_counter()
+        for request in requests:
+            if first_time is None:
+                first_time = request['time']
+            due = (request['time'] - first_time).total_seconds() / speed if speed else 0.0
+            delay = due - (time.perf_counter() - started_at)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await semaphore.acquire()
+            lags.append(max(time.perf_counter() - started_at - due, 0.0))
+            task = asyncio.ensure_future(send(client, request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.wait(pending)
+        duration = time.perf_counter() - started_at
+
+    total = sum(len(route_latencies) for route_latencies in latencies.values())
+    return {
+        "requests": total,
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(total / duration, 3) if duration else 0.0,
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=lambda item: str(item[0]))},
+        "latency": latency_report([latency for route_latencies in latencies.values() for latency in route_latencies]),
+        "lag": latency_report(lags),
+        "routes": {title: latency_report(route_latencies) for title, route_latencies in sorted(latencies.items())}
+    }
@@ -0,0 +1,69 @@
+#!/usr/bin/python3
+
+import sys
+from threading import Lock
+
+from pymongo.errors import DuplicateKeyError
+
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.teamRegistryProvider import (find_registered_team, find_registered_teams, next_team_id,
+                                                          register_team)
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+logger = LoggerService().logger
+
+"""
+The Team Registry Service gives every team name a small integer id - the matches store the ids instead of the names.
+A name never changes its id, so the names and ids are cached (and the names interned) for the process lifetime
+"""
+
+
+class TeamRegistryService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.ids = {}
+        self.names = {}
+        self.lock = Lock()
+
+    def remember(self, team_id, name):
+        name = sys.intern(name)
+        with self.lock:
+            self.ids[name] = team_id
+            self.names[team_id] = name
+        return name
+
+    def load(self, db):
+        for team in find_registered_teams(db):
+            self.remember(team['_id'], team['name'])
+        logger.info(f'TeamRegistryService/load - teams loaded | teams: {len(self.ids)}')
+        return len(self.ids)
+
+    def team_id(self, db, name, create=False):
+        """
+        Return the id of a team name, a new name gets the next id when create is set (otherwise None)
+        """
+        team_id = self.ids.get(name)
+        if team_id is not None:
+            return team_id
+
+        team = find_registered_team(db, name)
+        if team is None:
+            if not create:
+                return None
+            team_id = next_team_id(db)
+            try:
+                register_team(db, team_id, name)
+                logger.info(f'TeamRegistryService/team_id - team registered | name: {name}, id: {team_id}')
+            except DuplicateKeyError:
+                # registered by another worker in the meantime, the counter value is skipped
+                team_id = find_registered_team(db, name)['_id']
+        else:
+            team_id = team['_id']
+        self.remember(team_id, name)
+        return team_id
+
+    def team_name(self, db, team_id):
+        name = self.names.get(team_id)
+        if name is None:
+            for team in find_registered_teams(db, [team_id]):
+                name = self.remember(team['_id'], team['name'])
+        return name
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+import asyncio
+import re
+from bisect import bisect_left, insort
+from threading import Lock
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+"""
+The Team Search Service suggests team names for a prefix from an in-memory sorted array - every word of a team name
+is a key (casefolded), so "mad" finds "real madrid". A prefix is a bisect over the keys, the candidates are ranked
+by an exact name match, a match at the start of the name and the number of seasons of the team
+"""
+
+
+def search_keys(name):
+    """
+    Return the keys of a team name - the name from every word start
+    """
+    key = name.casefold()
+    return [key[match.start():] for match in re.finditer(r'\w+', key)] or [key]
+
+
+class TeamSearchService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.default_limit = config['team_search']['default_limit']
+        self.max_limit = config['team_search']['max_limit']
+        self.max_candidates = config['team_search']['max_candidates']
+        self.refresh_interval = config['team_search']['refresh_interval']
+        # sorted (key, name) pairs, the seasons of every name
+        self.keys = []
+        self.seasons = {}
+        self.lock = Lock()
+
+    def build(self, seasons):
+        keys = sorted({(key, name) for name in seasons for key in search_keys(name)})
+        with self.lock:
+            self.keys = keys
+            self.seasons = seasons
+
+    def load(self, db):
+        """
+        Build the index from the team documents - the teams created by the other workers are added here
+        """
+        seasons = db.find_team_name_seasons()
+        self.build(seasons)
+        logger.info(f'TeamSearchService/load - teams loaded | teams: {len(seasons)}, keys: {len(self.keys)}')
+        return len(seasons)
+
+    def add(self, name):
+        """
+        Add a created team (a new season of a team only increases its seasons)
+        """
+        with self.lock:
+            if name in self.seasons:
+                self.seasons[name] += 1
+                return False
+            self.seasons[name] = 1
+            for key in set(search_keys(name)):
+                insort(self.keys, (key, name))
+        return True
+
+    def parse_limit(self, limit):
+        limit = self.default_limit if limit is None else int(limit)
+        if not 0 < limit <= self.max_limit:
+            raise ValueError(f'limit must be between 1 and {self.max_limit}')
+        return limit
+
+    def search(self, prefix, limit):
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            raise ValueError('prefix must not be empty')
+
+        candidates = {}
+        with self.lock:
+            keys, seasons = self.keys, self.seasons
+            index = bisect_left(keys, (prefix, ''))
+            while index < len(keys) and len(candidates) < self.max_candidates and keys[index][0].startswith(prefix):
+                key, name = keys[index]
+                # a name matched at its start ranks above a name matched at a later word
+                candidates[name] = candidates.get(name, False) or name.casefold() == key
+                index += 1
+
+        ranked = sorted(candidates, key=lambda name: (name.casefold() != prefix, not candidates[name],
+                                                      -seasons.get(name, 0), len(name), name))
+        return [{"name": name, "seasons": seasons.get(name, 0)} for name in ranked[:limit]]
+
+    async def run_refresher(self, db):
+        logger.info(f'TeamSearchService/run_refresher - start | refresh interval: {self.refresh_interval}')
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await loop.run_in_executor(None, self.load, db)
+            except Exception as error:
+                logger.error(f'TeamSearchService/run_refresher - load failed | error: {error}')
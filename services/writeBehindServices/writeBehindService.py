@@ -0,0 +1,191 @@
+#!/usr/bin/python3
+
+import asyncio
+import fcntl
+import glob
+import os
+import time
+from threading import RLock
+
+from bson import json_util
+from pymongo import UpdateOne
+
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.singletonService.singletonServiceMetaClass import SingletonMetaClass
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+"""
+The Write Behind Service merges the team stat updates ($inc and $push) of the same team in memory and writes them
+as one bulk_write every flush interval or max pending operations.
+Every accepted update is first appended to a local journal, so the updates of a crashed worker are replayed
+by the next worker that starts. The updates are idempotent - a team update is applied only if its match id
+is not in the team's matches arrays yet, so a journal that was already flushed can be replayed safely.
+"""
+
+
+def is_push_modifier(value):
+    """
+    A $push with modifiers ($each, $sort, $slice) - the recent form, the other pushes are match ids
+    """
+    return isinstance(value, dict) and '$each' in value
+
+
+class WriteBehindService(metaclass=SingletonMetaClass):
+    def __init__(self):
+        self.enabled = config['write_behind']['enabled']
+        self.flush_interval = config['write_behind']['flush_interval_ms'] / 1000
+        self.max_pending_operations = config['write_behind']['max_pending_operations']
+        self.journal_directory = config['write_behind']['journal_directory']
+        self.journal_fsync = config['write_behind']['journal_fsync']
+        self.pending = {}
+        self.pending_operations = 0
+        self.failed = []
+        self.journal = None
+        self.journal_path = None
+        self.lock = RLock()
+
+    def open_journal(self):
+        os.makedirs(self.journal_directory, exist_ok=True)
+        self.journal_path = os.path.join(self.journal_directory, f'team_stats-{os.getpid()}.journal')
+        self.journal = open(self.journal_path, 'a')
+        # the lock tells the other workers that this journal is not orphaned
+        fcntl.flock(self.journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def add(self, db, data, update):
+        record = json_util.dumps({'filter': data, 'update': update})
+        with self.lock:
+            if self.journal is None:
+                self.open_journal()
+            self.journal.write(record + '\n')
+            self.journal.flush()
+            if self.journal_fsync:
+                os.fsync(self.journal.fileno())
+
+            merged = self.pending.setdefault((data['name'], data['season']), {'filter': data, '$inc': {}, '$push': {}})
+            for field, value in update['$inc'].items():
+                merged['$inc'][field] = merged['$inc'].get(field, 0) + value
+            for field, value in update['$push'].items():
+                if is_push_modifier(value):
+                    # a capped array, the values are pushed together and sorted and sliced once
+                    merged['$push'].setdefault(field, {**value, '$each': []})['$each'].extend(value['$each'])
+                else:
+                    merged['$push'].setdefault(field, []).append(value)
+            self.pending_operations += 1
+            should_flush = self.pending_operations >= self.max_pending_operations
+
+        if should_flush:
+            self.flush(db)
+        return True
+
+    def rotate(self):
+        """
+        Take the pending updates and move their journal aside as a segment, the segment stays open (and locked)
+        until its updates are written
+        """
+        with self.lock:
+            pending, self.pending, self.pending_operations = self.pending, {}, 0
+            if not pending:
+                return None
+            segment_path = f'{self.journal_path}.{time.time_ns()}.flushing'
+            os.rename(self.journal_path, segment_path)
+            segment = self.journal
+            self.open_journal()
+
+        operations = []
+        for merged in pending.values():
+            # skip the team if the updates were already written (a replay after a crash)
+            query = {**merged['filter'], **{field: {'$nin': match_ids} for field, match_ids in merged['$push'].items()
+                                            if not is_push_modifier(match_ids)}}
+            operations.append(UpdateOne(query, {'$inc': merged['$inc'],
+                                                '$push': {field: match_ids if is_push_modifier(match_ids)
+                                                          else {'$each': match_ids}
+                                                          for field, match_ids in merged['$push'].items()}}))
+        return operations, segment, segment_path
+
+    def flush(self, db):
+        with self.lock:
+            batches = self.failed
+            self.failed = []
+            rotated = self.rotate()
+            if rotated is not None:
+                batches.append(rotated)
+
+        written = 0
+        for index, (operations, segment, segment_path) in enumerate(batches):
+            try:
+                written += db.write_team_updates(operations)
+            except Exception as error:
+                logger.error(f'WriteBehindService/flush failed - the updates will be retried | error: {error}')
+                with self.lock:
+                    self.failed.extend(batches[index:])
+                break
+            os.unlink(segment_path)
+            segment.close()
+        return written
+
+    def recover(self, db, batch_size=1000):
+        """
+        Replay the journals of workers that stopped before flushing them
+        """
+        replayed = 0
+        paths = glob.glob(os.path.join(self.journal_directory, '*.flushing')) + \
+            glob.glob(os.path.join(self.journal_directory, '*.journal'))
+        for path in sorted(paths):
+            if path == self.journal_path:
+                continue
+            try:
+                journal = open(path, 'r')
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                # the journal of a running worker
+                journal.close()
+                continue
+
+            operations = []
+            for line in journal:
+                if not line.strip():
+                    continue
+                try:
+                    record = json_util.loads(line)
+                except ValueError:
+                    # the last line of a journal that crashed in the middle of a write
+                    logger.warning(f'WriteBehindService/recover - skipping a partial journal record | path: {path}')
+                    continue
+                query = {**record['filter'], **{field: {'$ne': match_id}
+                                                for field, match_id in record['update']['$push'].items()
+                                                if not is_push_modifier(match_id)}}
+                operations.append(UpdateOne(query, record['update']))
+                if len(operations) >= batch_size:
+                    replayed += db.write_team_updates(operations)
+                    operations = []
+            if operations:
+                replayed += db.write_team_updates(operations)
+
+            os.unlink(path)
+            journal.close()
+            logger.info(f'WriteBehindService/recover - journal replayed | path: {path}')
+        return replayed
+
+    def close(self, db):
+        self.flush(db)
+        with self.lock:
+            if self.journal is not None and not self.pending and not self.failed:
+                os.unlink(self.journal_path)
+                self.journal.close()
+                self.journal = None
+
+    async def run_flusher(self, db):
+        logger.info(f'WriteBehindService/run_flusher - start | flush interval: {self.flush_interval}')
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # the journal rotation and the bulk writes block, they run off the event loop
+                await asyncio.get_event_loop().run_in_executor(None, self.flush, db)
+            except Exception as error:
+                logger.error(f'WriteBehindService/run_flusher - flush failed | error: {error}')
@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+
+import argparse
+
+from services.analyticsServices.analyticsService import AnalyticsService, write_snapshot
+from services.configServices.configService import ConfigService
+from services.loggerServices.loggerService import LoggerService
+from services.mongoDbService.mongoDbService import MongoDbService
+
+config = ConfigService().config
+logger = LoggerService().logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Write the season match arrays to the snapshot file the server '
+                                                 'workers map on start')
+    parser.add_argument('--seasons', type=int, nargs='*', help='the seasons to include (default: every season)')
+    parser.add_argument('--output', default=config['analytics']['snapshot_path'], help='the snapshot file path')
+    args = parser.parse_args()
+
+    logger.info(f'Snapshot - start | seasons: {args.seasons}, output: {args.output}')
+    db = MongoDbService()
+    analytics = AnalyticsService()
+    seasons = args.seasons or db.find_match_seasons()
+    season_arrays = [analytics.get_season(db, season, force_refresh=True) for season in seasons]
+    write_snapshot(args.output, season_arrays)
+    logger.info(f'Snapshot - end | seasons: {seasons}, matches: {sum(len(arrays) for arrays in season_arrays)}')
+    print(f'{args.output}: {len(season_arrays)} seasons, {sum(len(arrays) for arrays in season_arrays)} matches')
+
+
+if __name__ == '__main__':
+    main()
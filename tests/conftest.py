@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+
+import mongomock
+import mongomock.database
+import pymongo
+import pytest
+
+from services.analyticsServices.analyticsService import AnalyticsService
+from services.mongoDbService.mongoDbService import MongoDbService
+from services.teamRegistryServices.teamRegistryService import TeamRegistryService
+
+"""
+The tests run the services against an in-memory mongomock client - every test gets an empty database
+and the process caches of the services (the team registry, the analytics seasons) are emptied
+"""
+
+
+@pytest.fixture
+def db(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: client)
+    # mongomock does not take the storage options (the compression of the archive collections)
+    create_collection = mongomock.database.Database.create_collection
+    monkeypatch.setattr(mongomock.database.Database, 'create_collection',
+                        lambda self, name, **kwargs: create_collection(self, name))
+
+    registry = TeamRegistryService()
+    registry.ids.clear()
+    registry.names.clear()
+    AnalyticsService().invalidate()
+    return MongoDbService()
+
+
+
+@pytest.fixture
+def league(db):
+    """
+    The id of a 2019 league of three teams
+    """
+    league_id = db.create_league({"name": 'Eredivisie', "season": 2019, "teams": []})
+    for name in ('Ajax', 'PSV', 'Feyenoord'):
+        db.add_team_to_league({"league_id": league_id, "team_id": db.create_team({"name": name, "season": 2019})})
+    return league_id
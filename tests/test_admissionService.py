@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+
+import asyncio
+import threading
+
+import pytest
+
+from services.admissionServices.admissionService import AdmissionService, OverloadedError
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    admission = AdmissionService()
+    monkeypatch.setattr(admission, 'gates', {})
+    monkeypatch.setattr(admission, 'route_limits', {
+        'test': {"concurrency": 1, "queue_size": 1, "queue_timeout": 0.2}
+    })
+    return admission
+
+
+def test_full_queue_is_shed(admission):
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(admission.run('test', release.wait, 1))
+        second = asyncio.ensure_future(admission.run('test', lambda: 'second'))
+        await asyncio.sleep(0.01)
+        with pytest.raises(OverloadedError) as overloaded:
+            await admission.run('test', lambda: 'third')
+        release.set()
+        return overloaded.value, await first, await second
+
+    overloaded, first, second = asyncio.run(run())
+
+    assert (overloaded.status, overloaded.retry_after) == (429, admission.retry_after)
+    assert (first, second) == (True, 'second')
+    assert admission.metrics()['test'] == {"concurrency": 1, "queue_size": 1, "active": 0, "queued": 0,
+                                           "admitted": 2, "shed": 1, "timed_out": 0}
+
+
+def test_queue_wait_times_out(admission):
+    release = threading.Event()
+
+    async def run():
+        first = asyncio.ensure_future(admission.run('test', release.wait, 1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(OverloadedError) as overloaded:
+            await admission.run('test', lambda: 'second')
+        release.set()
+        await first
+        return overloaded.value, await admission.run('test', lambda: 'third')
+
+    overloaded, third = asyncio.run(run())
+
+    assert overloaded.status == 503
+    assert third == 'third'
+    assert admission.metrics()['test']['timed_out'] == 1
+
+
+def test_errors_are_raised_and_release_the_slot(admission):
+    def fail():
+        raise ValueError('invalid request')
+
+    async def run():
+        with pytest.raises(ValueError):
+            await admission.run('test', fail)
+        return await admission.run('test', lambda: 'next')
+
+    assert asyncio.run(run()) == 'next'
+    assert admission.metrics()['test']['active'] == 0
@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+
+import numpy as np
+from bson import ObjectId
+
+from services.analyticsServices.analyticsService import (AnalyticsService, SeasonArrays, compute_clean_sheets,
+                                                         compute_home_away_splits, compute_standings,
+                                                         compute_standings_from_stats, load_snapshot, select_teams,
+                                                         write_snapshot)
+
+RESULTS = [
+    ('Ajax', 'PSV', '2-1', '2019-08-03'),
+    ('Feyenoord', 'Ajax', '0-0', '2019-08-10'),
+    ('PSV', 'Feyenoord', '3-1', '2019-08-17'),
+    ('PSV', 'Ajax', '1-1', '2019-08-24'),
+    ('Ajax', 'Feyenoord', '4-0', '2019-08-31')
+]
+
+
+def season_arrays(results=RESULTS):
+    arrays = SeasonArrays(2019)
+    arrays.extend({"home_team": home_team, "away_team": away_team, "score": score, "date": date,
+                   "result_id": ObjectId()} for home_team, away_team, score, date in results)
+    return arrays
+
+
+def table(standings):
+    return {row['team']: row for row in standings}
+
+
+def test_compute_standings():
+    standings = compute_standings(season_arrays())
+
+    assert [row['team'] for row in standings] == ['Ajax', 'PSV', 'Feyenoord']
+    assert standings[0] == {"position": 1, "team": 'Ajax', "played": 4, "number_of_wins": 2, "number_of_draws": 2,
+                            "number_of_losses": 0, "number_of_scored_goals": 7, "number_of_received_goals": 2,
+                            "goal_difference": 5, "points": 8}
+    assert table(standings)['Feyenoord']['points'] == 1
+    assert sum(row['number_of_wins'] for row in standings) == sum(row['number_of_losses'] for row in standings)
+
+
+def test_compute_standings_matches_the_stats_table():
+    stats = {}
+    for home_team, away_team, score, _ in RESULTS:
+        home_goals, away_goals = map(int, score.split('-'))
+        for team, scored, received in ((home_team, home_goals, away_goals), (away_team, away_goals, home_goals)):
+            team_stats = stats.setdefault(team, {})
+            result = 'wins' if scored > received else 'draws' if scored == received else 'losses'
+            team_stats[result] = team_stats.get(result, 0) + 1
+            team_stats['scored'] = team_stats.get('scored', 0) + scored
+            team_stats['received'] = team_stats.get('received', 0) + received
+
+    assert compute_standings(season_arrays()) == compute_standings_from_stats(stats, ['Ajax', 'PSV', 'Feyenoord'])
+
+
+def test_compute_standings_of_selected_teams_counts_only_their_matches():
+    standings = table(compute_standings(season_arrays(), ['Ajax', 'PSV']))
+
+    assert set(standings) == {'Ajax', 'PSV'}
+    assert standings['Ajax']['played'] == 2
+    assert standings['Ajax']['points'] == 4
+    assert standings['PSV']['points'] == 1
+
+
+def test_select_teams_keeps_unplayed_teams():
+    arrays = season_arrays()
+    teams, names, mask = select_teams(arrays, ['Ajax', 'Vitesse'])
+
+    assert names == ['Ajax', 'Vitesse']
+    assert teams.tolist() == [arrays.team_index['Ajax'], len(arrays.team_names)]
+    assert not mask.any()
+
+
+def test_unplayed_teams_get_zero_rows():
+    standings = table(compute_standings(season_arrays(), ['Ajax', 'PSV', 'Vitesse']))
+    splits = table(compute_home_away_splits(season_arrays(), ['Ajax', 'PSV', 'Vitesse']))
+    clean_sheets = table(compute_clean_sheets(season_arrays(), ['Ajax', 'Vitesse']))
+
+    assert standings['Vitesse']['position'] == 3
+    assert standings['Vitesse']['played'] == 0
+    assert standings['Vitesse']['points'] == 0
+    assert standings['Ajax']['played'] == 2
+    assert splits['Vitesse']['home']['number_of_wins'] == 0
+    assert splits['Ajax']['home']['number_of_wins'] == 1
+    assert clean_sheets['Vitesse']['clean_sheets'] == 0
+
+
+def test_compute_standings_of_an_empty_season():
+    standings = compute_standings(SeasonArrays(2019), ['Ajax', 'PSV'])
+
+    assert [(row['team'], row['played']) for row in standings] == [('Ajax', 0), ('PSV', 0)]
+
+
+def test_get_season_appends_the_new_results(db):
+    analytics = AnalyticsService()
+    for home_team, away_team, score, date in RESULTS[:3]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    assert len(analytics.get_season(db, 2019, force_refresh=True)) == 3
+
+    for home_team, away_team, score, date in RESULTS[3:]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    arrays = analytics.get_season(db, 2019, force_refresh=True)
+
+    assert len(arrays) == 5
+    assert compute_standings(arrays) == compute_standings(season_arrays())
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'analytics.snapshot')
+    arrays, empty = season_arrays(), SeasonArrays(2020)
+    arrays.corrections = 2
+
+    assert write_snapshot(path, [arrays, empty]) == 2
+    loaded, loaded_empty = load_snapshot(path)
+
+    assert (loaded.season, loaded.team_names, loaded.team_index) == (2019, arrays.team_names, arrays.team_index)
+    assert (loaded.last_id, loaded.corrections) == (arrays.last_id, 2)
+    for name in ('home', 'away', 'home_goals', 'away_goals', 'date'):
+        assert getattr(loaded, name).dtype == getattr(arrays, name).dtype
+        assert np.array_equal(getattr(loaded, name), getattr(arrays, name))
+    assert (loaded_empty.season, len(loaded_empty), loaded_empty.last_id) == (2020, 0, None)
+    assert compute_standings(loaded) == compute_standings(arrays)
+
+
+def test_warm_start_appends_the_results_after_the_snapshot(db, tmp_path):
+    path = str(tmp_path / 'analytics.snapshot')
+    analytics = AnalyticsService()
+    for home_team, away_team, score, date in RESULTS[:3]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    write_snapshot(path, [analytics.get_season(db, 2019, force_refresh=True)])
+    analytics.invalidate()
+    for home_team, away_team, score, date in RESULTS[3:]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+    assert analytics.warm_start(db, path) == 1
+    arrays = analytics.get_season(db, 2019)
+
+    assert len(arrays) == 5
+    assert compute_standings(arrays) == compute_standings(season_arrays())
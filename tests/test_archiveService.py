@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+
+import pytest
+
+from services.analyticsServices.analyticsService import AnalyticsService
+from services.archiveServices.archiveService import ArchiveService
+from tests.test_analyticsService import RESULTS
+
+LATER_RESULTS = [('Ajax', 'PSV', '3-3', '2020-02-01'), ('PSV', 'Ajax', '2-0', '2020-03-07')]
+
+
+@pytest.fixture
+def seasons(db):
+    for home_team, away_team, score, date in [*RESULTS, *LATER_RESULTS]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+
+def test_archived_season_is_read_from_the_archive(db, seasons):
+    match = db.find_match({"home_team": 'Ajax', "away_team": 'PSV', "date": '2019-08-03'})
+
+    assert db.archive_season(2019) == {"matches": 5, "teams": 3}
+    assert ArchiveService().is_archived(db, 2019)
+    assert db.purge_archived_season(2019) == {"matches": 5, "teams": 3}
+    assert db.client.FMT.matches.count_documents({}) == 2
+
+    assert db.find_match({"home_team": 'Ajax', "away_team": 'PSV', "date": '2019-08-03'}) == match
+    assert db.find_matches_batch([str(match['_id'])], ['score']) == [{"id": str(match['_id']), "score": '2-1'}]
+    assert [found['date'] for found in db.find_matches_by_date_range('2019-08-20', '2020-02-01', 'Ajax')] == \
+        ['2019-08-24', '2019-08-31', '2020-02-01']
+    head_to_head = db.find_head_to_head('Ajax', 'PSV', 5)
+    assert (head_to_head['matches'], head_to_head['team_a_wins'], head_to_head['draws']) == (4, 1, 2)
+    assert db.find_team({"name": 'Ajax', "season": 2019})['points'] == 8
+    assert len(AnalyticsService().get_season(db, 2019, force_refresh=True)) == 5
+
+
+def test_archived_season_is_read_only(db, seasons):
+    db.archive_season(2019)
+
+    with pytest.raises(Exception):
+        db.create_match_with_score({"home_team": 'Ajax', "away_team": 'PSV', "score": '1-0', "date": '2019-12-01'})
+    with pytest.raises(Exception):
+        db.create_team({"name": 'Vitesse', "season": 2019})
+    with pytest.raises(Exception):
+        db.recompute_ratings(2019)
+    assert db.client.FMT.matches.count_documents({'season': 2019}) == 5
+
+
+def test_only_ended_past_seasons_are_archived(db, seasons):
+    db.create_match({"home_team": 'Ajax', "away_team": 'Feyenoord', "date": '2020-05-01'})
+
+    with pytest.raises(ValueError, match='matches without a result'):
+        db.archive_season(2020)
+    with pytest.raises(ValueError, match='is not over'):
+        db.archive_season(2999)
+    with pytest.raises(ValueError, match='is not archived'):
+        db.purge_archived_season(2020)
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+
+import asyncio
+import json
+import threading
+
+from services.eventBusServices.eventBusService import EventBusService, Subscription
+
+
+def events(subscription):
+    received = []
+    while not subscription.queue.empty():
+        received.append(subscription.queue.get_nowait())
+    return received
+
+
+def test_results_are_published_to_the_season_subscribers(db):
+    async def publish():
+        event_bus = EventBusService()
+        season, other_season = event_bus.subscribe(2019), event_bus.subscribe(2020)
+        try:
+            _id = db.create_match_with_score({"home_team": 'Ajax', "away_team": 'PSV', "score": '2-1',
+                                              "date": '2019-08-03'})
+            return _id, events(season), events(other_season)
+        finally:
+            event_bus.unsubscribe(season)
+            event_bus.unsubscribe(other_season)
+
+    _id, season_events, other_season_events = asyncio.run(publish())
+
+    assert sorted((event.type, tuple(sorted(event.teams))) for event in season_events) == [
+        ('match_result', ('Ajax', 'PSV')), ('team_update', ('Ajax',)), ('team_update', ('PSV',))]
+    match_result = json.loads(next(event.payload for event in season_events if event.type == 'match_result'))
+    assert (match_result['id'], match_result['score'], match_result['team_won']) == (str(_id), '2-1', 'Ajax')
+    assert other_season_events == []
+    assert 2019 not in EventBusService().subscriptions
+
+
+def test_publish_from_another_thread():
+    async def publish():
+        event_bus = EventBusService()
+        subscription = event_bus.subscribe(2019)
+        try:
+            thread = threading.Thread(target=event_bus.publish, args=(2019, {"type": 'match_result'}, ('Ajax',)))
+            thread.start()
+            thread.join()
+            return (await asyncio.wait_for(subscription.get(), 1)).type
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    assert asyncio.run(publish()) == 'match_result'
+
+
+def test_slow_subscriber_drops_its_oldest_events():
+    subscription = Subscription(2019, 2)
+    for event in range(5):
+        subscription.put(event)
+
+    assert events(subscription) == [3, 4]
+    assert subscription.pop_dropped() == 3
+    assert subscription.pop_dropped() == 0
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+
+import csv
+import gzip
+import io
+import json
+
+from services.exportServices.exportService import (MATCH_COLUMNS, TEAM_COLUMNS, export_matches, export_team_history,
+                                                   export_teams, gzip_csv, ndjson, team_dictionary)
+from services.mongoDbService.leagueProvider import parse_league_from_db
+from tests.test_analyticsService import RESULTS
+from tests.test_archiveService import LATER_RESULTS
+
+
+def read_csv(chunks):
+    return list(csv.reader(io.StringIO(gzip.decompress(b''.join(chunks)).decode())))
+
+
+def test_gzip_csv_chunks_make_one_file():
+    rows = [[index, f'team {index}'] for index in range(1000)]
+    chunks = list(gzip_csv(['id', 'name'], rows, chunk_size=256))
+
+    assert len(chunks) > 1
+    assert read_csv(chunks) == [['id', 'name'], *([str(index), name] for index, name in rows)]
+
+
+def test_export_league_season(db, league):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    db.create_live_match({"home_team": 'Feyenoord', "away_team": 'PSV', "date": '2019-09-07'})
+    db.create_match({"home_team": 'PSV', "away_team": 'Ajax', "date": '2019-09-14'})
+    league = parse_league_from_db(db.find_league({"_id": league}))
+    team_ids = team_dictionary(team['name'] for team in db.stream_teams_of_league(league))
+
+    teams = read_csv(export_teams(db.stream_teams_of_league(league), team_ids))
+    matches = read_csv(export_matches(db.stream_matches_of_league(2019, team_ids), team_ids))
+
+    assert team_ids == {'Ajax': 0, 'Feyenoord': 1, 'PSV': 2}
+    assert teams[0] == TEAM_COLUMNS
+    assert sorted(row[:3] + row[8:9] for row in teams[1:]) == [['0', 'Ajax', '2019', '8'],
+                                                               ['1', 'Feyenoord', '2019', '1'],
+                                                               ['2', 'PSV', '2019', '4']]
+    assert matches[0] == MATCH_COLUMNS
+    assert sorted(row[1:] for row in matches[1:]) == [
+        ['0', '1', '4', '0', '2019-08-31', 'ended'],
+        ['0', '2', '2', '1', '2019-08-03', 'ended'],
+        ['1', '0', '0', '0', '2019-08-10', 'ended'],
+        ['1', '2', '0', '0', '2019-09-07', 'live'],
+        ['2', '0', '', '', '2019-09-14', 'future'],
+        ['2', '0', '1', '1', '2019-08-24', 'ended'],
+        ['2', '1', '3', '1', '2019-08-17', 'ended']
+    ]
+
+
+def read_ndjson(chunks):
+    return [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+
+
+def test_ndjson_chunks_end_at_a_line():
+    documents = [{"id": index, "name": f'team {index}'} for index in range(1000)]
+    chunks = list(ndjson(documents, chunk_size=256))
+
+    assert len(chunks) > 2
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+    assert read_ndjson(chunks) == documents
+
+
+def test_export_team_history(db):
+    for home_team, away_team, score, date in [*RESULTS, *LATER_RESULTS]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    db.create_match({"home_team": 'Ajax', "away_team": 'Feyenoord', "date": '2020-05-01'})
+    team = db.find_team({"name": 'Ajax', "season": 2019})
+    db.archive_season(2019)
+
+    _team, matches = db.stream_team_history(team['_id'])
+    history = read_ndjson(export_team_history(matches, _team['name']))
+    _, matches = db.stream_team_history(team['_id'], 2020)
+
+    assert [(match['date'], match['score'], match['result']) for match in history] == [
+        ('2019-08-03', '2-1', 'W'), ('2019-08-10', '0-0', 'D'), ('2019-08-24', '1-1', 'D'),
+        ('2019-08-31', '4-0', 'W'), ('2020-02-01', '3-3', 'D'), ('2020-03-07', '2-0', 'L')]
+    assert [match['date'] for match in read_ndjson(export_team_history(matches, 'Ajax'))] == \
+        ['2020-02-01', '2020-03-07']
@@ -0,0 +1,54 @@
+#!/usr/bin/python3
+
+from collections import Counter
+from itertools import permutations
+
+import pytest
+
+from services.fixtureServices.fixtureService import double_round_robin, round_robin, schedule_fixtures
+
+
+@pytest.mark.parametrize('size', range(2, 11))
+def test_double_round_robin_plays_every_pair_once_at_each_venue(size):
+    teams = [f'team {index}' for index in range(size)]
+    rounds = double_round_robin(teams)
+
+    assert len(rounds) == 2 * (size - 1 + size % 2)
+    assert Counter(pair for pairs in rounds for pair in pairs) == Counter(permutations(teams, 2))
+    for pairs in rounds:
+        playing = [team for pair in pairs for team in pair]
+        assert len(playing) == len(set(playing)) == size - size % 2
+
+
+@pytest.mark.parametrize('size', range(2, 11))
+def test_round_robin_venues_are_balanced(size):
+    teams = [f'team {index}' for index in range(size)]
+    rounds = round_robin(teams)
+
+    home_matches = Counter(home_team for pairs in rounds for home_team, _ in pairs)
+    assert max(home_matches[team] for team in teams) - min(home_matches[team] for team in teams) <= 1
+    for team in teams:
+        venues = ''.join('H' if pair[0] == team else 'A' for pairs in rounds for pair in pairs if team in pair)
+        assert 'HHH' not in venues and 'AAA' not in venues
+
+
+def test_schedule_fixtures_dates():
+    fixtures = schedule_fixtures(['Ajax', 'PSV', 'Feyenoord', 'Vitesse'], '2019-08-03', 7, 21)
+    dates = {fixture['matchday']: fixture['date'] for fixture in fixtures}
+
+    assert len(fixtures) == 12
+    assert dates == {1: '2019-08-03', 2: '2019-08-10', 3: '2019-08-17', 4: '2019-09-07', 5: '2019-09-14',
+                     6: '2019-09-21'}
+
+
+def test_generate_fixtures_skips_the_existing_matches(db, league):
+    existing = schedule_fixtures(['Ajax', 'PSV', 'Feyenoord'], '2019-08-03', 7, 14)[0]
+    db.create_match({field: existing[field] for field in ('home_team', 'away_team', 'date')})
+
+    generated = db.generate_fixtures(league, '2019-08-03', 7, 14)
+
+    assert len(generated['fixtures']) == 6
+    assert generated['inserted'] == 5
+    assert generated['conflicts'] == [existing]
+    assert db.client.FMT.matches.count_documents({}) == 6
+    assert db.generate_fixtures(league, '2019-08-03', 7, 14)['inserted'] == 0
@@ -0,0 +1,27 @@
+#!/usr/bin/python3
+
+import pytest
+
+from tests.test_analyticsService import RESULTS
+
+
+def test_find_top_teams(db, league):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    data = db.find_league({"_id": league})
+
+    assert [(team['name'], team['points']) for team in db.find_top_teams(data, 2019, 'points', 2, 'desc')] == \
+        [('Ajax', 8), ('PSV', 4)]
+    assert [(team['position'], team['name'], team['goal_difference'])
+            for team in db.find_top_teams(data, 2019, 'goal_difference', 5, 'asc')] == \
+        [(1, 'Feyenoord', -6), (2, 'PSV', 1), (3, 'Ajax', 5)]
+    assert [team['name'] for team in db.find_top_teams(data, 2019, 'draws', 5, 'desc')] == ['Ajax', 'Feyenoord', 'PSV']
+
+
+def test_find_top_teams_rejects_unknown_metrics(db, league):
+    data = db.find_league({"_id": league})
+
+    with pytest.raises(ValueError):
+        db.find_top_teams(data, 2019, 'shots', 5, 'desc')
+    with pytest.raises(ValueError):
+        db.find_top_teams(data, 2019, 'points', 5, 'up')
@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+
+import asyncio
+import threading
+
+import pytest
+
+from services.liveMatchServices.liveMatchService import LiveMatchService
+
+
+@pytest.fixture
+def live(monkeypatch):
+    live = LiveMatchService()
+    monkeypatch.setattr(live, 'live_matches', {})
+    monkeypatch.setattr(live, 'pending', {})
+    return live
+
+
+@pytest.fixture
+def match_id(db):
+    return db.create_live_match({"home_team": 'Ajax', "away_team": 'PSV', "date": '2019-08-03'})
+
+
+def test_goals_are_coalesced_until_the_flush(db, live, match_id):
+    assert live.add_goal(db, match_id, 'Ajax') == (1, 0)
+    assert live.add_goal(db, match_id, 'PSV') == (1, 1)
+    assert live.add_goal(db, match_id, 'Ajax') == (2, 1)
+    assert db.client.FMT.matches.find_one({'_id': match_id})['home_goals'] == 0
+
+    assert live.flush(db) == 1
+    _match = db.client.FMT.matches.find_one({'_id': match_id})
+    assert (_match['home_goals'], _match['away_goals']) == (2, 1)
+    assert live.pending == {}
+
+    with pytest.raises(ValueError):
+        live.add_goal(db, match_id, 'Feyenoord')
+
+
+def test_finalize_scores_the_persisted_goals(db, live, match_id):
+    live.add_goal(db, match_id, 'PSV')
+    live.flush(db, [match_id])
+
+    _match = db.finalize_live_match(match_id)
+
+    assert (_match['score'], _match['team_won'], _match['status']) == ('0-1', 'PSV', 'ended')
+    assert db.client.FMT.teams.find_one({'name': 'PSV'})['number_of_wins'] == 1
+    with pytest.raises(Exception):
+        db.finalize_live_match(match_id)
+
+
+def test_goals_of_a_finalized_match_are_rejected(db, live, match_id):
+    live.add_goal(db, match_id, 'Ajax')
+    live.flush(db)
+    live.add_goal(db, match_id, 'Ajax')
+    db.finalize_live_match(match_id)
+
+    assert live.flush(db) == 0
+    assert db.client.FMT.matches.find_one({'_id': match_id})['score'] == '1-0'
+    with pytest.raises(Exception, match='The match is not live'):
+        live.add_goal(db, match_id, 'Ajax')
+
+
+def test_failed_flush_keeps_the_goals(db, live, match_id, monkeypatch):
+    update_live_scores = db.update_live_scores
+    failures = [Exception('forced write failure')]
+
+    def failing_update_live_scores(goals):
+        if failures:
+            raise failures.pop()
+        return update_live_scores(goals)
+    monkeypatch.setattr(db, 'update_live_scores', failing_update_live_scores)
+
+    live.add_goal(db, match_id, 'Ajax')
+    with pytest.raises(Exception):
+        live.flush(db)
+    live.add_goal(db, match_id, 'Ajax')
+
+    assert live.flush(db) == 1
+    assert db.client.FMT.matches.find_one({'_id': match_id})['home_goals'] == 2
+
+
+def test_flusher_writes_the_goals_off_the_event_loop(db, live, match_id, monkeypatch):
+    flush = live.flush
+    threads = []
+
+    def recorded_flush(db, match_ids=None):
+        threads.append(threading.current_thread())
+        return flush(db, match_ids)
+    monkeypatch.setattr(live, 'flush', recorded_flush)
+    monkeypatch.setattr(live, 'flush_interval', 0.01)
+
+    async def run():
+        live.add_goal(db, match_id, 'PSV')
+        flusher = asyncio.ensure_future(live.run_flusher(db))
+        await asyncio.sleep(0.1)
+        flusher.cancel()
+    asyncio.run(run())
+
+    assert db.client.FMT.matches.find_one({'_id': match_id})['away_goals'] == 1
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+
+import asyncio
+import os
+import threading
+import time
+from traceback import FrameSummary
+
+from services.loopMonitorServices.loopMonitorService import PROJECT_DIRECTORY, LoopMonitorService, find_blocking_call
+
+SERVER_FILE = os.path.join(PROJECT_DIRECTORY, 'server', 'server.py')
+MONGO_DB_SERVICE_FILE = os.path.join(PROJECT_DIRECTORY, 'services', 'mongoDbService', 'mongoDbService.py')
+LOGGING_FILE = os.path.join(os.sep, 'usr', 'lib', 'python3', 'logging', '__init__.py')
+SOCKET_FILE = os.path.join(os.sep, 'usr', 'lib', 'python3', 'socket.py')
+
+
+def test_find_blocking_call():
+    handler = FrameSummary(SERVER_FILE, 120, 'get_handler_league')
+
+    assert find_blocking_call([handler, FrameSummary(MONGO_DB_SERVICE_FILE, 130, 'find_league'),
+                               FrameSummary(SOCKET_FILE, 700, 'recv_into')]) == 'MongoDbService.find_league'
+    assert find_blocking_call([handler, FrameSummary(LOGGING_FILE, 1400, 'info'),
+                               FrameSummary(LOGGING_FILE, 1500, '_log')]) == 'logger.info at server/server.py:120'
+    assert find_blocking_call([handler, FrameSummary(SOCKET_FILE, 700, 'recv_into')]) == \
+        'server/server.py:120 (get_handler_league)'
+    assert find_blocking_call([]) == 'unknown'
+
+
+def block_the_loop():
+    time.sleep(0.5)
+
+
+def test_blocking_call_is_detected():
+    monitor = LoopMonitorService()
+
+    async def run():
+        monitor.loop_thread_id = threading.get_ident()
+        monitor.last_tick = time.monotonic()
+        task = asyncio.ensure_future(monitor.run())
+        if monitor.watchdog is None:
+            monitor.watchdog = threading.Thread(target=monitor.watch, daemon=True)
+            monitor.watchdog.start()
+        await asyncio.sleep(monitor.interval * 3)
+        block_the_loop()
+        await asyncio.sleep(monitor.interval * 3)
+        task.cancel()
+    asyncio.run(run())
+    metrics = monitor.metrics()
+
+    assert metrics['blocked_count'] >= 1
+    assert metrics['lag_max_ms'] >= 300
+    assert metrics['recent_blocking_calls'][-1]['call'].startswith('tests/test_loopMonitorService.py')
+    assert metrics['recent_blocking_calls'][-1]['call'].endswith('(block_the_loop)')
@@ -0,0 +1,106 @@
+#!/usr/bin/python3
+
+from datetime import datetime
+
+import pytest
+
+import services.mongoDbService.collectionProvider as collectionProvider
+from services.mongoDbService.matchProvider import decode_match, encode_match, parse_date, teams_pair_key
+from services.teamRegistryServices.teamRegistryService import TeamRegistryService
+from tests.test_analyticsService import RESULTS
+
+
+def test_teams_pair_key_is_the_same_for_both_venues():
+    assert teams_pair_key(3, 7) == teams_pair_key(7, 3) == (3 << 32) | 7
+    assert teams_pair_key(3, 7) != teams_pair_key(3, 8)
+    assert teams_pair_key(None, 7) is None
+
+
+def test_head_to_head_counts_both_venues(db):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+    head_to_head = db.find_head_to_head('PSV', 'Ajax', 5)
+    pairs = {match['date'].day: match['teams_pair'] for match in db.client.FMT.matches.find()}
+
+    assert pairs[3] == pairs[24] != pairs[10]
+    assert {field: head_to_head[field] for field in ('matches', 'team_a_wins', 'team_b_wins', 'draws',
+                                                     'team_a_goals', 'team_b_goals')} == \
+        {"matches": 2, "team_a_wins": 0, "team_b_wins": 1, "draws": 1, "team_a_goals": 2, "team_b_goals": 3}
+    assert [match['date'] for match in head_to_head['recent']] == ['2019-08-24', '2019-08-03']
+
+
+def test_encode_decode_match_round_trip(db):
+    match = {"home_team": 'Ajax', "away_team": 'PSV', "score": '2-1', "is_draw": False, "team_won": 'Ajax',
+             "team_lost": 'PSV', "date": '2019-08-03'}
+    encoded = encode_match(db, match, create=True)
+
+    assert isinstance(encoded['home_team_id'], int) and isinstance(encoded['away_team_id'], int)
+    assert (encoded['team_won_id'], encoded['team_lost_id']) == (encoded['home_team_id'], encoded['away_team_id'])
+    assert not {'home_team', 'away_team', 'team_won', 'team_lost'} & set(encoded)
+    assert encoded['teams_pair'] == teams_pair_key(encoded['home_team_id'], encoded['away_team_id'])
+    assert decode_match(db, encoded) == match
+
+
+def test_encode_match_query_does_not_register_teams(db):
+    encode_match(db, {"home_team": 'Ajax', "away_team": 'PSV'}, create=True)
+    query = encode_match(db, {"home_team": 'Ajax', "away_team": 'Vitesse', "team_won": None})
+
+    assert query['away_team_id'] is None
+    assert query['team_won_id'] is None
+    assert 'teams_pair' not in query
+    assert TeamRegistryService().team_id(db, 'Vitesse') is None
+    assert decode_match(db, None) is None
+
+
+def test_stored_match_refers_to_the_team_ids(db):
+    _id = db.create_match_with_score({"home_team": 'Ajax', "away_team": 'PSV', "score": '0-1', "date": '2019-08-03'})
+    stored = db.client.FMT.matches.find_one({'_id': _id})
+    registry = TeamRegistryService()
+
+    assert stored['home_team_id'] == registry.team_id(db, 'Ajax')
+    assert stored['team_won_id'] == registry.team_id(db, 'PSV')
+    assert 'home_team' not in stored
+    assert db.find_match({'_id': _id})['team_won'] == 'PSV'
+
+    registry.ids.clear()
+    registry.names.clear()
+    assert db.find_match({"home_team": 'Ajax', "away_team": 'PSV', "date": '2019-08-03'})['_id'] == _id
+
+
+@pytest.mark.parametrize('date', ['2019-8-3', '03-08-2019', '2019-08-03T10:00', '2019-02-30', '', None, 20190803])
+def test_parse_date_rejects_other_formats(date):
+    with pytest.raises(ValueError, match='YYYY-MM-DD'):
+        parse_date(date)
+
+
+def test_stored_match_date_is_a_native_date_with_the_season(db):
+    _id = db.create_match_with_score({"home_team": 'Ajax', "away_team": 'PSV', "score": '2-1', "date": '2019-12-29'})
+    stored = db.client.FMT.matches.find_one({'_id': _id})
+
+    assert (stored['date'], stored['season']) == (datetime(2019, 12, 29), 2019)
+    assert db.find_match({'_id': _id})['date'] == '2019-12-29'
+    assert 'season' not in db.find_match({'_id': _id})
+    with pytest.raises(ValueError):
+        db.create_match_with_score({"home_team": 'Ajax', "away_team": 'PSV', "score": '2-1', "date": '29/12/2019'})
+
+
+def test_find_matches_by_date_range(db):
+    for home_team, away_team, score, date in [*RESULTS, ('Ajax', 'PSV', '0-0', '2020-01-04')]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+    assert [match['date'] for match in db.find_matches_by_date_range('2019-08-10', '2020-01-04')] == \
+        ['2019-08-10', '2019-08-17', '2019-08-24', '2019-08-31', '2020-01-04']
+    assert [match['date'] for match in db.find_matches_by_date_range('2019-08-10', '2019-08-31', 'PSV')] == \
+        ['2019-08-17', '2019-08-24']
+    assert db.find_matches_by_date_range('2019-01-01', '2020-12-31', 'Vitesse') == []
+
+
+def test_string_dates_are_migrated(db):
+    db.client.FMT.matches.insert_one({"home_team_id": 1, "away_team_id": 2, "date": '2018-05-06', "score": '1-0'})
+    db.client.FMT.matches.insert_one({"home_team_id": 2, "away_team_id": 1, "date": '06/05/2018', "score": '1-0'})
+
+    assert collectionProvider.migrate_match_dates(db) == 1
+    assert sorted(str(match['date']) for match in db.client.FMT.matches.find()) == \
+        ['06/05/2018', '2018-05-06 00:00:00']
+    assert db.client.FMT.matches.find_one({"date": datetime(2018, 5, 6)})['season'] == 2018
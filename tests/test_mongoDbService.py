@@ -0,0 +1,186 @@
+#!/usr/bin/python3
+
+import mongomock.collection
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from pymongo.results import BulkWriteResult
+
+from services.analyticsServices.analyticsService import (AnalyticsService, compute_standings,
+                                                         compute_standings_from_stats)
+from services.mongoDbService.mongoDbService import INVALID_ID_STATUS, NOT_FOUND_STATUS
+from tests.test_analyticsService import RESULTS, season_arrays
+
+TEAMS = ['Ajax', 'PSV', 'Feyenoord']
+# the results recorded with a wrong score first: a loss for a win, a win for a draw, the same result with other goals
+# and a win for a draw
+WRONG_SCORES = {0: '0-3', 1: '2-0', 2: '3-2', 3: '0-1'}
+
+
+def test_batch_keeps_the_requested_order_with_markers(db, league):
+    teams = db.find_league({"_id": league})['teams']
+    missing_id = str(ObjectId())
+    ids = [str(teams[2]), 'not-an-id', missing_id, str(teams[0]), str(teams[2])]
+
+    _teams = db.find_teams_batch(ids)
+
+    assert [team.get('name') for team in _teams] == ['Feyenoord', None, None, 'Ajax', 'Feyenoord']
+    assert _teams[1] == {"id": 'not-an-id', "status": INVALID_ID_STATUS}
+    assert _teams[2] == {"id": missing_id, "status": NOT_FOUND_STATUS}
+    assert _teams[0]['points'] == 0
+
+
+def test_batch_returns_the_requested_fields(db, league):
+    _id = db.create_match_with_score({"home_team": 'Ajax', "away_team": 'PSV', "score": '2-1', "date": '2019-08-03'})
+
+    assert db.find_matches_batch([str(_id), str(league)], ['score', 'home_team']) == [
+        {"id": str(_id), "score": '2-1', "home_team": 'Ajax'},
+        {"id": str(league), "status": NOT_FOUND_STATUS}
+    ]
+    assert db.find_leagues_batch([str(league)], ['name']) == [{"id": str(league), "name": 'Eredivisie'}]
+
+
+def test_batch_rejects_unknown_fields(db):
+    with pytest.raises(ValueError, match='unknown fields: password'):
+        db.find_teams_batch([str(ObjectId())], ['name', 'password'])
+
+
+def test_find_leagues_teams(db, league):
+    other_league = db.create_league({"name": 'Eredivisie', "season": 2020, "teams": []})
+    db.add_team_to_league({"league_id": other_league, "team_id": db.create_team({"name": 'Ajax', "season": 2020})})
+
+    leagues = db.find_leagues_teams(['Eredivisie', 'Bundesliga'], [2019, 2020, 2021])
+
+    assert {key: sorted(team_names) for key, team_names in leagues.items()} == {
+        ('Eredivisie', 2019): ['Ajax', 'Feyenoord', 'PSV'],
+        ('Eredivisie', 2020): ['Ajax']
+    }
+
+
+@pytest.fixture
+def array_filters(monkeypatch):
+    """
+    mongomock has no array filters - the recent form entry of a corrected result is set by hand. The returned list
+    holds the failures of the next team corrections: 'all' fails the whole write, 'partial' fails the second team
+    """
+    bulk_write = mongomock.collection.Collection.bulk_write
+    failures = []
+
+    def filtered_bulk_write(self, operations, ordered=True, **kwargs):
+        filtered = [operation for operation in operations if getattr(operation, '_array_filters', None)]
+        if not filtered:
+            return bulk_write(self, operations, ordered, **kwargs)
+        failure = failures.pop(0) if failures else None
+        if failure == 'all':
+            raise Exception('forced team write failure')
+        for index, operation in enumerate(filtered):
+            if failure == 'partial' and index == 1:
+                raise BulkWriteError({'writeErrors': [{'index': 1, 'code': 1, 'errmsg': 'forced'}],
+                                      'nModified': 1})
+            update = dict(operation._doc)
+            entry_fields = {field.rsplit('.', 1)[1]: value for field, value in update.pop('$set').items()}
+            if update:
+                self.update_one(operation._filter, update)
+            recent_form = self.find_one(operation._filter).get('recent_form', [])
+            for entry in recent_form:
+                if all(entry.get(field.split('.', 1)[1]) == value
+                       for field, value in operation._array_filters[0].items()):
+                    entry.update(entry_fields)
+            self.update_one(operation._filter, {'$set': {'recent_form': recent_form}})
+        return BulkWriteResult({'nMatched': len(filtered), 'nModified': len(filtered)}, True)
+
+    monkeypatch.setattr(mongomock.collection.Collection, 'bulk_write', filtered_bulk_write)
+    return failures
+
+
+def add_results(db, scores):
+    match_ids = []
+    for index, (home_team, away_team, _, date) in enumerate(RESULTS):
+        match_ids.append(db.create_match_with_score({"home_team": home_team, "away_team": away_team,
+                                                     "score": scores.get(index, RESULTS[index][2]), "date": date}))
+    return match_ids
+
+
+def team_state(db):
+    return {team['name']: {**{field: value for field, value in team.items()
+                              if field not in ('_id', 'rating', 'matches_wins', 'matches_draw', 'matches_loss')},
+                           **{field: len(team[field]) for field in ('matches_wins', 'matches_draw', 'matches_loss')}}
+            for team in db.client.FMT.teams.find()}
+
+
+def ratings(db):
+    return {team['name']: round(team['rating'], 6) for team in db.client.FMT.teams.find()}
+
+
+def test_corrected_results_match_the_right_results(db, league, array_filters):
+    match_ids = add_results(db, WRONG_SCORES)
+    AnalyticsService().get_season(db, 2019, force_refresh=True)
+
+    for index in (3, 0, 2, 1):
+        corrected = db.correct_match_result(match_ids[index], RESULTS[index][2])
+        assert corrected['score'] == RESULTS[index][2]
+
+    expected = {row['team']: row for row in compute_standings(season_arrays(), TEAMS)}
+    state = team_state(db)
+    for name, row in expected.items():
+        for field in ('number_of_wins', 'number_of_draws', 'number_of_losses', 'number_of_scored_goals',
+                      'number_of_received_goals', 'points', 'goal_difference'):
+            assert state[name][field] == row[field]
+        assert (state[name]['matches_wins'], state[name]['matches_draw'], state[name]['matches_loss']) == \
+            (row['number_of_wins'], row['number_of_draws'], row['number_of_losses'])
+    assert state['Ajax']['recent_form'] == [
+        {"result": 'W', "score": '2-1', "opponent": 'PSV', "date": '2019-08-03'},
+        {"result": 'D', "score": '0-0', "opponent": 'Feyenoord', "date": '2019-08-10'},
+        {"result": 'D', "score": '1-1', "opponent": 'PSV', "date": '2019-08-24'},
+        {"result": 'W', "score": '4-0', "opponent": 'Feyenoord', "date": '2019-08-31'}
+    ]
+    assert sum(ratings(db).values()) == pytest.approx(3 * 1500)
+
+    assert db.find_result_corrections(2019) == 4
+    assert compute_standings(AnalyticsService().get_season(db, 2019, force_refresh=True), TEAMS) == \
+        compute_standings(season_arrays(), TEAMS)
+    for as_of in ('2019-08-03', '2019-08-17', '2019-08-31'):
+        assert compute_standings_from_stats(db.find_standings_as_of(league, as_of), TEAMS) == \
+            compute_standings(season_arrays([result for result in RESULTS if result[3] <= as_of]), TEAMS)
+
+    draw = db.find_match({'_id': match_ids[1]})
+    assert (draw['score'], draw['is_draw']) == ('0-0', True)
+    assert not {'team_won', 'team_lost', 'team_lose_score'} & set(draw)
+
+
+def test_corrected_last_result_keeps_the_replayed_ratings(db, array_filters):
+    match_ids = add_results(db, {4: '0-4'})
+
+    db.correct_match_result(match_ids[4], RESULTS[4][2])
+    corrected = ratings(db)
+    db.recompute_ratings(2019)
+
+    assert corrected == pytest.approx(ratings(db))
+
+
+def test_correction_with_the_same_score_changes_nothing(db, array_filters):
+    match_ids = add_results(db, {})
+    state = team_state(db)
+
+    assert db.correct_match_result(match_ids[0], RESULTS[0][2])['score'] == RESULTS[0][2]
+    assert team_state(db) == state
+    assert db.find_result_corrections(2019) == 0
+    with pytest.raises(Exception, match='The ended match is not exists'):
+        db.correct_match_result(ObjectId(), '1-0')
+
+
+@pytest.mark.parametrize('failure', ['all', 'partial'])
+def test_failed_correction_keeps_the_old_result(db, array_filters, failure):
+    match_ids = add_results(db, WRONG_SCORES)
+    state, match = team_state(db), db.find_match({'_id': match_ids[0]})
+    array_filters.append(failure)
+
+    with pytest.raises(Exception):
+        db.correct_match_result(match_ids[0], RESULTS[0][2])
+    assert team_state(db) == state
+    assert db.find_match({'_id': match_ids[0]}) == match
+    assert db.find_result_corrections(2019) == 0
+
+    assert db.correct_match_result(match_ids[0], RESULTS[0][2])['team_won'] == 'Ajax'
+    assert db.find_result_corrections(2019) == 1
+    assert team_state(db)['Ajax']['points'] == state['Ajax']['points'] + 3
@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from services.admissionServices.admissionService import AdmissionService
+from services.profilingServices.profilingService import ProfilingService, category, profiled
+
+
+class Request:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+        self.method = 'GET'
+        self.path = '/profiled'
+
+
+class Response:
+    def __init__(self, status):
+        self.status = status
+        self.headers = {}
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    profiling = ProfilingService()
+    monkeypatch.setattr(profiling, 'directory', str(tmp_path))
+    monkeypatch.setattr(profiling, 'admin_token', 'secret')
+    monkeypatch.setattr(profiling, 'sample_rate', 0.0)
+    return profiling
+
+
+def write():
+    time.sleep(0.01)
+    return json.dumps({"written": True})
+
+
+@profiled
+async def handler(request):
+    await asyncio.sleep(0)
+    await AdmissionService().run('profiled', write)
+    return Response(200)
+
+
+def test_category():
+    assert category((os.path.join(os.sep, 'lib', 'pymongo', 'cursor.py'), 1, 'next')) == 'mongo'
+    assert category((os.path.join(os.sep, 'lib', 'json', 'encoder.py'), 1, 'encode')) == 'serialization'
+    assert category((os.path.join(os.sep, 'lib', 'logging', '__init__.py'), 1, 'info')) == 'logging'
+    assert category(('server.py', 1, 'handler')) is None
+
+
+def test_request_with_the_admin_header_is_profiled(profiling, tmp_path):
+    response = asyncio.run(handler(Request({profiling.header: 'secret'})))
+
+    profile_id = response.headers['X-Profile-Id']
+    files = sorted(os.listdir(tmp_path))
+    assert [os.path.splitext(name)[1] for name in files] == ['.json', '.prof']
+    assert all(profile_id in name and 'handler' in name for name in files)
+    with open(tmp_path / files[0]) as summary_file:
+        summary = json.load(summary_file)
+    assert (summary['id'], summary['status'], summary['path']) == (profile_id, 200, '/profiled')
+    assert set(summary['breakdown']) == {'serialization', 'mongo', 'validation', 'logging', 'other'}
+    # the write ran on the admission thread pool with its own profiler
+    assert any('(write)' in function['function'] for function in summary['top'])
+
+
+def test_request_is_not_profiled_by_default(profiling, tmp_path):
+    response = asyncio.run(handler(Request({profiling.header: 'wrong'})))
+
+    assert 'X-Profile-Id' not in response.headers
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+
+import pytest
+
+import services.mongoDbService.collectionProvider as collectionProvider
+from services.mongoDbService.mongoDbService import MongoDbService
+from services.ratingServices.ratingService import HOME_ADVANTAGE, INITIAL_RATING, K_FACTOR, match_rating_change
+from tests.test_analyticsService import RESULTS
+
+
+def ratings(db):
+    return {team['name']: team['rating'] for team in db.client.FMT.teams.find()}
+
+
+def test_match_rating_change():
+    assert match_rating_change(1500, 1500 + HOME_ADVANTAGE, 1, 1) == 0
+    assert match_rating_change(1500, 1500 + HOME_ADVANTAGE, 1, 0) == K_FACTOR / 2
+    assert match_rating_change(1500, 1500 + HOME_ADVANTAGE, 0, 1) == -K_FACTOR / 2
+    assert match_rating_change(1500, 1500, 1, 0) < match_rating_change(1400, 1600, 1, 0)
+
+
+def test_match_rating_change_grows_with_the_margin():
+    changes = [match_rating_change(1500, 1500, goals, 0) for goals in range(1, 6)]
+
+    assert changes == sorted(changes)
+    assert changes[1] == pytest.approx(1.5 * changes[0], abs=0.01)
+    assert changes[3] == pytest.approx(15 / 8 * changes[0], abs=0.01)
+
+
+def test_results_keep_the_sum_of_the_ratings(db):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+    assert sum(ratings(db).values()) == pytest.approx(3 * INITIAL_RATING)
+    assert ratings(db)['Ajax'] > INITIAL_RATING > ratings(db)['Feyenoord']
+
+
+def test_recompute_ratings_replays_the_results(db):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    incremental = ratings(db)
+    db.client.FMT.teams.update_many({}, {'$set': {'rating': 0}})
+
+    assert db.recompute_ratings(2019) == {"matches": 5, "teams": 3}
+    assert ratings(db) == pytest.approx(incremental)
+
+
+def test_migrations_are_recorded_and_skipped(db, monkeypatch):
+    applied = {migration['_id'] for migration in db.client.FMT.migrations.find()}
+    assert applied == {name for name, _ in collectionProvider.MIGRATIONS}
+
+    calls = []
+    monkeypatch.setattr(collectionProvider, 'MIGRATIONS', [
+        (name, lambda self, name=name, migrate=migrate: calls.append(name) or migrate(self))
+        for name, migrate in collectionProvider.MIGRATIONS])
+    db.client.FMT.teams.insert_one({'name': 'Ajax', 'season': 2019, 'number_of_wins': 2})
+    MongoDbService()
+    assert calls == []
+
+    db.client.FMT.migrations.delete_one({'_id': 'team_ratings'})
+    MongoDbService()
+    assert calls == ['team_ratings']
+    assert db.client.FMT.teams.find_one({'name': 'Ajax'})['rating'] == INITIAL_RATING
+    assert db.client.FMT.migrations.find_one({'_id': 'team_ratings'})['documents'] == 1
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+
+import asyncio
+from datetime import datetime
+
+from services.replayServices.replayService import latency_report, parse_log_line, parse_logs, replay
+
+LOG_LINES = [
+    "2020-03-20 10:00:00,000 - INFO - Server/Create Ended Match - start | request: "
+    "{'home_team': 'Ajax', 'away_team': 'PSV', 'score': '2 - 1', 'date': '2019-08-03'}\n",
+    "2020-03-20 10:00:00,010 - DEBUG - Server/Create Ended Match - input validation succeeded\n",
+    "2020-03-20 10:00:00,250 - INFO - Server/Get League Top Teams - start | metric: points, name: Serie A/B, "
+    "season: 2019.0, args: {'k': ['3']}\n",
+    "2020-03-20 10:00:00,500 - INFO - Server/Correct Ended Match - start | id: 5e7491a0c5b1d2a3f4e5d6c7, "
+    "request: {'score': '1-1'}\n",
+    "2020-03-20 10:00:00,600 - INFO - Server/Create Ended Match - start | request: {'broken': \n",
+    "2020-03-20 10:00:00,700 - INFO - Server/League Updates - start | season: 2019\n"
+]
+
+
+def test_parse_log_line():
+    requests = [parse_log_line(line) for line in LOG_LINES]
+
+    assert requests[0] == {"time": datetime(2020, 3, 20, 10, 0), "title": 'Create Ended Match', "method": 'POST',
+                           "path": '/ended_match', "args": None,
+                           "json": {'home_team': 'Ajax', 'away_team': 'PSV', 'score': '2 - 1', 'date': '2019-08-03'}}
+    assert (requests[2]['method'], requests[2]['path'], requests[2]['args'], requests[2]['json']) == \
+        ('GET', '/league/top/points/Serie%20A%2FB/2019.0', {'k': ['3']}, None)
+    assert (requests[3]['method'], requests[3]['path'], requests[3]['json']) == \
+        ('PUT', '/ended_match/5e7491a0c5b1d2a3f4e5d6c7', {'score': '1-1'})
+    # a debug line, a request that can not be parsed and a websocket route
+    assert (requests[1], requests[4], requests[5]) == (None, None, None)
+
+
+def test_parse_logs_filters_the_titles(tmp_path):
+    path = tmp_path / 'FMT-2020-03-20.log'
+    path.write_text(''.join(LOG_LINES))
+
+    assert [request['title'] for request in parse_logs([str(path)])] == \
+        ['Create Ended Match', 'Get League Top Teams', 'Correct Ended Match']
+    assert [request['title'] for request in parse_logs([str(path), str(path)], {'Correct Ended Match'})] == \
+        ['Correct Ended Match', 'Correct Ended Match']
+
+
+def test_latency_report():
+    assert latency_report([0.004, 0.001, 0.002, 0.003]) == {"requests": 4, "p50_ms": 3.0, "p90_ms": 4.0,
+                                                            "p99_ms": 4.0, "max_ms": 4.0}
+    assert latency_report([]) == {"requests": 0, "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+
+def test_replay_keeps_the_log_time_gaps():
+    received = []
+
+    async def handle(reader, writer):
+        request_line = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, value = line.decode().split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+        await reader.readexactly(int(headers.get('content-length', 0)))
+        received.append(request_line.decode().split()[:2])
+        status = b'404 Not Found' if b'/league/top' in request_line else b'200 OK'
+        writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}')
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            requests = [parse_log_line(line) for line in LOG_LINES]
+            return await replay([request for request in requests if request is not None],
+                                f'http://127.0.0.1:{port}', speed=2, concurrency=2)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    report = asyncio.run(run())
+
+    assert sorted(received) == [['GET', '/league/top/points/Serie%20A%2FB/2019.0?k=3'],
+                                ['POST', '/ended_match'], ['PUT', '/ended_match/5e7491a0c5b1d2a3f4e5d6c7']]
+    assert (report['requests'], report['statuses']) == (3, {"200": 2, "404": 1})
+    assert report['duration_s'] >= 0.25
+    assert set(report['routes']) == {'Create Ended Match', 'Get League Top Teams', 'Correct Ended Match'}
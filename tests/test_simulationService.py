@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from bson import ObjectId
+
+from services.analyticsServices.simulationService import (MATCH_MINUTES, SimulationService, build_simulation,
+                                                          live_minutes, simulate_chunk)
+from services.mongoDbService.matchProvider import LIVE_STATUS
+from tests.test_analyticsService import season_arrays
+
+NOW = datetime(2019, 9, 7, 18, 0, tzinfo=timezone.utc)
+TEAMS = ['Ajax', 'PSV', 'Feyenoord']
+
+
+def fixture(home_team, away_team, started=None, home_goals=0, away_goals=0):
+    if started is None:
+        return {"_id": ObjectId(), "home_team": home_team, "away_team": away_team}
+    return {"_id": ObjectId.from_datetime(NOW - started), "home_team": home_team, "away_team": away_team,
+            "status": LIVE_STATUS, "home_goals": home_goals, "away_goals": away_goals}
+
+
+def places(simulation, runs=200, top_places=1, relegation_places=1):
+    counts = simulate_chunk(simulation, runs, np.random.SeedSequence(7), top_places, relegation_places)
+    return {name: counts[:, team].tolist() for team, name in enumerate(simulation['team_names'])}
+
+
+def test_live_minutes():
+    assert live_minutes(fixture('Ajax', 'PSV'), NOW) is None
+    assert live_minutes(fixture('Ajax', 'PSV', timedelta(minutes=30)), NOW) == 30
+    assert live_minutes(fixture('Ajax', 'PSV', timedelta(hours=3)), NOW) == MATCH_MINUTES
+
+
+def test_finished_league_has_certain_places():
+    simulation = build_simulation(season_arrays(), TEAMS, [], NOW)
+
+    assert places(simulation) == {'Ajax': [200, 200, 0], 'Feyenoord': [0, 0, 200], 'PSV': [0, 0, 0]}
+
+
+def test_live_match_keeps_its_running_score():
+    fixtures = [fixture('Feyenoord', 'PSV', timedelta(hours=2), 6, 0)]
+    simulation = build_simulation(season_arrays(), TEAMS, fixtures, NOW)
+
+    assert simulation['home_seed'].tolist() == [6]
+    assert simulation['home_rate'].tolist() == [0.0]
+    assert places(simulation)['PSV'] == [0, 0, 200]
+
+
+def test_remaining_fixture_rates():
+    fixtures = [fixture('Feyenoord', 'PSV'), fixture('PSV', 'Ajax', timedelta(minutes=MATCH_MINUTES // 2), 1, 0),
+                fixture('Ajax', 'Vitesse')]
+    simulation = build_simulation(season_arrays(), TEAMS, fixtures, NOW)
+
+    assert len(simulation['home']) == 2
+    assert simulation['home_seed'].tolist() == [0, 1]
+    assert (simulation['home_rate'] > 0).all()
+    assert (simulation['away_rate'] > 0).all()
+
+
+def test_league_places_are_clamped_to_the_league_size(monkeypatch):
+    simulation = SimulationService()
+    monkeypatch.setattr(simulation, 'top_places', 4)
+    monkeypatch.setattr(simulation, 'relegation_places', 3)
+
+    assert simulation.league_places(20) == (4, 3)
+    assert simulation.league_places(5) == (4, 1)
+    assert simulation.league_places(3) == (2, 1)
+    assert simulation.league_places(1) == (0, 0)
+
+
+def test_cache_drops_the_least_recently_used_league(monkeypatch):
+    simulation = SimulationService()
+    monkeypatch.setattr(simulation, 'cache_size', 2)
+    monkeypatch.setattr(simulation, 'cache', OrderedDict())
+
+    simulation.add_cached('a', 1, ['a'])
+    simulation.add_cached('b', 1, ['b'])
+    assert simulation.find_cached('a', 1) == ['a']
+    simulation.add_cached('c', 1, ['c'])
+
+    assert simulation.find_cached('b', 1) is None
+    assert simulation.find_cached('a', 1) == ['a']
+    assert simulation.find_cached('a', 2) is None
@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+
+import pytest
+
+from services.analyticsServices.analyticsService import compute_standings, compute_standings_from_stats
+from services.configServices.configService import ConfigService
+from tests.test_analyticsService import RESULTS, season_arrays
+
+TEAMS = ['Ajax', 'PSV', 'Feyenoord']
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_interval(monkeypatch):
+    # a checkpoint every second match date, so the tables are read from checkpoints and deltas
+    monkeypatch.setitem(ConfigService().config['standings_snapshots'], 'checkpoint_interval', 2)
+
+
+def standings_as_of(db, league, as_of):
+    return compute_standings_from_stats(db.find_standings_as_of(league, as_of), TEAMS)
+
+
+def expected_standings(as_of):
+    return compute_standings(season_arrays([result for result in RESULTS if result[3] <= as_of]), TEAMS)
+
+
+def test_standings_as_of_every_date(db, league):
+    # a result recorded late is added to the snapshot of its date
+    for home_team, away_team, score, date in [*RESULTS[2:], *RESULTS[:2]]:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+    for as_of in ('2019-08-01', '2019-08-03', '2019-08-12', '2019-08-24', '2019-08-31', '2019-12-31'):
+        assert standings_as_of(db, league, as_of) == expected_standings(as_of)
+    # the second reads use the saved checkpoints
+    for as_of in ('2019-08-24', '2019-08-31'):
+        assert standings_as_of(db, league, as_of) == expected_standings(as_of)
+
+
+def test_backfill_rebuilds_the_snapshots(db, league):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+    db.client.FMT.standings_snapshots.delete_many({})
+
+    assert db.backfill_standings_snapshots(2019) == 5
+    for as_of in ('2019-08-03', '2019-08-17', '2019-08-31'):
+        assert standings_as_of(db, league, as_of) == expected_standings(as_of)
+    assert db.client.FMT.standings_snapshots.count_documents({'totals': {'$exists': True}}) == 2
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+
+import services.mongoDbService.collectionProvider as collectionProvider
+import pytest
+
+from services.mongoDbService.teamProvider import compute_form_table, correct_team_result, result_increments
+
+# the results of Ajax in the order they are recorded - 2019-08-10 is recorded late and 2019-07-27 last
+AJAX_RESULTS = [('Ajax', 'PSV', '2-1', '2019-08-03'), ('Vitesse', 'Ajax', '1-1', '2019-08-17'),
+                ('Ajax', 'Twente', '3-0', '2019-08-24'), ('Ajax', 'Feyenoord', '0-1', '2019-08-10'),
+                ('Utrecht', 'Ajax', '0-2', '2019-08-31'), ('Ajax', 'Heerenveen', '4-4', '2019-09-14'),
+                ('AZ', 'Ajax', '2-0', '2019-09-21'), ('Ajax', 'Groningen', '1-0', '2019-07-27')]
+AJAX_FORM = [
+    {"result": 'D', "score": '1-1', "opponent": 'Vitesse', "date": '2019-08-17'},
+    {"result": 'W', "score": '3-0', "opponent": 'Twente', "date": '2019-08-24'},
+    {"result": 'W', "score": '2-0', "opponent": 'Utrecht', "date": '2019-08-31'},
+    {"result": 'D', "score": '4-4', "opponent": 'Heerenveen', "date": '2019-09-14'},
+    {"result": 'L', "score": '0-2', "opponent": 'AZ', "date": '2019-09-21'}
+]
+
+
+def recent_form(db, name='Ajax'):
+    return db.client.FMT.teams.find_one({'name': name})['recent_form']
+
+
+def add_results(db):
+    for home_team, away_team, score, date in AJAX_RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+
+def test_recent_form_keeps_the_last_results_by_date(db):
+    add_results(db)
+
+    assert recent_form(db) == AJAX_FORM
+    assert recent_form(db, 'Feyenoord') == [{"result": 'W', "score": '1-0', "opponent": 'Ajax', "date": '2019-08-10'}]
+
+
+def test_recent_form_migration(db):
+    add_results(db)
+    db.client.FMT.teams.update_many({}, {'$unset': {'recent_form': 1}})
+
+    assert collectionProvider.migrate_recent_form(db) == 9
+    assert recent_form(db) == AJAX_FORM
+    assert recent_form(db, 'AZ') == [{"result": 'W', "score": '2-0', "opponent": 'Ajax', "date": '2019-09-21'}]
+
+
+def test_compute_form_table():
+    teams = [{"name": 'Ajax', "recent_form": AJAX_FORM},
+             {"name": 'PSV', "recent_form": [{"result": 'W', "score": '5-0'}, {"result": 'D', "score": '0-0'},
+                                             {"result": 'D', "score": '0-0'}]},
+             {"name": 'Vitesse', "recent_form": [{"result": 'W', "score": '1-0'}, {"result": 'D', "score": '1-1'},
+                                                 {"result": 'D', "score": '2-2'}]},
+             {"name": 'Twente'}]
+
+    assert [(row['position'], row['team'], row['form'], row['points'], row['goal_difference'])
+            for row in compute_form_table(teams)] == [(1, 'Ajax', 'DWWDL', 8, 3), (2, 'PSV', 'WDD', 5, 5),
+                                                      (3, 'Vitesse', 'WDD', 5, 1), (4, 'Twente', '', 0, 0)]
+
+
+@pytest.mark.parametrize('old_goals, new_goals', [((2, 1), (1, 1)), ((2, 1), (0, 3)), ((1, 1), (2, 0)),
+                                                  ((3, 0), (1, 0)), ((0, 2), (0, 2))])
+def test_correction_increments_replace_the_old_result(old_goals, new_goals):
+    _, increments, _ = correct_team_result({"name": 'Ajax', "season": 2019}, old_goals, new_goals, 'match', 0, 'PSV',
+                                           '2019-08-03')
+    old_increments = result_increments(*old_goals)
+    corrected = {field: old_increments.get(field, 0) + increments.get(field, 0)
+                 for field in {*old_increments, *increments}}
+
+    assert {field: value for field, value in corrected.items() if value} == \
+        {field: value for field, value in result_increments(*new_goals).items() if value}
+
+
+def test_correction_moves_the_match_between_the_result_arrays():
+    operation, increments, result = correct_team_result({"name": 'Ajax', "season": 2019}, (2, 1), (1, 1), 'match',
+                                                        -4.5, 'PSV', '2019-08-03')
+    update = operation._doc
+
+    assert result == 'draw'
+    assert increments == {'number_of_scored_goals': -1, 'number_of_wins': -1, 'number_of_draws': 1, 'points': -2,
+                          'goal_difference': -1, 'rating': -4.5}
+    assert (update['$pull'], update['$push']) == ({'matches_wins': 'match'}, {'matches_draw': 'match'})
+    assert update['$set'] == {'recent_form.$[entry].result': 'D', 'recent_form.$[entry].score': '1-1'}
+    assert operation._array_filters == [{'entry.opponent': 'PSV', 'entry.date': '2019-08-03'}]
+
+    operation, increments, result = correct_team_result({"name": 'Ajax', "season": 2019}, (2, 1), (3, 1), 'match',
+                                                        0, 'PSV', '2019-08-03')
+    assert (result, increments) == ('win', {'number_of_scored_goals': 1, 'goal_difference': 1})
+    assert '$pull' not in operation._doc and '$push' not in operation._doc
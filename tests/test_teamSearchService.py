@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+
+import pytest
+
+from services.teamSearchServices.teamSearchService import TeamSearchService, search_keys
+
+
+@pytest.fixture
+def team_search(monkeypatch):
+    team_search = TeamSearchService()
+    monkeypatch.setattr(team_search, 'keys', [])
+    monkeypatch.setattr(team_search, 'seasons', {})
+    return team_search
+
+
+def names(results):
+    return [result['name'] for result in results]
+
+
+def test_search_keys():
+    assert search_keys('Real Madrid') == ['real madrid', 'madrid']
+    assert search_keys('Go Ahead Eagles') == ['go ahead eagles', 'ahead eagles', 'eagles']
+    assert search_keys('-') == ['-']
+
+
+def test_search_ranks_the_names(team_search):
+    team_search.build({'Real Madrid': 10, 'Real Betis': 12, 'Madrid CF': 1, 'Real': 2, 'Atletico Madrid': 11,
+                       'Rayo Vallecano': 3})
+
+    assert names(team_search.search('real', 10)) == ['Real', 'Real Betis', 'Real Madrid']
+    assert names(team_search.search(' MAD ', 10)) == ['Madrid CF', 'Atletico Madrid', 'Real Madrid']
+    assert names(team_search.search('r', 2)) == ['Real Betis', 'Real Madrid']
+    assert team_search.search('ajax', 10) == []
+    with pytest.raises(ValueError):
+        team_search.search('  ', 10)
+
+
+def test_load_counts_the_seasons_of_the_teams(db, team_search):
+    for name, season in (('Ajax', 2019), ('Ajax', 2020), ('Ajax Cape Town', 2020), ('PSV', 2020)):
+        db.create_team({"name": name, "season": season})
+
+    assert team_search.load(db) == 3
+    assert team_search.search('aj', 10) == [{"name": 'Ajax', "seasons": 2}, {"name": 'Ajax Cape Town', "seasons": 1}]
+    assert names(team_search.search('cape', 10)) == ['Ajax Cape Town']
+
+
+def test_created_teams_are_added(db, team_search):
+    db.create_team({"name": 'Go Ahead Eagles', "season": 2019})
+    db.create_team({"name": 'Go Ahead Eagles', "season": 2020})
+
+    assert team_search.search('eag', 10) == [{"name": 'Go Ahead Eagles', "seasons": 2}]
+
+
+def test_parse_limit(team_search):
+    assert team_search.parse_limit(None) == team_search.default_limit
+    assert team_search.parse_limit('3') == 3
+    for limit in (0, team_search.max_limit + 1):
+        with pytest.raises(ValueError):
+            team_search.parse_limit(limit)
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+
+import asyncio
+import glob
+import os
+import shutil
+import threading
+
+import pytest
+
+from services.writeBehindServices.writeBehindService import WriteBehindService
+from tests.test_analyticsService import RESULTS
+
+TEAM_STATS = ('number_of_wins', 'number_of_draws', 'number_of_losses', 'number_of_scored_goals',
+              'number_of_received_goals', 'points', 'goal_difference')
+
+
+@pytest.fixture
+def write_behind(monkeypatch, tmp_path):
+    write_behind = WriteBehindService()
+    for name, value in (('enabled', True), ('journal_directory', str(tmp_path)), ('journal_fsync', False),
+                        ('max_pending_operations', 1000), ('pending', {}), ('pending_operations', 0),
+                        ('failed', []), ('journal', None), ('journal_path', None)):
+        monkeypatch.setattr(write_behind, name, value)
+    yield write_behind
+    crash(write_behind)
+
+
+def crash(write_behind):
+    """
+    Drop the buffered updates like a stopped worker - its journal is left behind (and unlocked)
+    """
+    if write_behind.journal is not None:
+        write_behind.journal.close()
+    write_behind.journal = None
+    write_behind.journal_path = None
+    write_behind.pending = {}
+    write_behind.pending_operations = 0
+
+
+def add_results(db):
+    for home_team, away_team, score, date in RESULTS:
+        db.create_match_with_score({"home_team": home_team, "away_team": away_team, "score": score, "date": date})
+
+
+def team_stats(db):
+    return {team['name']: ({stat: team.get(stat, 0) for stat in TEAM_STATS},
+                           len(team['matches_wins']), len(team['matches_draw']), len(team['matches_loss']),
+                           [entry['date'] for entry in team['recent_form']])
+            for team in db.client.FMT.teams.find()}
+
+
+def test_flush_writes_the_merged_updates(db, write_behind):
+    add_results(db)
+    assert db.client.FMT.teams.find_one({'name': 'Ajax'})['points'] == 0
+    assert write_behind.pending_operations == 10
+
+    assert write_behind.flush(db) == 3
+    stats = team_stats(db)
+    assert stats['Ajax'][0]['points'] == 8
+    assert stats['Ajax'][1:4] == (2, 2, 0)
+    assert len(stats['Ajax'][4]) == 4
+    assert glob.glob(os.path.join(write_behind.journal_directory, '*.flushing')) == []
+
+
+def test_journal_replay_is_idempotent(db, write_behind, tmp_path):
+    add_results(db)
+    journal = shutil.copy(write_behind.journal_path, tmp_path / 'copy')
+    write_behind.flush(db)
+    flushed = team_stats(db)
+
+    # the journal of the flushed updates replayed again (a worker that stopped before it removed the journal)
+    crash(write_behind)
+    shutil.copy(journal, tmp_path / 'team_stats-1.journal')
+    assert write_behind.recover(db) == 0
+    assert team_stats(db) == flushed
+    assert os.listdir(tmp_path) == ['copy']
+
+
+def test_recover_replays_the_journal_of_a_stopped_worker(db, write_behind, tmp_path):
+    add_results(db)
+    journal = shutil.copy(write_behind.journal_path, tmp_path / 'copy')
+    crash(write_behind)
+
+    assert write_behind.recover(db) == 10
+    recovered = team_stats(db)
+    assert {name: stats[0]['points'] for name, stats in recovered.items()} == {'Ajax': 8, 'PSV': 4, 'Feyenoord': 1}
+    assert recovered['Feyenoord'][1:] == (0, 1, 2, ['2019-08-10', '2019-08-17', '2019-08-31'])
+
+    shutil.copy(journal, tmp_path / 'team_stats-1.journal')
+    assert write_behind.recover(db) == 0
+    assert team_stats(db) == recovered
+
+
+def test_running_worker_journal_is_not_replayed(db, write_behind):
+    add_results(db)
+
+    assert write_behind.recover(db) == 0
+    assert db.client.FMT.teams.find_one({'name': 'Ajax'})['points'] == 0
+    assert write_behind.flush(db) == 3
+
+
+def test_flusher_writes_off_the_event_loop(db, write_behind, monkeypatch):
+    flush = write_behind.flush
+    threads = []
+
+    def recorded_flush(db):
+        threads.append(threading.current_thread())
+        return flush(db)
+    monkeypatch.setattr(write_behind, 'flush', recorded_flush)
+    monkeypatch.setattr(write_behind, 'flush_interval', 0.01)
+
+    async def run():
+        add_results(db)
+        flusher = asyncio.ensure_future(write_behind.run_flusher(db))
+        await asyncio.sleep(0.1)
+        flusher.cancel()
+    asyncio.run(run())
+
+    assert db.client.FMT.teams.find_one({'name': 'Ajax'})['points'] == 8
+    assert threads and threading.main_thread() not in threads